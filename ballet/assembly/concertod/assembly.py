@@ -8,7 +8,7 @@
 import math
 import time
 from os.path import exists
-from typing import Dict, List, Set, Optional
+from typing import Callable, Dict, List, Set, Optional
 
 import json
 import queue
@@ -272,6 +272,8 @@ class Assembly(object):
 
         # set of active components
         self.act_components: Set[str] = set()
+        # called with the components that became idle, see add_idle_listener
+        self._idle_listeners: List[Callable[[Set[str]], None]] = []
 
         # Nombre permettant de savoir à partir de quelle instruction reprendre le programme
         self.global_nb_instructions_done: Dict[str, int] = {reconfiguration_name: 0}
@@ -423,7 +425,20 @@ class Assembly(object):
         self.act_components.add(component_name)
 
     def remove_from_active_components(self, idle_components: Set[str]):
+        newly_idle = self.act_components & idle_components
         self.act_components.difference_update(idle_components)
+        if newly_idle:
+            for listener in self._idle_listeners:
+                listener(newly_idle)
+
+    def add_idle_listener(self, listener: Callable[[Set[str]], None]):
+        """
+        Notifies listener(components) when local components finish the execution of their queued behaviors
+        """
+        self._idle_listeners.append(listener)
+
+    def remove_idle_listener(self, listener: Callable[[Set[str]], None]):
+        self._idle_listeners.remove(listener)
 
     def instanciate_component(self, name, comp_type: str):
         if name == "server":
@@ -6,16 +6,20 @@ A = TypeVar('A')
 class OrientedUnweightenedGraph:
 
     def __init__(self, vertices: list[A], edges: list[(A, A)]):
-        self._vertices = vertices
-        self._out_edges = {v: [] for v in vertices}
-        self._in_edges = {v: [] for v in vertices}
+        # Vertices are hashed (duplicates are merged), in the order of their first occurrence
+        self._vertices = dict.fromkeys(vertices)
+        self._out_edges = {v: [] for v in self._vertices}
+        self._in_edges = {v: [] for v in self._vertices}
         for (src, trg) in edges:
             self._out_edges[src].append(trg)
             self._in_edges[trg].append(src)
 
+    def vertices(self) -> list[A]:
+        return list(self._vertices)
+
     def is_transition(self, src: A, trg: A):
         if src in self._out_edges.keys():
-            if trg in self._out_edges[src].keys():
+            if trg in self._out_edges[src]:
                 return True
         return False
 
@@ -29,7 +33,9 @@ class OrientedUnweightenedGraph:
 
     def add_vertex(self, vertex: A):
         assert vertex not in self._vertices
+        self._vertices[vertex] = None
         self._out_edges[vertex] = []
+        self._in_edges[vertex] = []
 
     def rm_edge(self, src: A, trg: A):
         assert src in self._vertices and trg in self._vertices
@@ -0,0 +1,121 @@
+from typing import Optional, Union
+
+from ballet.assembly.plan.plan import Plan, PlanDAG, Instruction, PushB, Wait, chain
+from ballet.assembly.simplified.assembly import ComponentType, Place
+
+
+def behavior_duration(t: ComponentType, behavior: str, place: Optional[Place] = None) -> tuple[int, Optional[Place]]:
+    """
+    Duration of a behavior executed from place, and the place it ends in: the transitions leaving a place are fired
+    together and a place is reached once all its incoming transitions are done, so the duration is the longest path
+    of transition costs from place. Without place, the longest path of the whole behavior is taken.
+    """
+    transitions = list(t.get_behavior(behavior).transitions())
+    sources = [place] if place is not None else [tr.source() for tr in transitions]
+    # Longest path to each reached place, the transitions of a behavior being acyclic
+    reached: dict[Place, int] = {src: 0 for src in sources}
+    stack = list(sources)
+    while len(stack) != 0:
+        src = stack.pop()
+        for tr in transitions:
+            if tr.source() == src:
+                (dst, _) = tr.destination()
+                if reached.get(dst, -1) < reached[src] + tr.cost():
+                    reached[dst] = reached[src] + tr.cost()
+                    stack.append(dst)
+    (final, duration) = max(reached.items(), key=lambda item: item[1], default=(place, 0))
+    if duration == 0:
+        # The behavior has no transition from place
+        return 0, place
+    return duration, final
+
+
+class Schedule:
+    """
+    Expected execution of a merged plan, when each behavior takes the sum of its transition costs along its longest
+    path. A component executes its pushed behaviors in order; a wait ends with the behavior it waits for; the other
+    instructions take no time.
+    """
+
+    def __init__(self, name: str, start: dict[Instruction, int], end: dict[Instruction, int],
+                 cause: dict[Instruction, Optional[Instruction]]):
+        self._name = name
+        self._start = start
+        self._end = end
+        self._cause = cause
+
+    def name(self) -> str:
+        return self._name
+
+    def start(self, instr: Instruction) -> int:
+        return self._start[instr]
+
+    def end(self, instr: Instruction) -> int:
+        return self._end[instr]
+
+    def makespan(self) -> int:
+        return max(self._end.values(), default=0)
+
+    def critical_path(self) -> list[Instruction]:
+        # The instructions that delayed the last one to end, in order
+        if len(self._end) == 0:
+            return []
+        instr = max(self._end.keys(), key=lambda i: self._end[i])
+        path = []
+        while instr is not None:
+            path.append(instr)
+            instr = self._cause[instr]
+        path.reverse()
+        return path
+
+    def __str__(self):
+        res = f"==============\n{self._name}: makespan {self.makespan()}\n==============\n"
+        return res + '\n'.join(map(lambda instr: f"[{self._start[instr]}, {self._end[instr]}] {instr}",
+                                   self.critical_path()))
+
+
+def estimate_makespan(plan: Union[Plan, PlanDAG], types: dict[str, ComponentType],
+                      active: Optional[dict[str, Place]] = None) -> Schedule:
+    """
+    types[component] gives the type of each component of the plan, and active[component] its active place before the
+    plan (the place of a component is then followed through its behaviors). Raises a ValueError on a component of
+    unknown type.
+    """
+    dag = plan if isinstance(plan, PlanDAG) else chain(plan)
+    position = {instr: i for (i, instr) in enumerate(dag.instructions())}
+    places = dict(active) if active is not None else {}
+    start: dict[Instruction, int] = {}
+    end: dict[Instruction, int] = {}
+    cause: dict[Instruction, Optional[Instruction]] = {}
+    last: dict[str, PushB] = {}  # last behavior pushed to each component
+
+    def release(pred: Instruction) -> int:
+        # A pushB only queues its behavior: the next instructions are issued without waiting for it
+        return start[pred] if pred.isPushB() else end[pred]
+
+    for instr in dag.instructions():
+        preds = [pred for pred in dag.predecessors(instr) if position[pred] < position[instr]]
+        first = max(preds, key=release, default=None)
+        start[instr] = release(first) if first is not None else 0
+        end[instr] = start[instr]
+        cause[instr] = first
+        if instr.isPushB():
+            pushb: PushB = instr
+            comp = pushb.component()
+            if comp not in types:
+                raise ValueError(f"Unknown type of component {comp}")
+            (duration, places[comp]) = behavior_duration(types[comp], pushb.behavior(), places.get(comp))
+            begin = start[instr]
+            if comp in last and end[last[comp]] > begin:
+                begin = end[last[comp]]
+                cause[instr] = last[comp]
+            end[instr] = begin + duration
+            last[comp] = pushb
+        elif instr.isWait():
+            wait: Wait = instr
+            waited = PushB(wait.component(), wait.behavior())
+            if waited in end and end[waited] > end[instr]:
+                end[instr] = end[waited]
+                cause[instr] = waited
+    return Schedule(dag.name(), start, end, cause)
+
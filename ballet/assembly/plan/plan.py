@@ -1,4 +1,5 @@
 from abc import ABC
+from collections import deque
 
 from ballet.assembly.plan.graph import OrientedUnweightenedGraph
 from ballet.assembly.simplified.assembly import CInstance
@@ -248,7 +249,11 @@ class Plan:
 
 def build_graph(plans: list[Plan]):
     vertices: list[Instruction] = list_utils.flatmap(lambda p: p.instructions(), plans)
-    waits: list[Wait] = list_utils.findAll(lambda instr: instr.isWait(), vertices)
+    # waits[(component, behavior)]: the wait instruction of a pushB, if any
+    waits: dict[tuple[str, str], Wait] = {}
+    for instr in vertices:
+        if instr.isWait():
+            waits.setdefault((instr.component(), instr.behavior()), instr)
     graph: OrientedUnweightenedGraph = OrientedUnweightenedGraph(vertices, {})
     for plan in plans:
         instructions: list[Instruction] = plan.instructions()
@@ -259,32 +264,45 @@ def build_graph(plans: list[Plan]):
                 graph.add_edge(instr1, instr2)
             if instr1.isPushB():
                 pushb: PushB = instr1
-                potential_wait = list_utils.find(lambda wait: wait.behavior() == pushb.behavior() and
-                                                              wait.component() == pushb.component(), waits)
+                potential_wait = waits.get((pushb.component(), pushb.behavior()))
                 if potential_wait is not None:
                     graph.add_edge(instr1, potential_wait)
     return graph
 
 
 def find_order(graph, roots):
-    def pop_a_vertex(to_explore, explored, in_edges):
-        for v in to_explore:
-            if list_utils.forall(lambda u: u in explored, in_edges[v]):
-                to_explore.remove(v)
-                return v
-        return to_explore.pop(0)
-
+    # Kahn's topological sort of the vertices reachable from the roots, in O(V + E): a vertex is ordered once all
+    # its reachable predecessors are. If there are none left (a cycle), the first discovered vertex is taken.
     simple_graph = graph.graph()
-    to_explore = []
-    for root in roots:
-        to_explore.append(root)
-    order = []
+    discovered = dict.fromkeys(roots)
+    to_explore = deque(discovered)
     while to_explore:
-        vertex = pop_a_vertex(to_explore, order, graph.in_edges())
-        if vertex not in order:
-            order.append(vertex)
-            for neighbor in simple_graph[vertex]:
+        for neighbor in simple_graph[to_explore.popleft()]:
+            if neighbor not in discovered:
+                discovered[neighbor] = None
                 to_explore.append(neighbor)
+    in_degree = {v: 0 for v in discovered}
+    for v in discovered:
+        for u in set(graph.in_edges()[v]):
+            if u in discovered:
+                in_degree[v] = in_degree[v] + 1
+    ready = deque(v for v in discovered if in_degree[v] == 0)
+    order = []
+    ordered = set()
+    pending = iter(discovered)
+    while len(order) < len(discovered):
+        if not ready:
+            ready.append(next(v for v in pending if v not in ordered))
+        vertex = ready.popleft()
+        if vertex in ordered:
+            continue
+        order.append(vertex)
+        ordered.add(vertex)
+        for neighbor in dict.fromkeys(simple_graph[vertex]):
+            if neighbor not in ordered:
+                in_degree[neighbor] = in_degree[neighbor] - 1
+                if in_degree[neighbor] == 0:
+                    ready.append(neighbor)
     return order
 
 
@@ -299,6 +317,9 @@ def find_valid_root(plans: list[Plan]) -> Instruction:
 def find_roots(plans: list[Plan]) -> list[Instruction]:
     res = []
     for plan in plans:
+        # A component may have nothing to do
+        if len(plan.instructions()) == 0:
+            continue
         fst_instruction = plan.instructions()[0]
         if fst_instruction.isPushB():
             res.append(fst_instruction)
@@ -309,3 +330,97 @@ def merge_plans(plans: list[Plan]) -> Plan:
     roots = find_roots(plans)
     full_graph: OrientedUnweightenedGraph = build_graph(plans)
     return Plan("merged", find_order(full_graph, roots))
+
+
+class PlanDAG:
+    """
+    Merged plan as a DAG: the instructions, in a topological order, and the happens-before edges between them (the
+    order of each local plan, and each pushB before the waits for it).
+
+    Instructions of the same level have no happens-before relation between them, and can be issued together: the
+    execution time follows the critical path of the DAG rather than the sum of the instructions.
+    """
+
+    def __init__(self, name: str, instructions: list[Instruction], edges: dict[Instruction, list[Instruction]]):
+        self._name = name
+        self._instructions = instructions
+        self._successors = {instr: list(dict.fromkeys(edges.get(instr, []))) for instr in instructions}
+        self._predecessors = {instr: [] for instr in instructions}
+        for (src, targets) in self._successors.items():
+            for trg in targets:
+                self._predecessors[trg].append(src)
+        self._levels = None
+
+    def name(self) -> str:
+        return self._name
+
+    def instructions(self) -> list[Instruction]:
+        return self._instructions
+
+    def successors(self, instr: Instruction) -> list[Instruction]:
+        return self._successors[instr]
+
+    def predecessors(self, instr: Instruction) -> list[Instruction]:
+        return self._predecessors[instr]
+
+    def edges(self) -> list[tuple[Instruction, Instruction]]:
+        return [(src, trg) for (src, targets) in self._successors.items() for trg in targets]
+
+    def levels(self) -> list[list[Instruction]]:
+        # The level of an instruction is the length of the longest chain of predecessors before it. Edges going
+        # backward in the topological order (only found on cyclic plans) are ignored.
+        if self._levels is None:
+            position = {instr: i for (i, instr) in enumerate(self._instructions)}
+            level: dict[Instruction, int] = {}
+            levels: list[list[Instruction]] = []
+            for instr in self._instructions:
+                level[instr] = max((level[pred] + 1 for pred in self._predecessors[instr]
+                                    if position[pred] < position[instr]), default=0)
+                if level[instr] == len(levels):
+                    levels.append([])
+                levels[level[instr]].append(instr)
+            self._levels = levels
+        return self._levels
+
+    def depth(self) -> int:
+        return len(self.levels())
+
+    def width(self) -> int:
+        return max(map(len, self.levels()), default=0)
+
+    def to_plan(self) -> Plan:
+        return Plan(self._name, list_utils.flatmap(lambda level: level, self.levels()))
+
+    def __str__(self):
+        res = f"==============\n{self._name}\n==============\n"
+        return res + '\n'.join(map(lambda level: ' || '.join(map(str, level)), self.levels()))
+
+
+def chain(plan: Plan) -> PlanDAG:
+    # A flat plan carries no dependency: its instructions are chained
+    instructions = list(dict.fromkeys(plan.instructions()))
+    return PlanDAG(plan.name(), instructions, {src: [trg] for (src, trg) in zip(instructions, instructions[1:])})
+
+
+def merge_plans_dag(plans: list[Plan], name: str = "merged", before: list[Instruction] = (),
+                    after: list[Instruction] = ()) -> PlanDAG:
+    # The instructions of before (resp. after) are chained, and happen before (resp. after) all the merged ones
+    full_graph: OrientedUnweightenedGraph = build_graph(plans)
+    order = find_order(full_graph, find_roots(plans))
+    edges = {instr: list(full_graph.graph()[instr]) for instr in order}
+    before = list(before)
+    after = list(after)
+    for i in range(len(before) - 1):
+        edges[before[i]] = [before[i + 1]]
+    for i in range(len(after) - 1):
+        edges[after[i]] = [after[i + 1]]
+    targets = {trg for successors in edges.values() for trg in successors}
+    # A cyclic plan may have no source nor sink: its first (resp. last) instruction is taken
+    sources = [instr for instr in order if instr not in targets] or order[:1]
+    sinks = [instr for instr in order if len(edges[instr]) == 0] or order[-1:]
+    if len(before) != 0:
+        edges[before[-1]] = sources if len(order) != 0 else after[:1]
+    if len(after) != 0:
+        for sink in sinks:
+            edges[sink] = edges[sink] + [after[0]]
+    return PlanDAG(name, before + order + after, edges)
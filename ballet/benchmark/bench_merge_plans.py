@@ -0,0 +1,99 @@
+"""
+Time of merge_plans (indexed waits and Kahn's topological sort) against the former implementation (linear scan of
+the waits per pushB, and scan of the vertices to explore for one whose predecessors are all ordered), on synthetic
+local plans: each component pushes its behaviors in sequence and waits for the behaviors of the previous components.
+The former implementation is only run up to --legacy-max instructions.
+"""
+import argparse
+import time
+
+from ballet.assembly.plan.graph import OrientedUnweightenedGraph
+from ballet.assembly.plan.plan import Plan, PushB, Wait, Instruction, merge_plans, find_roots
+from ballet.utils import list_utils
+
+
+def legacy_build_graph(plans: list[Plan]):
+    vertices: list[Instruction] = list_utils.flatmap(lambda p: p.instructions(), plans)
+    waits: list[Wait] = list_utils.findAll(lambda instr: instr.isWait(), vertices)
+    graph: OrientedUnweightenedGraph = OrientedUnweightenedGraph(vertices, {})
+    for plan in plans:
+        instructions: list[Instruction] = plan.instructions()
+        for i in range(0, len(instructions)):
+            instr1: Instruction = instructions[i]
+            if i < len(instructions) - 1:
+                graph.add_edge(instr1, instructions[i + 1])
+            if instr1.isPushB():
+                potential_wait = list_utils.find(lambda wait: wait.behavior() == instr1.behavior() and
+                                                              wait.component() == instr1.component(), waits)
+                if potential_wait is not None:
+                    graph.add_edge(instr1, potential_wait)
+    return graph
+
+
+def legacy_find_order(graph, roots):
+    def pop_a_vertex(to_explore, explored, in_edges):
+        for v in to_explore:
+            if list_utils.forall(lambda u: u in explored, in_edges[v]):
+                to_explore.remove(v)
+                return v
+        return to_explore.pop(0)
+
+    simple_graph = graph.graph()
+    to_explore = list(roots)
+    order = []
+    while to_explore:
+        vertex = pop_a_vertex(to_explore, order, graph.in_edges())
+        if vertex not in order:
+            order.append(vertex)
+            for neighbor in simple_graph[vertex]:
+                to_explore.append(neighbor)
+    return order
+
+
+def legacy_merge_plans(plans: list[Plan]) -> Plan:
+    return Plan("merged", legacy_find_order(legacy_build_graph(plans), find_roots(plans)))
+
+
+def synthetic_plans(components: int, behaviors: int, waits: int) -> list[Plan]:
+    # Before pushing its k-th behavior, a component waits for the k-th behaviors of the `waits` previous components
+    # (the farthest first, so that the waits shared by several plans are ordered the same way in all of them)
+    plans = []
+    for c in range(components):
+        instructions = []
+        for b in range(behaviors):
+            for j in range(min(waits, c), 0, -1):
+                instructions.append(Wait(f"c{c - j}", f"b{b}"))
+            instructions.append(PushB(f"c{c}", f"b{b}"))
+        plans.append(Plan(f"c{c}", instructions))
+    return plans
+
+
+def timed(merge, plans: list[Plan]) -> tuple[float, list[Instruction]]:
+    start = time.perf_counter()
+    merged = merge(plans).instructions()
+    return time.perf_counter() - start, merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the merge of local plans")
+    parser.add_argument("--components", type=int, nargs='+', default=[10, 20, 100, 1000, 5000])
+    parser.add_argument("--behaviors", type=int, default=10)
+    parser.add_argument("--waits", type=int, default=1, help="previous components waited for before each pushB")
+    parser.add_argument("--legacy-max", type=int, default=500)
+    args = parser.parse_args()
+    print("components,instructions,merged_s,legacy_s,same_length")
+    for components in args.components:
+        plans = synthetic_plans(components, args.behaviors, args.waits)
+        size = sum(len(plan.instructions()) for plan in plans)
+        merged_time, merged = timed(merge_plans, plans)
+        line = f"{components},{size},{merged_time:.3f}"
+        if size <= args.legacy_max:
+            legacy_time, legacy = timed(legacy_merge_plans, plans)
+            line = line + f",{legacy_time:.3f},{len(legacy) == len(merged)}"
+        else:
+            line = line + ",,"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
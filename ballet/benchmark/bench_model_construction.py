@@ -0,0 +1,47 @@
+"""
+Time spent building the MiniZinc models of an assembly of n instances, with the reduced transition matrix computed
+once per component type (shared) or once per instance and per copy (as before the matrix was shared).
+"""
+import argparse
+import time
+
+from ballet.assembly.simplified.assembly_d import DecentralizedComponentInstance
+from ballet.assembly.simplified.type.openstack import mariadb_worker_type, keystone_type, nova_type
+from ballet.planner.automata import clear_shared_matrices
+from ballet.planner.minizinc.mzn_regular import MiniZincModelComponent
+
+
+def build_assembly(size: int) -> list[DecentralizedComponentInstance]:
+    types = [mariadb_worker_type, keystone_type, nova_type]
+    return [DecentralizedComponentInstance(f"comp{i}", types[i % len(types)]()) for i in range(size)]
+
+
+def construct(instances: list[DecentralizedComponentInstance], shared: bool, copies: int) -> float:
+    clear_shared_matrices()
+    start = time.perf_counter()
+    for instance in instances:
+        if not shared:
+            clear_shared_matrices()
+        model = MiniZincModelComponent(instance, instance.type().initial_place().name(), 10)
+        for _ in range(copies):
+            if not shared:
+                clear_shared_matrices()
+            model.copy()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the construction of component models")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument("--copies", type=int, default=5, help="number of copies per instance (i.e., solving rounds)")
+    args = parser.parse_args()
+    print("instances,per_instance_s,shared_s,speedup")
+    for size in args.sizes:
+        instances = build_assembly(size)
+        per_instance = construct(instances, False, args.copies)
+        shared = construct(instances, True, args.copies)
+        print(f"{size},{per_instance:.4f},{shared:.4f},{per_instance / shared:.1f}")
+
+
+if __name__ == "__main__":
+    main()
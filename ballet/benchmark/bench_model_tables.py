@@ -0,0 +1,89 @@
+"""
+Size and flatten+solve time of component models generated with the former if/elseif cost function and port
+disjunctions (legacy) and with the transition_cost and port_bound tables.
+Times are only measured when MiniZinc is installed.
+"""
+import argparse
+import time
+
+import minizinc
+
+from ballet.assembly.simplified.assembly_d import DecentralizedComponentInstance
+from ballet.assembly.simplified.type.basics import parallel_user_type
+from ballet.assembly.simplified.type.openstack import mariadb_worker_type, nova_type
+from ballet.planner.minizinc.mzn_app import MiniZincApp
+from ballet.planner.minizinc.mzn_regular import MiniZincModelComponent, MiniZincPortRegularConstraint, \
+    MiniZincBehaviorRegularConstraint
+from ballet.utils.list_utils import map_index
+from ballet.utils.mzn_utils import mzn_max_int
+
+
+class LegacyMiniZincModelComponent(MiniZincModelComponent):
+
+    def word_states_ports(self) -> str:
+        list_ports_status = []
+        for port in self._ports.keys():
+            port_status_name = port + "_status"
+            conditional = ' \\/ '.join(map(lambda place: f" states[i] = {place}", self._ports[port]))
+            port_status = f"""array[1..{self._word_length}+1] of var STATUS : {port_status_name};
+constraint forall (i in 1..{self._word_length}+1) ({port_status_name}[i] = {MiniZincPortRegularConstraint.enabled} <-> {conditional});"""
+            list_ports_status.append(port_status)
+        sequence = f"array[1..{self._word_length}] of var BEHAVIOR: sequence;"
+        active_place = f"array[1..{self._word_length}+1] of var STATE: states;"
+        active_place = active_place + "\n" + f"constraint forall (i in 1..{self._word_length}) " \
+                                             f"(states[i + 1] = transitions[states[i], sequence[i]]);"
+        port_status = '\n'.join(list_ports_status)
+        return '\n'.join([sequence, active_place, port_status])
+
+    def trace_cost(self):
+        cond = '\n'.join(map_index(lambda key, i: ("if " if i == 0 else "elseif ") +
+                                                  f"state = {key[0]} /\\ behavior = {key[1]} then\n{self._costs[key]}",
+                                   list(self._costs.keys())))
+        return f"""
+array[1..{self._word_length}] of var int: cost;
+constraint forall (i in 1..{self._word_length}) (cost[i] = fcost(states[i], sequence[i]));
+function var int: fcost(var STATE: state, var BEHAVIOR: behavior) =
+{cond}
+else 
+{mzn_max_int}
+endif;
+"""
+
+
+def models(comp: DecentralizedComponentInstance, goal: str, word_length: int):
+    constraints = {MiniZincBehaviorRegularConstraint(goal)}
+    place = comp.type().initial_place().name()
+    return (LegacyMiniZincModelComponent(comp, place, word_length, constraints),
+            MiniZincModelComponent(comp, place, word_length, constraints))
+
+
+def flatten_and_solve(content: str, solver: str):
+    start = time.perf_counter()
+    result = MiniZincApp(content=content).run(solver).result()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the generated cost and port tables")
+    parser.add_argument("--users", type=int, nargs='+', default=[1, 5, 10, 20],
+                        help="sizes of the parallel_user types")
+    parser.add_argument("--word-length", type=int, default=10)
+    parser.add_argument("--solver", default="gecode")
+    args = parser.parse_args()
+    comps = [DecentralizedComponentInstance(f"user{n}", parallel_user_type(n)) for n in args.users] + \
+            [DecentralizedComponentInstance("worker", mariadb_worker_type()),
+             DecentralizedComponentInstance("nova", nova_type())]
+    timed = minizinc.default_driver is not None
+    print("component,legacy_chars,tables_chars" + (",legacy_s,tables_s,same_objective" if timed else ""))
+    for comp in comps:
+        legacy, tables = models(comp, "deploy", args.word_length)
+        line = f"{comp.id()},{len(legacy.content())},{len(tables.content())}"
+        if timed:
+            legacy_time, legacy_result = flatten_and_solve(legacy.content(), args.solver)
+            tables_time, tables_result = flatten_and_solve(tables.content(), args.solver)
+            line = line + f",{legacy_time:.3f},{tables_time:.3f},{legacy_result.objective == tables_result.objective}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
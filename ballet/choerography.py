@@ -1,7 +1,8 @@
 import argparse
 
 from ballet.assembly.concertod.assembly import Assembly
-from ballet.assembly.plan.plan import merge_plans, Plan, Add, Delete, Disconnect, Wait, PushB, Connect
+from ballet.assembly.plan.plan import merge_plans_dag, PlanDAG
+from ballet.executor.plan_executor import PlanExecutor
 from ballet.gateway.dispatcher import Dispatcher
 from ballet.gateway.parser import AssemblyParser, InventoryParser, GoalParser
 from ballet.planner.communication.constraint_message import MailboxMessaging, HybridMessaging
@@ -33,35 +34,17 @@ def plan(instances, active, inventory, port, goals, goals_place, comp_in, conn_i
                                 remote_messaging=gRPCMessagingPlanner(instances, inventory, port, verbose=True),
                                 local_comps=instances)
     plans = resolve(instances, active, goals, goals_place, messaging)
-    unified_plan: Plan = merge_plans(list(plans.values()))
     to_add, to_del, to_con, to_disc = diff_assembly(comp_in, conn_in, comp_out, conn_out)
-    return Plan("Final plan", to_add + to_con + unified_plan.instructions() + to_disc + to_del)
+    return merge_plans_dag(list(plans.values()), "Final plan", before=to_add + to_con, after=to_disc + to_del)
 
 
-def execute(assembly: Assembly, plan: Plan, running=False):
-    # TODO: remove print and concretely execute the plan
+def execute(assembly: Assembly, plan: PlanDAG, running=False):
     if not running:
         print(f"{plan}\n")
     else:
-        for instruction in plan.instructions():
-            if instruction.isAdd():
-                add: Add = instruction
-                assembly.add_component(add.component(), add.type())
-            elif instruction.isCon():
-                connect: Connect = instruction
-                assembly.connect(connect.provider(), connect.providing_port(), connect.user(), connect.using_port())
-            elif instruction.isPushB():
-                pushb: PushB = instruction
-                assembly.push_b(pushb.component(), pushb.behavior())
-            elif instruction.isWait():
-                wait: Wait = instruction
-                assembly.wait(wait.component())
-            elif instruction.isDiscon():
-                disconnect: Disconnect = instruction
-                assembly.disconnect(disconnect.provider(), disconnect.providing_port(), disconnect.user(), disconnect.using_port())
-            elif instruction.isDel():
-                delete: Delete = instruction
-                assembly.del_component(delete.component())
+        executor = PlanExecutor(assembly)
+        executor.execute(plan)
+        print(f"Plan executed in {executor.report()['makespan']:.3f}s")
     # TODO: What is assembly.synchronize()? It appears in some example but never defined
 
 
@@ -0,0 +1,135 @@
+import time
+from collections import deque
+from typing import Any, Callable, Optional, Set, Union
+
+from ballet.assembly.concertod.assembly import Assembly
+from ballet.assembly.plan.plan import Plan, PlanDAG, Instruction, Add, Connect, PushB, Wait, Disconnect, Delete, \
+    chain
+from ballet.executor import global_variables
+from ballet.executor.communication import communication_handler
+from ballet.executor.communication.communication_handler import INACTIVE
+
+
+class PlanExecutor:
+    """
+    Executes a merged plan on a Concerto-D assembly, at the parallelism of its DAG: an instruction is issued as soon as
+    all its predecessors are done, and the semantics of the assembly is run while behaviors are executed.
+
+    A pushB is done when it is queued (the component executes its behaviors in order), but its timing ends when the
+    component becomes idle. A wait does not block: it is done when the assembly notifies that the component is idle
+    (remote components are polled). As with Assembly.wait, a component is idle once all its queued behaviors are
+    executed.
+
+    Timings are in seconds from the start of the execution, as given by clock.
+    """
+
+    def __init__(self, assembly: Assembly, clock: Callable[[], float] = time.perf_counter, verbose: bool = False):
+        self._assembly = assembly
+        self._clock = clock
+        self._verbose = verbose
+        self._start = 0.0
+        self._timings: dict[Instruction, tuple[float, Optional[float]]] = {}
+        self._report: dict[str, Any] = {}
+
+    def _now(self) -> float:
+        return self._clock() - self._start
+
+    def _is_local(self, component: str) -> bool:
+        return component in self._assembly.components
+
+    def _is_idle(self, component: str) -> bool:
+        if self._is_local(component):
+            return component not in self._assembly.act_components
+        return communication_handler.get_remote_component_state(component, self._assembly.get_name(),
+                                                                global_variables.reconfiguration_name) == INACTIVE
+
+    def _issue(self, instruction: Instruction):
+        if instruction.isAdd():
+            add: Add = instruction
+            self._assembly.add_component(add.component(), add.type())
+        elif instruction.isCon():
+            connect: Connect = instruction
+            self._assembly.connect(connect.provider(), connect.providing_port(), connect.user(), connect.using_port())
+        elif instruction.isPushB():
+            pushb: PushB = instruction
+            self._assembly.push_b(pushb.component(), pushb.behavior())
+        elif instruction.isDiscon():
+            disconnect: Disconnect = instruction
+            self._assembly.disconnect(disconnect.provider(), disconnect.providing_port(), disconnect.user(),
+                                      disconnect.using_port())
+        elif instruction.isDel():
+            delete: Delete = instruction
+            self._assembly.del_component(delete.component())
+
+    def execute(self, plan: Union[Plan, PlanDAG]) -> dict[Instruction, tuple[float, float]]:
+        dag = plan if isinstance(plan, PlanDAG) else chain(plan)
+        # Edges going backward in the topological order (only found on cyclic plans) are ignored, as in levels()
+        position = {instr: i for (i, instr) in enumerate(dag.instructions())}
+        remaining = {instr: len([pred for pred in dag.predecessors(instr) if position[pred] < position[instr]])
+                     for instr in dag.instructions()}
+        ready = deque(instr for instr in dag.instructions() if remaining[instr] == 0)
+        running: dict[str, list[PushB]] = {}  # pushed behaviors of each component, until it is idle
+        waiting: dict[str, list[Wait]] = {}
+        notified: Set[str] = set()
+        iterations = 0
+        max_running = 0
+        self._start = self._clock()
+        self._timings = {}
+
+        def done(instr: Instruction, start: float):
+            self._timings[instr] = (start, None if instr.isPushB() else self._now())
+            for succ in dag.successors(instr):
+                if position[instr] < position[succ]:
+                    remaining[succ] = remaining[succ] - 1
+                    if remaining[succ] == 0:
+                        ready.append(succ)
+
+        def idle(component: str):
+            end = self._now()
+            for pushb in running.pop(component, []):
+                self._timings[pushb] = (self._timings[pushb][0], end)
+            for wait in waiting.pop(component, []):
+                done(wait, self._timings[wait][0])
+
+        self._assembly.add_idle_listener(notified.update)
+        try:
+            while len(ready) != 0 or len(running) != 0 or len(waiting) != 0:
+                while len(ready) != 0:
+                    instr = ready.popleft()
+                    start = self._now()
+                    if instr.isWait():
+                        self._timings[instr] = (start, None)
+                        waiting.setdefault(instr.component(), []).append(instr)
+                        if self._is_idle(instr.component()):
+                            idle(instr.component())
+                    else:
+                        self._issue(instr)
+                        if instr.isPushB():
+                            running.setdefault(instr.component(), []).append(instr)
+                        done(instr, start)
+                    if self._verbose:
+                        print(f"[{start:.3f}] {instr}")
+                max_running = max(max_running, len(running))
+                if len(running) == 0 and len(waiting) == 0:
+                    break
+                self._assembly.run_semantics_iteration()
+                iterations = iterations + 1
+                # Notifications are checked again: a component may have been pushed a behavior since
+                for component in notified | set(comp for comp in waiting if not self._is_local(comp)):
+                    if (component in running or component in waiting) and self._is_idle(component):
+                        idle(component)
+                notified.clear()
+        finally:
+            self._assembly.remove_idle_listener(notified.update)
+        makespan = self._now()
+        self._report = {"makespan": makespan, "instructions": len(self._timings), "iterations": iterations,
+                        "max_running_components": max_running}
+        return self.timings()
+
+    def timings(self) -> dict[Instruction, tuple[float, float]]:
+        # timings[instruction] -> (start, end)
+        return dict(self._timings)
+
+    def report(self) -> dict[str, Any]:
+        # {makespan, instructions, iterations (of the semantics), max_running_components}
+        return self._report
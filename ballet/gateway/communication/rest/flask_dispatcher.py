@@ -1,10 +1,11 @@
 import multiprocessing
 import time
-from typing import Set
+from typing import Optional, Set
 
 import requests
 from flask import Flask, request, jsonify, make_response
 
+from ballet.planner.communication.discovery import PeerDiscovery
 from ballet.planner.goal import BehaviorReconfigurationGoal, PortReconfigurationGoal, ReconfigurationGoal
 from ballet.utils import set_utils
 
@@ -118,15 +119,11 @@ class ClientDispatcher:
         self._serveur.start()
         self._goals = goals
 
-    def global_goal_synchronization(self):
+    def global_goal_synchronization(self, ready_timeout: Optional[float] = None):
+        # All the dispatchers are pinged concurrently, then the goals are sent to each of them
+        print(f"Trying to ping [{','.join(self._tosend)}]")
+        PeerDiscovery(self.ping, deadline=ready_timeout).discover(self._tosend)
         for address in self._tosend:
-            ok = False
-            while not ok:
-                try:
-                    print(f"Trying to ping {address}")
-                    ok = self.ping(address)
-                except Exception:
-                    time.sleep(1)
             self.sendGoals(self._goals, address)
             self.done(address)
         while self._serveur.has_wait():
@@ -135,7 +132,7 @@ class ClientDispatcher:
         print("Goals are synchronized")
 
     def ping(self, address: str) -> bool:
-        rep = requests.get(f"http://{address}/ping")
+        rep = requests.get(f"http://{address}/ping", timeout=1)
         rep = rep.json()
         return rep['message'] == "pong"
 
@@ -1,5 +1,5 @@
 from typing import Tuple
-from ballet.assembly.simplified.assembly import ComponentInstance
+from ballet.assembly.simplified.assembly import ComponentInstance, ComponentType
 from ballet.utils.list_utils import findAll, difference, add_if_no_exist
 
 
@@ -105,4 +105,70 @@ def matrix_from_component(comp: ComponentInstance, skip: str = "pass") \
         -> tuple[list[str], list[str], dict[str, dict[str, str]], dict[tuple[str, str], int]]:
     (automata, bhv_in, bhv_out, cost) = automata_from_component(comp)
     (result_vertices, result_input, result_transit, result_cost) = reduce_automata(automata, bhv_in, bhv_out, cost)
-    return fill_automata(result_vertices, result_input, result_transit, result_cost, skip)
\ No newline at end of file
+    return fill_automata(result_vertices, result_input, result_transit, result_cost, skip)
+
+
+_shared_matrices: dict[tuple, tuple[list[str], list[str], dict[str, dict[str, str]], dict[tuple[str, str], int]]] = {}
+
+
+def type_signature(comp_type: ComponentType) -> tuple:
+    """
+    Structural key of a component type: two types with the same signature have the same automaton and ports
+    (the name alone is not enough, e.g. parallel_user(n) types share their name whatever n)
+    """
+    return (comp_type.name(),
+            tuple(place.name() for place in comp_type.places()),
+            tuple((behavior.name(), tuple((tr.source().name(), tr.destination()[0].name(), tr.cost())
+                                          for tr in behavior.transitions()))
+                  for behavior in comp_type.behaviors()),
+            tuple((port.name(), port.is_provide_port(), tuple(sorted(place.name() for place in port.bound_places())))
+                  for port in comp_type.ports()))
+
+
+def shared_matrix_from_component(comp: ComponentInstance, skip: str = "pass", signature: tuple = None) \
+        -> tuple[list[str], list[str], dict[str, dict[str, str]], dict[tuple[str, str], int]]:
+    """
+    Same as matrix_from_component, but computed once per component type and shared between all its instances:
+    the returned structures must not be mutated (copy them first)
+    """
+    key = (type_signature(comp.type()) if signature is None else signature, skip)
+    if key not in _shared_matrices:
+        _shared_matrices[key] = matrix_from_component(comp, skip)
+    return _shared_matrices[key]
+
+
+def clear_shared_matrices():
+    _shared_matrices.clear()
+    _shared_distances.clear()
+
+
+def shortest_distances(states: list[str], transitions: dict[str, dict[str, str]], skip: str) \
+        -> dict[str, dict[str, int]]:
+    """
+    distances[src][trg] -> minimal number of behaviors to go from src to trg (absent if trg is not reachable)
+    """
+    distances = {}
+    for src in states:
+        distances[src] = {src: 0}
+        frontier = [src]
+        while frontier:
+            next_frontier = []
+            for state in frontier:
+                for (bhv, trg) in transitions[state].items():
+                    if bhv != skip and trg not in ["<>", state] and trg not in distances[src]:
+                        distances[src][trg] = distances[src][state] + 1
+                        next_frontier.append(trg)
+            frontier = next_frontier
+    return distances
+
+
+_shared_distances: dict[tuple, dict[str, dict[str, int]]] = {}
+
+
+def shared_distances_from_component(comp: ComponentInstance, skip: str = "pass", signature: tuple = None) \
+        -> dict[str, dict[str, int]]:
+    key = (type_signature(comp.type()) if signature is None else signature, skip)
+    if key not in _shared_distances:
+        states, _, transitions, _ = shared_matrix_from_component(comp, skip, key[0])
+        _shared_distances[key] = shortest_distances(states, transitions, skip)
+    return _shared_distances[key]
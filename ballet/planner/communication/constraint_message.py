@@ -1,8 +1,9 @@
+import threading
 from abc import ABC
-from typing import Set, Iterable
+from typing import Set, Iterable, Optional
 
 from ballet.assembly.simplified.assembly import CInstance
-from ballet.utils.list_utils import split
+from ballet.planner.communication.router import Router
 
 
 class ConstraintMessage (ABC):
@@ -13,6 +14,9 @@ class ConstraintMessage (ABC):
 
 class PortConstraintMessage(ConstraintMessage):
 
+    # Status of the message withdrawing the constraints previously sent on a port
+    retracted = "retracted"
+
     def __init__(self, source: str, port: str, status: str, behavior: str = None):
         self._source = source
         self._port = port
@@ -47,6 +51,41 @@ class PortConstraintMessage(ConstraintMessage):
     def __hash__(self):
         return hash(self._source) + hash(self._port) + hash(self._behavior) + hash(self._status)
 
+class DeliveryNotifier:
+    """
+    Records the components whose mailbox or ack set changed, and wakes up the planner waiting for deliveries.
+    A global ack changes no component but wakes up the planner too, as the termination may be reached.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._dirty: Set[str] = set()
+        self._signaled = False
+        self._woken = False
+
+    def notify(self, comp_ids: Iterable[str] = ()):
+        with self._condition:
+            self._dirty.update(comp_ids)
+            self._signaled = True
+            self._condition.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        # Components changed since the last call (possibly none, when the timeout expires)
+        with self._condition:
+            if not self._signaled:
+                self._condition.wait(timeout)
+            dirty = self._dirty
+            self._dirty = set()
+            self._woken = self._signaled
+            self._signaled = False
+            return dirty
+
+    def woken(self) -> bool:
+        # Whether the last wait was woken up by a notification, possibly of no component
+        with self._condition:
+            return self._woken
+
+
 class Messaging (ABC):
 
     def get_messages(self, comp: CInstance) -> Set[tuple[str, int, ConstraintMessage]]:
@@ -67,6 +106,22 @@ class Messaging (ABC):
     def get_global_acks(self) -> Set[str]:
         pass
 
+    def set_roots(self, roots: Set[str]):
+        # Components holding a goal, whose global acks mean the termination
+        pass
+
+    def flush(self):
+        pass
+
+    def wait_deliveries(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        # Blocks until something is delivered, and returns the ids of the components that received messages or
+        # acks. None means that deliveries are not tracked, and that every component must be checked.
+        return None
+
+    def woken(self) -> bool:
+        # Whether the last wait_deliveries returned on a delivery, possibly to no component (e.g., a global ack)
+        return False
+
     def stop(self):
         pass
 
@@ -82,6 +137,9 @@ class Messaging (ABC):
     def n_remote_rcv(self):
         return 0
 
+    def n_termination_send(self):
+        return 0
+
 
 class LocalMessaging (Messaging):
 
@@ -103,6 +161,15 @@ class LocalMessaging (Messaging):
     def get_global_acks(self) -> Set[str]:
         pass
 
+    def set_roots(self, roots: Set[str]):
+        pass
+
+    def flush(self):
+        pass
+
+    def wait_deliveries(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        return None
+
     def stop(self):
         pass
 
@@ -118,9 +185,20 @@ class LocalMessaging (Messaging):
     def n_remote_rcv(self):
         return 0
 
+    def n_termination_send(self):
+        return 0
+
 
 class RemoteMessaging (Messaging):
 
+    def endpoints(self) -> dict[str, str]:
+        # endpoints[component id]: address of the planner serving the component
+        return {}
+
+    def set_termination(self, mode: str, fanout: int = 2):
+        # "broadcast": each root sends its global ack to every planner; "tree": see gRPCMessagingPlanner
+        pass
+
     def get_messages(self, comp: CInstance) -> Set[tuple[str, int, ConstraintMessage]]:
         pass
 
@@ -139,6 +217,15 @@ class RemoteMessaging (Messaging):
     def get_global_acks(self) -> Set[str]:
         pass
 
+    def set_roots(self, roots: Set[str]):
+        pass
+
+    def flush(self):
+        pass
+
+    def wait_deliveries(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        return None
+
     def stop(self):
         pass
 
@@ -154,6 +241,9 @@ class RemoteMessaging (Messaging):
     def n_remote_rcv(self):
         return 0
 
+    def n_termination_send(self):
+        return 0
+
 
 class MailboxMessaging (LocalMessaging):
 
@@ -163,6 +253,7 @@ class MailboxMessaging (LocalMessaging):
         self._global_acks = set()
         self._local_send = 0
         self._local_rcv = 0
+        self._notifier = DeliveryNotifier()
 
     def get_messages(self, comp: CInstance) -> Set[tuple[str, int, ConstraintMessage]]:
         res = self._mailbox[comp.id()]
@@ -179,6 +270,8 @@ class MailboxMessaging (LocalMessaging):
             print(
                 f"[LOCAL] {source.id()} send to {dest}: ({constr.source()},{constr.port()},{constr.status()},{constr.behavior()})")
             self._mailbox[dest].add((source.id(), round, constr))
+        if len(messages) != 0:
+            self._notifier.notify(map(lambda m: m[0], messages))
 
     def get_acks(self, comp: CInstance) -> Set[str]:
         res = self._acks[comp.id()]
@@ -191,9 +284,19 @@ class MailboxMessaging (LocalMessaging):
         for dest in targets:
             print(f"[LOCAL] {source.id()} sends ack to {dest}")
             self._acks[dest].add(source.id())
+        if len(targets) != 0:
+            self._notifier.notify(targets)
 
     def bcast_root_acks(self, source: CInstance):
-        self._global_acks.add(source.id())
+        if source.id() not in self._global_acks:
+            self._global_acks.add(source.id())
+            self._notifier.notify()
+
+    def wait_deliveries(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        return self._notifier.wait(timeout)
+
+    def woken(self) -> bool:
+        return self._notifier.woken()
 
     def get_global_acks(self) -> Set[str]:
        return self._global_acks
@@ -209,13 +312,24 @@ class MailboxMessaging (LocalMessaging):
 
 
 class HybridMessaging (Messaging):
-
-    def __init__(self, local_messaging: LocalMessaging, remote_messaging: RemoteMessaging, local_comps: Set[CInstance]):
+    """
+    Local messaging between the components of this planner, remote messaging with the other planners.
+
+    With termination="broadcast", each component holding a goal sends its global ack to every planner. With
+    termination="tree", the global acks are gathered by a single planner, which broadcasts the completion along a
+    spanning tree of the planners: the termination is then only known from the remote messaging.
+    """
+
+    def __init__(self, local_messaging: LocalMessaging, remote_messaging: RemoteMessaging, local_comps: Set[CInstance],
+                 termination: str = "broadcast", fanout: int = 2):
+        if termination not in ["broadcast", "tree"]:
+            raise ValueError(f"Unknown termination detection: {termination}")
         self._local_messaging: LocalMessaging = local_messaging
         self._remote_messaging: RemoteMessaging = remote_messaging
         self._local_comps: Set[CInstance] = local_comps
-        self._local_send = 0
-        self._remote_send = 0
+        self._router = Router(map(lambda comp: comp.id(), local_comps), remote_messaging.endpoints())
+        self._termination = termination
+        self._remote_messaging.set_termination(termination, fanout)
         self._local_rcv = 0
         self._remote_rcv = 0
 
@@ -226,12 +340,15 @@ class HybridMessaging (Messaging):
         self._remote_rcv = self._remote_rcv + len(m2)
         return m1 | m2
 
+    def _record(self, kind: str, items: Iterable, target):
+        for (route, group) in self._router.group(items, target).items():
+            self._router.record(route, kind, len(group))
+
     def send_messages(self, source: CInstance, round: int, messages: Set[tuple[str, ConstraintMessage]]):
-        (m1, m2) = split(lambda msg: msg[0] in map(lambda comp: comp.id(), self._local_comps), messages)
+        (m1, m2) = self._router.split(messages, lambda msg: msg[0])
         self._local_messaging.send_messages(source, round, set(m1))
-        self._local_send = self._local_send + len(m1)
         self._remote_messaging.send_messages(source, round, set(m2))
-        self._remote_send = self._local_send + len(m2)
+        self._record("messages", messages, lambda msg: msg[0])
 
     def get_acks(self, comp: CInstance) -> Set[str]:
         m1 = self._local_messaging.get_acks(comp)
@@ -239,31 +356,60 @@ class HybridMessaging (Messaging):
         return m1 | m2
 
     def send_acks(self, source: CInstance, targets: Set[str]):
-        (m1, m2) = split(lambda target: target in map(lambda comp: comp.id(), self._local_comps), targets)
+        (m1, m2) = self._router.split(targets)
         self._local_messaging.send_acks(source, set(m1))
         self._remote_messaging.send_acks(source, set(m2))
+        self._record("acks", targets, lambda target: target)
 
     def bcast_root_acks(self, source: CInstance):
         self._local_messaging.bcast_root_acks(source)
         self._remote_messaging.bcast_root_acks(source)
 
     def get_global_acks(self) -> Set[str]:
-        m1 = self._local_messaging.get_global_acks()
         m2 = self._remote_messaging.get_global_acks()
+        if self._termination == "tree":
+            return m2
+        m1 = self._local_messaging.get_global_acks()
         return m1 | m2
 
+    def set_roots(self, roots: Set[str]):
+        self._local_messaging.set_roots(roots)
+        self._remote_messaging.set_roots(roots)
+
+    def flush(self):
+        self._local_messaging.flush()
+        self._remote_messaging.flush()
+
+    def wait_deliveries(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        # Local deliveries are made by the planner itself: only remote ones are waited for
+        local = self._local_messaging.wait_deliveries(0)
+        if local is None:
+            return None
+        # Anything delivered locally, even a global ack waking up no component, is handled without waiting
+        local_work = len(local) != 0 or self._local_messaging.woken()
+        remote = self._remote_messaging.wait_deliveries(0 if local_work else timeout)
+        if remote is None:
+            return None
+        return local | remote
+
     def stop(self):
         self._local_messaging.stop()
         self._remote_messaging.stop()
 
+    def router(self) -> Router:
+        return self._router
+
     def n_local_send(self):
-       return self._local_send
+        return self._router.n_send(local=True)
 
     def n_remote_send(self):
-        return self._remote_send
+        return self._router.n_send(local=False)
 
     def n_local_rcv(self):
         return self._local_rcv
 
     def n_remote_rcv(self):
-        return self._remote_rcv
\ No newline at end of file
+        return self._remote_rcv
+
+    def n_termination_send(self):
+        return self._remote_messaging.n_termination_send()
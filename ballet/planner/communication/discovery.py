@@ -0,0 +1,82 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Iterable, Optional
+
+
+class PeerDiscovery:
+    """
+    Waits for the peers (planners or dispatchers) to be up at startup. All the peers are pinged concurrently; a peer
+    that does not answer is pinged again after an exponential backoff (with jitter), so that the retries do not
+    hammer the peers that are still starting, while the others are found in about one round trip.
+
+    ping(peer) returns True when the peer is up; an exception counts as a failed ping. Each ping is expected to
+    return (or fail) by itself, e.g., with its own timeout.
+    """
+
+    def __init__(self, ping: Callable[[str], bool], deadline: Optional[float] = None, initial_backoff: float = 0.05,
+                 max_backoff: float = 2.0, workers: int = 16, verbose: bool = False):
+        self._ping = ping
+        self._deadline = deadline
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._workers = workers
+        self._verbose = verbose
+        self._report: dict[str, Any] = {}
+
+    def _try(self, peer: str) -> bool:
+        try:
+            return bool(self._ping(peer))
+        except Exception:
+            return False
+
+    def _backoff(self, attempts: int) -> float:
+        backoff = min(self._max_backoff, self._initial_backoff * (2 ** (attempts - 1)))
+        return backoff * random.uniform(0.5, 1.0)
+
+    def discover(self, peers: Iterable[str]) -> dict[str, Any]:
+        # Raises a TimeoutError if some peers are still not up at the deadline (in seconds from the call)
+        start = time.perf_counter()
+        retries: dict[str, float] = {peer: 0.0 for peer in peers}
+        attempts = {peer: 0 for peer in retries}
+        ready: dict[str, float] = {}
+        in_flight = {}
+        pool = ThreadPoolExecutor(max_workers=max(1, min(self._workers, len(retries))))
+        try:
+            while len(retries) != 0 or len(in_flight) != 0:
+                now = time.perf_counter() - start
+                if self._deadline is not None and now >= self._deadline:
+                    break
+                for (peer, at) in list(retries.items()):
+                    if at <= now:
+                        del retries[peer]
+                        attempts[peer] = attempts[peer] + 1
+                        in_flight[pool.submit(self._try, peer)] = peer
+                # Sleeps until a ping answers, the next retry, or the deadline
+                timeouts = [at - now for at in retries.values()]
+                if self._deadline is not None:
+                    timeouts.append(self._deadline - now)
+                done, _ = wait(in_flight.keys(), timeout=max(0.0, min(timeouts)) if timeouts else None,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    peer = in_flight.pop(future)
+                    elapsed = time.perf_counter() - start
+                    if future.result():
+                        ready[peer] = elapsed
+                        if self._verbose:
+                            print(f"{peer} successfully pinged after {elapsed:.3f}s ({attempts[peer]} attempts)")
+                    else:
+                        retries[peer] = elapsed + self._backoff(attempts[peer])
+        finally:
+            # Pings still running at the deadline are abandoned
+            pool.shutdown(wait=False, cancel_futures=True)
+        missing = sorted(set(attempts.keys()) - set(ready.keys()))
+        self._report = {"peers": len(attempts), "elapsed": time.perf_counter() - start, "ready": ready,
+                        "attempts": attempts, "missing": missing}
+        if len(missing) != 0:
+            raise TimeoutError(f"Peers not ready after {self._deadline}s: [{','.join(missing)}]")
+        return self._report
+
+    def report(self) -> dict[str, Any]:
+        # {peers, elapsed, ready[peer] (seconds until the peer answered), attempts[peer], missing}
+        return self._report
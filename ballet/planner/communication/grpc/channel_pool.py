@@ -0,0 +1,96 @@
+import threading
+from typing import Any
+
+import grpc
+
+from ballet.planner.communication.grpc import message_pb2_grpc
+
+
+class ChannelPool:
+    """
+    One long-lived channel (and its stub) per remote planner address, created on first use and reused by all the
+    RPCs sent to this address.
+
+    The connectivity of each channel is tracked: a channel that failed (or whose RPC failed as UNAVAILABLE) is
+    closed and reopened, instead of waiting for the reconnection backoff of gRPC.
+    """
+    _failed = [grpc.ChannelConnectivity.TRANSIENT_FAILURE, grpc.ChannelConnectivity.SHUTDOWN]
+
+    def __init__(self, ready_timeout: float = 5.0):
+        self._ready_timeout = ready_timeout
+        self._channels: dict[str, grpc.Channel] = {}
+        self._stubs: dict[str, message_pb2_grpc.MessagingStub] = {}
+        self._states: dict[str, grpc.ChannelConnectivity] = {}
+        self._lock = threading.Lock()
+        self._created = 0
+        self._reused = 0
+        self._reconnections = 0
+        self._failures = 0
+
+    def _open(self, address: str):
+        channel = grpc.insecure_channel(address)
+        self._channels[address] = channel
+        self._stubs[address] = message_pb2_grpc.MessagingStub(channel)
+        self._states[address] = grpc.ChannelConnectivity.IDLE
+
+        def track(state: grpc.ChannelConnectivity):
+            # Ignores the last notifications of a channel that has been replaced
+            if self._channels.get(address) is channel:
+                self._states[address] = state
+
+        channel.subscribe(track)
+        self._created = self._created + 1
+
+    def _close(self, address: str):
+        channel = self._channels.pop(address, None)
+        self._stubs.pop(address, None)
+        self._states.pop(address, None)
+        if channel is not None:
+            channel.close()
+
+    def stub(self, address: str) -> message_pb2_grpc.MessagingStub:
+        with self._lock:
+            if address in self._channels and self._states[address] in self._failed:
+                self._close(address)
+                self._reconnections = self._reconnections + 1
+            if address not in self._channels:
+                self._open(address)
+            else:
+                self._reused = self._reused + 1
+            return self._stubs[address]
+
+    def reset(self, address: str):
+        with self._lock:
+            if address in self._channels:
+                self._close(address)
+                self._reconnections = self._reconnections + 1
+
+    def check(self, address: str) -> bool:
+        # Health check: the channel of the address is (or becomes) ready before the timeout
+        self.stub(address)
+        try:
+            grpc.channel_ready_future(self._channels[address]).result(timeout=self._ready_timeout)
+            return True
+        except (grpc.FutureTimeoutError, KeyError):
+            self.reset(address)
+            return False
+
+    def call(self, address: str, rpc: str, request) -> Any:
+        # A call failing as UNAVAILABLE (e.g., the remote planner restarted) is retried once on a new channel
+        try:
+            return getattr(self.stub(address), rpc)(request)
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.UNAVAILABLE:
+                raise
+            self._failures = self._failures + 1
+            self.reset(address)
+            return getattr(self.stub(address), rpc)(request)
+
+    def close(self):
+        with self._lock:
+            for address in list(self._channels.keys()):
+                self._close(address)
+
+    def metrics(self) -> dict[str, int]:
+        return {"channels": len(self._channels), "created": self._created, "reused": self._reused,
+                "reconnections": self._reconnections, "failures": self._failures}
@@ -1,105 +1,281 @@
-from typing import Set
+from typing import Set, Optional
 from concurrent import futures
 
 from ballet.assembly.simplified.assembly import CInstance
-from ballet.planner.communication.constraint_message import PortConstraintMessage, RemoteMessaging, ConstraintMessage
+from ballet.planner.communication.constraint_message import PortConstraintMessage, RemoteMessaging, ConstraintMessage, \
+    DeliveryNotifier
 from ballet.planner.communication.grpc import message_pb2_grpc, message_pb2
+from ballet.planner.communication.grpc.channel_pool import ChannelPool
+from ballet.planner.communication.mailbox import Mailbox
 from ballet.planner.communication.grpc.message_pb2_grpc import MessagingServicer
+from ballet.planner.communication.discovery import PeerDiscovery
+from ballet.planner.communication.router import Router
+from ballet.planner.communication.grpc.streaming import HopLatencies, PlannerStream
 
+import asyncio
+import socket
+import threading
 import time
 import grpc
 
 
 class PlannerServicer(MessagingServicer):
+    """
+    Receives the port constraints and acks sent by the remote planners. The RPCs are served by several workers
+    concurrently with the resolve thread: each local component has its own mailboxes, drained atomically.
+    """
 
     def __init__(self, components):
-        self._mailbox = {comp.id(): set() for comp in components}
-        self._acks = {comp.id(): set() for comp in components}
-        self._global_acks = set()
+        self._mailbox = {comp.id(): Mailbox() for comp in components}
+        self._acks = {comp.id(): Mailbox() for comp in components}
+        # Global acks are never drained: a component acked once stays acked
+        self._global_acks = Mailbox()
+        self._latencies = HopLatencies()
+        self._notifier = DeliveryNotifier()
 
-    def AddAckByID(self, request, context):
+    def _add_ack(self, request):
         self._acks[request.targetID].add(request.sourceID)
+        self._notifier.notify([request.targetID])
+
+    def AddAckByID(self, request, context):
+        self._add_ack(request)
         return message_pb2.Empty()
 
-    def AddPortConstraint(self, request, context):
+    def AddAcksByID(self, request, context):
+        for ack in request.acks:
+            self._add_ack(ack)
+        return message_pb2.Empty()
+
+    def _add_port_constraint(self, request):
         bhv = request.behavior if request.behavior not in ["NONE", "None", "none", ""] else None
         constr = PortConstraintMessage(request.sourceID, request.port, request.status, bhv)
         self._mailbox[request.targetID].add((request.sourceID, request.round, constr))
+        self._notifier.notify([request.targetID])
+
+    def _add_global_ack(self, id: str):
+        if self._global_acks.add(id):
+            self._notifier.notify()
+
+    def AddPortConstraint(self, request, context):
+        self._add_port_constraint(request)
+        return message_pb2.Empty()
+
+    def AddPortConstraints(self, request, context):
+        for constraint in request.constraints:
+            self._add_port_constraint(constraint)
         return message_pb2.Empty()
 
     def AddGlobalAck(self, request, context):
-        self._global_acks.add(request.id)
+        self._add_global_ack(request.id)
+        return message_pb2.Empty()
+
+    def Terminate(self, request, context):
+        for ack in request.acks:
+            self._add_global_ack(ack.id)
         return message_pb2.Empty()
 
     def ping(self, request, context):
         return message_pb2.Empty()
 
-    def mailbox(self):
-        return self._mailbox
+    def deliver(self, envelope) -> message_pb2.receipt:
+        received = time.time()
+        payload = envelope.WhichOneof("payload")
+        if payload == "constraint":
+            self._add_port_constraint(envelope.constraint)
+        elif payload == "ack":
+            self._add_ack(envelope.ack)
+        elif payload == "globalAck":
+            self._add_global_ack(envelope.globalAck.id)
+        self._latencies.record(envelope.origin, received - envelope.sentAt)
+        return message_pb2.receipt(sentAt=envelope.sentAt, receivedAt=received)
+
+    def Exchange(self, request_iterator, context):
+        # Envelopes are put in the mailbox as soon as they arrive on the stream
+        for envelope in request_iterator:
+            yield self.deliver(envelope)
 
-    def acks(self):
-        return self._acks
+    def latencies(self) -> HopLatencies:
+        return self._latencies
 
-    def global_acks(self):
-        return self._global_acks
+    def notifier(self) -> DeliveryNotifier:
+        return self._notifier
+
+    def mailbox(self) -> dict[str, set]:
+        return {compId: mailbox.snapshot() for (compId, mailbox) in self._mailbox.items()}
+
+    def acks(self) -> dict[str, set]:
+        return {compId: mailbox.snapshot() for (compId, mailbox) in self._acks.items()}
+
+    def global_acks(self) -> set:
+        return self._global_acks.snapshot()
 
     def reset_mailbox(self, compId):
-        self._mailbox[compId] = set()
+        self._mailbox[compId].drain()
 
     def get_mailbox(self, compId, reset=True):
-        received = set()
-        for m in self._mailbox[compId]:
-            received.add(m)
-        res = set()
-        for (sourceID, round, constr) in received:
-            if (constr.port() != "") and (constr.status() != ""):
-                res.add((sourceID, round, constr))
-        if reset:
-            self.reset_mailbox(compId)
-        return res
+        received = self._mailbox[compId].drain() if reset else self._mailbox[compId].snapshot()
+        return {(sourceID, round, constr) for (sourceID, round, constr) in received
+                if (constr.port() != "") and (constr.status() != "")}
+
+    def get_acks(self, compId, reset=True):
+        return self._acks[compId].drain() if reset else self._acks[compId].snapshot()
+
+
+class AsyncPlannerServicer(MessagingServicer):
+    """
+    Coroutine handlers of a PlannerServicer, for a grpc.aio server: the deliveries only take the lock of a mailbox,
+    so they are run directly on the event loop.
+    """
+
+    def __init__(self, servicer: PlannerServicer):
+        self._servicer = servicer
+
+    async def AddAckByID(self, request, context):
+        return self._servicer.AddAckByID(request, context)
+
+    async def AddAcksByID(self, request, context):
+        return self._servicer.AddAcksByID(request, context)
+
+    async def AddPortConstraint(self, request, context):
+        return self._servicer.AddPortConstraint(request, context)
+
+    async def AddPortConstraints(self, request, context):
+        return self._servicer.AddPortConstraints(request, context)
+
+    async def AddGlobalAck(self, request, context):
+        return self._servicer.AddGlobalAck(request, context)
+
+    async def ping(self, request, context):
+        return self._servicer.ping(request, context)
+
+    async def Terminate(self, request, context):
+        return self._servicer.Terminate(request, context)
+
+    async def Exchange(self, request_iterator, context):
+        async for envelope in request_iterator:
+            yield self._servicer.deliver(envelope)
+
+
+class AioServer:
+    """
+    grpc.aio server run by an event loop in a background thread, with the start/stop interface of grpc.server
+    """
+
+    def __init__(self, servicer: PlannerServicer, port: str):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(self._start(servicer, port), self._loop).result()
+
+    @staticmethod
+    async def _start(servicer: PlannerServicer, port: str):
+        server = grpc.aio.server()
+        message_pb2_grpc.add_MessagingServicer_to_server(AsyncPlannerServicer(servicer), server)
+        server.add_insecure_port(f'[::]:{port}')
+        await server.start()
+        return server
+
+    def stop(self, grace: Optional[float]):
+        asyncio.run_coroutine_threadsafe(self._server.stop(grace), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
 
 class gRPCMessagingPlanner (RemoteMessaging):
+    """
+    Messaging with the remote planners, each serving its own components.
+
+    With the tree termination detection, the planners are ordered by address, and arranged as a tree with the given
+    fanout rooted at the first one (the coordinator). A component holding a goal sends its global ack once, to the
+    coordinator only. When the coordinator holds the global acks of all the roots, it sends them to its children in a
+    single Terminate call, and each planner forwards them to its own children: R + P - 1 calls for R roots and P
+    planners, instead of (at least) R * P with the broadcast.
+    """
 
-    def __init__(self, local_components: list[CInstance], addresses: dict[str, dict[str, str]], port: str, verbose=False):
-        self._ips = {}
-        toPing = set()
+    def __init__(self, local_components: list[CInstance], addresses: dict[str, dict[str, str]], port: str, verbose=False,
+                 batched=True, streaming=False, workers: int = 10, aio=False,
+                 ready_timeout: Optional[float] = None, ping_timeout: float = 1.0):
+        ips = {}
         for comp in addresses.keys():
             comp_host = addresses[comp]["address"]
             comp_port = addresses[comp]["port_planner"]
-            full_address = comp_host + ":" + str(comp_port)
-            self._ips[comp] = full_address
-            toPing.add(full_address)
-        self._server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+            ips[comp] = comp_host + ":" + str(comp_port)
+        # All the components are routed to the address of their planner, this one included
+        self._router = Router((), ips)
+        toPing = self._router.endpoints()
         self._servicer = PlannerServicer(local_components)
-        message_pb2_grpc.add_MessagingServicer_to_server(self._servicer, self._server)
-        self._server.add_insecure_port(f'[::]:{port}')
-        self._server.start()
+        if aio:
+            # A single event loop serves all the RPCs (and streams), without a pool of workers
+            self._server = AioServer(self._servicer, port)
+        else:
+            # In streaming mode, each remote planner keeps a worker busy with its open stream
+            max_workers = workers + (len(self._router.endpoints()) if streaming else 0)
+            self._server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+            message_pb2_grpc.add_MessagingServicer_to_server(self._servicer, self._server)
+            self._server.add_insecure_port(f'[::]:{port}')
+            self._server.start()
+        # Channels to the remote planners are opened once and reused by all the messages and acks
+        self._pool = ChannelPool()
+        # In batched mode, constraints and acks are buffered per planner address until flush() (called at the end of
+        # each sweep of resolve), then sent with one AddPortConstraints and one AddAcksByID call per address
+        self._batched = batched
+        self._pending_constraints: dict[str, list] = {}
+        self._pending_acks: dict[str, list] = {}
+        self._pending_global_acks: dict[str, list] = {}
+        # In streaming mode, each remote planner gets one open Exchange stream, on which constraints and acks are
+        # written as soon as they are produced
+        self._streaming = streaming
+        self._streams: dict[str, PlannerStream] = {}
+        self._origin = f"{socket.gethostname()}:{port}"
+        self._round_trips = HopLatencies()
         self.__verbose = verbose
-        self.__pingAll(toPing)
+        # The remote planners are waited for at most ready_timeout seconds (forever by default)
+        self._ping_timeout = ping_timeout
+        self.__pingAll(toPing, ready_timeout)
         self._remote_send = 0
         self._remote_rcv = 0
+        # The address of this planner is the one of its components in the inventory
+        first_comp = next(iter(local_components), None)
+        self._address = self._router.route(first_comp.id()) if first_comp is not None else None
+        self._termination = "broadcast"
+        self._fanout = 2
+        self._roots: Optional[Set[str]] = None
+        self._root_acked: Set[str] = set()
+        self._terminated = False
+        self._termination_send = 0
 
-    def __ping(self, address):
-        with grpc.insecure_channel(address) as channel:
-            stub = message_pb2_grpc.MessagingStub(channel)
-            msg = message_pb2.Empty()
-            stub.ping(msg)
+    def __ping(self, address) -> bool:
+        try:
+            self._pool.stub(address).ping(message_pb2.Empty(), timeout=self._ping_timeout)
+            return True
+        except grpc.RpcError:
+            # The remote planner may not be started yet: the next ping opens a new channel
+            self._pool.reset(address)
+            return False
 
-    def __pingAll(self, addresses: list[str]):
-        toPing = addresses.copy()
+    def __pingAll(self, addresses: Set[str], deadline: Optional[float]):
         if self.__verbose:
-            print(f"Try to ping the following [{','.join(toPing)}]")
-        while len(toPing) != 0:
-            addresses_to_ping = toPing.copy()
-            for address in addresses_to_ping:
-                try:
-                    self.__ping(address)
-                    toPing.remove(address)
-                    if self.__verbose:
-                        print(f"{address} successfully pinged. Remaining: [{','.join(toPing)}]")
-                except:
-                    pass
-            time.sleep(1)
+            print(f"Try to ping the following [{','.join(addresses)}]")
+        self._startup = PeerDiscovery(self.__ping, deadline=deadline, verbose=self.__verbose).discover(addresses)
+        if self.__verbose:
+            print(f"{len(addresses)} planners ready in {self._startup['elapsed']:.3f}s")
+
+    def _stream(self, address: str) -> PlannerStream:
+        if address in self._streams and self._streams[address].broken():
+            self._streams.pop(address).close()
+            self._pool.reset(address)
+        if address not in self._streams:
+            self._streams[address] = PlannerStream(self._pool.stub(address), address, self._origin, self._round_trips)
+        return self._streams[address]
+
+    def _send(self, address: str, rpc: str, payload: str, msg, pending: dict[str, list]):
+        if self._streaming:
+            self._stream(address).send(**{payload: msg})
+        elif self._batched:
+            pending.setdefault(address, []).append(msg)
+        else:
+            self._pool.call(address, rpc, msg)
 
     def get_messages(self, comp: CInstance) -> Set[tuple[str, int, ConstraintMessage]]:
         res = self._servicer.get_mailbox(comp.id(), reset=True)
@@ -110,43 +286,124 @@ class gRPCMessagingPlanner (RemoteMessaging):
 
     def send_messages(self, source: CInstance, round: int, messages: Set[tuple[str, ConstraintMessage]]):
         self._remote_send = self._remote_send + len(messages)
-        for (target, constr) in messages:
-            print(f"[REMOTE] {source.id()} send to {target}: ({constr.source()},{constr.port()},{constr.status()},{constr.behavior()})")
-            if isinstance(constr, PortConstraintMessage):
-                with grpc.insecure_channel(self._ips[target]) as channel:
-                    stub = message_pb2_grpc.MessagingStub(channel)
+        # Messages are regrouped per planner, so that the ones of a planner are buffered together
+        for (address, group) in self._router.group(messages, lambda m: m[0]).items():
+            for (target, constr) in group:
+                print(f"[REMOTE] {source.id()} send to {target}: ({constr.source()},{constr.port()},{constr.status()},{constr.behavior()})")
+                if isinstance(constr, PortConstraintMessage):
                     msg = message_pb2.portConstraint(sourceID=source.id(), targetID=target, round=str(round), port=constr.port(), status=constr.status(), behavior=constr.behavior())
-                    stub.AddPortConstraint(msg)
+                    self._send(address, "AddPortConstraint", "constraint", msg, self._pending_constraints)
 
     def get_acks(self, comp: CInstance) -> Set[str]:
-        res = self._servicer.acks()[comp.id()].copy()
+        res = self._servicer.get_acks(comp.id(), reset=True)
         for m in res:
             print(f"[REMOTE] {comp.id()} received ack from {m}")
-        return self._servicer.acks()[comp.id()]
+        return res
 
     def send_acks(self, source: CInstance, targets: Set[str]):
-        for target in targets:
-            print(f"[REMOTE] {source.id()} send ack to {target} (at {self._ips[target]})")
-            with grpc.insecure_channel(self._ips[target]) as channel:
-                stub = message_pb2_grpc.MessagingStub(channel)
+        for (address, group) in self._router.group(targets).items():
+            for target in group:
+                print(f"[REMOTE] {source.id()} send ack to {target} (at {address})")
                 msg = message_pb2.AckID(sourceID=source.id(), targetID=target)
-                stub.AddAckByID(msg)
+                self._send(address, "AddAckByID", "ack", msg, self._pending_acks)
+
+    def set_termination(self, mode: str, fanout: int = 2):
+        if mode not in ["broadcast", "tree"]:
+            raise ValueError(f"Unknown termination detection: {mode}")
+        if mode == "tree" and self._address is None:
+            raise ValueError("The tree termination detection needs the address of the planner in the inventory")
+        self._termination = mode
+        self._fanout = fanout
+
+    def set_roots(self, roots: Set[str]):
+        self._roots = set(roots)
+
+    def _planners(self) -> list[str]:
+        return sorted(self._router.endpoints())
+
+    def _children(self) -> list[str]:
+        planners = self._planners()
+        i = planners.index(self._address)
+        return planners[i * self._fanout + 1:(i + 1) * self._fanout + 1]
 
     def bcast_root_acks(self, source: CInstance):
-        for ip in self._ips.values():
-            with grpc.insecure_channel(ip) as channel:
-                stub = message_pb2_grpc.MessagingStub(channel)
-                msg = message_pb2.globalAckID(id=source.id())
-                stub.AddGlobalAck(msg)
+        # A global ack is sent once: the receivers keep the global acks they got
+        if source.id() in self._root_acked:
+            return
+        self._root_acked.add(source.id())
+        if self._termination == "tree":
+            # To the coordinator only
+            self._termination_send = self._termination_send + 1
+            msg = message_pb2.globalAckID(id=source.id())
+            self._send(self._planners()[0], "AddGlobalAck", "globalAck", msg, self._pending_global_acks)
+            return
+        # To every planner, a planner hosting several components being sent a single ack
+        for ip in self._router.endpoints():
+            self._termination_send = self._termination_send + 1
+            msg = message_pb2.globalAckID(id=source.id())
+            self._send(ip, "AddGlobalAck", "globalAck", msg, self._pending_global_acks)
+
+    def _terminate(self):
+        # Forwards the completion to the children, once all the roots are known to be acked (the coordinator
+        # receives their global acks, the other planners receive a Terminate call from their parent)
+        acks = self._servicer.global_acks()
+        if self._terminated or self._roots is None or not self._roots <= acks:
+            return
+        self._terminated = True
+        msg = message_pb2.globalAckIDs(acks=[message_pb2.globalAckID(id=id) for id in sorted(acks)])
+        for child in self._children():
+            self._termination_send = self._termination_send + 1
+            self._pool.call(child, "Terminate", msg)
+
+    def flush(self):
+        # Per address, constraints are sent before acks, and acks before global acks, as in unbatched mode
+        addresses = set(self._pending_constraints.keys()) | set(self._pending_acks.keys()) \
+            | set(self._pending_global_acks.keys())
+        for address in sorted(addresses):
+            constraints = self._pending_constraints.pop(address, [])
+            if len(constraints) != 0:
+                self._pool.call(address, "AddPortConstraints", message_pb2.portConstraints(constraints=constraints))
+            acks = self._pending_acks.pop(address, [])
+            if len(acks) != 0:
+                self._pool.call(address, "AddAcksByID", message_pb2.AckIDs(acks=acks))
+            for msg in self._pending_global_acks.pop(address, []):
+                self._pool.call(address, "AddGlobalAck", msg)
+
+    def endpoints(self) -> dict[str, str]:
+        return self._router.routes()
 
     def get_global_acks(self):
+        if self._termination == "tree":
+            self._terminate()
         return self._servicer.global_acks()
 
+    def wait_deliveries(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        return self._servicer.notifier().wait(timeout)
+
     def stop(self):
-        self._server.stop()
+        self.flush()
+        for stream in self._streams.values():
+            stream.close()
+        self._pool.close()
+        self._server.stop(None)
+
+    def startup_report(self) -> dict:
+        # Time (and number of pings) until each remote planner answered, see PeerDiscovery.report
+        return self._startup
+
+    def channel_metrics(self) -> dict[str, int]:
+        return self._pool.metrics()
+
+    def latencies(self) -> dict[str, dict[str, dict[str, float]]]:
+        # one_way[sending planner] on reception, round_trip[receiving planner] for the streams opened by this planner
+        return {"one_way": self._servicer.latencies().summary(), "round_trip": self._round_trips.summary()}
 
     def n_remote_send(self):
         return self._remote_send
 
     def n_remote_rcv(self):
-        return self._remote_rcv
\ No newline at end of file
+        return self._remote_rcv
+
+    def n_termination_send(self):
+        # Calls sent for the termination detection: global acks, and Terminate calls in tree mode
+        return self._termination_send
\ No newline at end of file
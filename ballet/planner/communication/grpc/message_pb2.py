@@ -14,7 +14,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rmessage.proto\"\x07\n\x05\x45mpty\"+\n\x05\x41\x63kID\x12\x10\n\x08sourceID\x18\x01 \x01(\t\x12\x10\n\x08targetID\x18\x02 \x01(\t\"\x19\n\x0bglobalAckID\x12\n\n\x02id\x18\x01 \x01(\t\"s\n\x0eportConstraint\x12\x10\n\x08sourceID\x18\x01 \x01(\t\x12\x10\n\x08targetID\x18\x02 \x01(\t\x12\r\n\x05round\x18\x03 \x01(\t\x12\x0c\n\x04port\x18\x04 \x01(\t\x12\x0e\n\x06status\x18\x05 \x01(\t\x12\x10\n\x08\x62\x65havior\x18\x06 \x01(\t2\x9d\x01\n\tMessaging\x12\x1e\n\nAddAckByID\x12\x06.AckID\x1a\x06.Empty\"\x00\x12.\n\x11\x41\x64\x64PortConstraint\x12\x0f.portConstraint\x1a\x06.Empty\"\x00\x12&\n\x0c\x41\x64\x64GlobalAck\x12\x0c.globalAckID\x1a\x06.Empty\"\x00\x12\x18\n\x04ping\x12\x06.Empty\x1a\x06.Empty\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rmessage.proto\"\x07\n\x05\x45mpty\"+\n\x05\x41\x63kID\x12\x10\n\x08sourceID\x18\x01 \x01(\t\x12\x10\n\x08targetID\x18\x02 \x01(\t\"\x19\n\x0bglobalAckID\x12\n\n\x02id\x18\x01 \x01(\t\"s\n\x0eportConstraint\x12\x10\n\x08sourceID\x18\x01 \x01(\t\x12\x10\n\x08targetID\x18\x02 \x01(\t\x12\r\n\x05round\x18\x03 \x01(\t\x12\x0c\n\x04port\x18\x04 \x01(\t\x12\x0e\n\x06status\x18\x05 \x01(\t\x12\x10\n\x08\x62\x65havior\x18\x06 \x01(\t\"7\n\x0fportConstraints\x12$\n\x0b\x63onstraints\x18\x01 \x03(\x0b\x32\x0f.portConstraint\"\x1e\n\x06\x41\x63kIDs\x12\x14\n\x04\x61\x63ks\x18\x01 \x03(\x0b\x32\x06.AckID\"\x96\x01\n\x08\x65nvelope\x12%\n\nconstraint\x18\x01 \x01(\x0b\x32\x0f.portConstraintH\x00\x12\x15\n\x03\x61\x63k\x18\x02 \x01(\x0b\x32\x06.AckIDH\x00\x12!\n\tglobalAck\x18\x03 \x01(\x0b\x32\x0c.globalAckIDH\x00\x12\x0e\n\x06origin\x18\x04 \x01(\t\x12\x0e\n\x06sentAt\x18\x05 \x01(\x01\x42\t\n\x07payload\"-\n\x07receipt\x12\x0e\n\x06sentAt\x18\x01 \x01(\x01\x12\x12\n\nreceivedAt\x18\x02 \x01(\x01\"*\n\x0cglobalAckIDs\x12\x1a\n\x04\x61\x63ks\x18\x01 \x03(\x0b\x32\x0c.globalAckID2\xbe\x02\n\tMessaging\x12\x1e\n\nAddAckByID\x12\x06.AckID\x1a\x06.Empty\"\x00\x12.\n\x11\x41\x64\x64PortConstraint\x12\x0f.portConstraint\x1a\x06.Empty\"\x00\x12&\n\x0c\x41\x64\x64GlobalAck\x12\x0c.globalAckID\x1a\x06.Empty\"\x00\x12\x18\n\x04ping\x12\x06.Empty\x1a\x06.Empty\"\x00\x12\x30\n\x12\x41\x64\x64PortConstraints\x12\x10.portConstraints\x1a\x06.Empty\"\x00\x12 \n\x0b\x41\x64\x64\x41\x63ksByID\x12\x07.AckIDs\x1a\x06.Empty\"\x00\x12%\n\x08\x45xchange\x12\t.envelope\x1a\x08.receipt\"\x00(\x01\x30\x01\x12$\n\tTerminate\x12\r.globalAckIDs\x1a\x06.Empty\"\x00\x62\x06proto3')
 
 
 
@@ -22,6 +22,11 @@ _EMPTY = DESCRIPTOR.message_types_by_name['Empty']
 _ACKID = DESCRIPTOR.message_types_by_name['AckID']
 _GLOBALACKID = DESCRIPTOR.message_types_by_name['globalAckID']
 _PORTCONSTRAINT = DESCRIPTOR.message_types_by_name['portConstraint']
+_PORTCONSTRAINTS = DESCRIPTOR.message_types_by_name['portConstraints']
+_ACKIDS = DESCRIPTOR.message_types_by_name['AckIDs']
+_ENVELOPE = DESCRIPTOR.message_types_by_name['envelope']
+_RECEIPT = DESCRIPTOR.message_types_by_name['receipt']
+_GLOBALACKIDS = DESCRIPTOR.message_types_by_name['globalAckIDs']
 Empty = _reflection.GeneratedProtocolMessageType('Empty', (_message.Message,), {
   'DESCRIPTOR' : _EMPTY,
   '__module__' : 'message_pb2'
@@ -50,6 +55,41 @@ portConstraint = _reflection.GeneratedProtocolMessageType('portConstraint', (_me
   })
 _sym_db.RegisterMessage(portConstraint)
 
+portConstraints = _reflection.GeneratedProtocolMessageType('portConstraints', (_message.Message,), {
+  'DESCRIPTOR' : _PORTCONSTRAINTS,
+  '__module__' : 'message_pb2'
+  # @@protoc_insertion_point(class_scope:portConstraints)
+  })
+_sym_db.RegisterMessage(portConstraints)
+
+AckIDs = _reflection.GeneratedProtocolMessageType('AckIDs', (_message.Message,), {
+  'DESCRIPTOR' : _ACKIDS,
+  '__module__' : 'message_pb2'
+  # @@protoc_insertion_point(class_scope:AckIDs)
+  })
+_sym_db.RegisterMessage(AckIDs)
+
+envelope = _reflection.GeneratedProtocolMessageType('envelope', (_message.Message,), {
+  'DESCRIPTOR' : _ENVELOPE,
+  '__module__' : 'message_pb2'
+  # @@protoc_insertion_point(class_scope:envelope)
+  })
+_sym_db.RegisterMessage(envelope)
+
+receipt = _reflection.GeneratedProtocolMessageType('receipt', (_message.Message,), {
+  'DESCRIPTOR' : _RECEIPT,
+  '__module__' : 'message_pb2'
+  # @@protoc_insertion_point(class_scope:receipt)
+  })
+_sym_db.RegisterMessage(receipt)
+
+globalAckIDs = _reflection.GeneratedProtocolMessageType('globalAckIDs', (_message.Message,), {
+  'DESCRIPTOR' : _GLOBALACKIDS,
+  '__module__' : 'message_pb2'
+  # @@protoc_insertion_point(class_scope:globalAckIDs)
+  })
+_sym_db.RegisterMessage(globalAckIDs)
+
 _MESSAGING = DESCRIPTOR.services_by_name['Messaging']
 if _descriptor._USE_C_DESCRIPTORS == False:
 
@@ -62,6 +102,16 @@ if _descriptor._USE_C_DESCRIPTORS == False:
   _GLOBALACKID._serialized_end=96
   _PORTCONSTRAINT._serialized_start=98
   _PORTCONSTRAINT._serialized_end=213
-  _MESSAGING._serialized_start=216
-  _MESSAGING._serialized_end=373
+  _PORTCONSTRAINTS._serialized_start=215
+  _PORTCONSTRAINTS._serialized_end=270
+  _ACKIDS._serialized_start=272
+  _ACKIDS._serialized_end=302
+  _ENVELOPE._serialized_start=305
+  _ENVELOPE._serialized_end=455
+  _RECEIPT._serialized_start=457
+  _RECEIPT._serialized_end=502
+  _GLOBALACKIDS._serialized_start=504
+  _GLOBALACKIDS._serialized_end=546
+  _MESSAGING._serialized_start=549
+  _MESSAGING._serialized_end=867
 # @@protoc_insertion_point(module_scope)
\ No newline at end of file
@@ -34,6 +34,26 @@ class MessagingStub(object):
                 request_serializer=message__pb2.Empty.SerializeToString,
                 response_deserializer=message__pb2.Empty.FromString,
                 )
+        self.AddPortConstraints = channel.unary_unary(
+                '/Messaging/AddPortConstraints',
+                request_serializer=message__pb2.portConstraints.SerializeToString,
+                response_deserializer=message__pb2.Empty.FromString,
+                )
+        self.AddAcksByID = channel.unary_unary(
+                '/Messaging/AddAcksByID',
+                request_serializer=message__pb2.AckIDs.SerializeToString,
+                response_deserializer=message__pb2.Empty.FromString,
+                )
+        self.Exchange = channel.stream_stream(
+                '/Messaging/Exchange',
+                request_serializer=message__pb2.envelope.SerializeToString,
+                response_deserializer=message__pb2.receipt.FromString,
+                )
+        self.Terminate = channel.unary_unary(
+                '/Messaging/Terminate',
+                request_serializer=message__pb2.globalAckIDs.SerializeToString,
+                response_deserializer=message__pb2.Empty.FromString,
+                )
 
 
 class MessagingServicer(object):
@@ -63,6 +83,30 @@ class MessagingServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def AddPortConstraints(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def AddAcksByID(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Exchange(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Terminate(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_MessagingServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -86,6 +130,26 @@ def add_MessagingServicer_to_server(servicer, server):
                     request_deserializer=message__pb2.Empty.FromString,
                     response_serializer=message__pb2.Empty.SerializeToString,
             ),
+            'AddPortConstraints': grpc.unary_unary_rpc_method_handler(
+                    servicer.AddPortConstraints,
+                    request_deserializer=message__pb2.portConstraints.FromString,
+                    response_serializer=message__pb2.Empty.SerializeToString,
+            ),
+            'AddAcksByID': grpc.unary_unary_rpc_method_handler(
+                    servicer.AddAcksByID,
+                    request_deserializer=message__pb2.AckIDs.FromString,
+                    response_serializer=message__pb2.Empty.SerializeToString,
+            ),
+            'Exchange': grpc.stream_stream_rpc_method_handler(
+                    servicer.Exchange,
+                    request_deserializer=message__pb2.envelope.FromString,
+                    response_serializer=message__pb2.receipt.SerializeToString,
+            ),
+            'Terminate': grpc.unary_unary_rpc_method_handler(
+                    servicer.Terminate,
+                    request_deserializer=message__pb2.globalAckIDs.FromString,
+                    response_serializer=message__pb2.Empty.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'Messaging', rpc_method_handlers)
@@ -162,4 +226,72 @@ class Messaging(object):
             message__pb2.Empty.SerializeToString,
             message__pb2.Empty.FromString,
             options, channel_credentials,
-            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
\ No newline at end of file
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def AddPortConstraints(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/Messaging/AddPortConstraints',
+            message__pb2.portConstraints.SerializeToString,
+            message__pb2.Empty.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def AddAcksByID(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/Messaging/AddAcksByID',
+            message__pb2.AckIDs.SerializeToString,
+            message__pb2.Empty.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Exchange(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/Messaging/Exchange',
+            message__pb2.envelope.SerializeToString,
+            message__pb2.receipt.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Terminate(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/Messaging/Terminate',
+            message__pb2.globalAckIDs.SerializeToString,
+            message__pb2.Empty.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
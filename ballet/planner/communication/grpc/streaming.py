@@ -0,0 +1,91 @@
+import queue
+import threading
+import time
+from typing import Any
+
+import grpc
+
+from ballet.planner.communication.grpc import message_pb2, message_pb2_grpc
+
+
+class HopLatencies:
+    """
+    Latencies of the messages exchanged between planners, per hop. On the receiving planner, a hop is the address of
+    the sending planner and the latency is one-way (the clocks of both hosts are assumed synchronized); on the sending
+    planner, it is the address of the receiving planner and the latency is the round trip of the receipt.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, hop: str, seconds: float):
+        with self._lock:
+            entry = self._entries.setdefault(hop, {"count": 0, "total": 0.0, "max": 0.0})
+            entry["count"] = entry["count"] + 1
+            entry["total"] = entry["total"] + seconds
+            entry["max"] = max(entry["max"], seconds)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        # summary[hop] -> {count, total, mean, max}
+        with self._lock:
+            return {hop: {**entry, "mean": entry["total"] / entry["count"]} for (hop, entry) in self._entries.items()}
+
+
+class PlannerStream:
+    """
+    Client side of the Exchange stream to a remote planner: envelopes (port constraints, acks and global acks) are
+    queued as they are produced and written on a single open stream, while a thread reads the receipts. The counts
+    of envelopes and receipts are updated by both threads, under a lock.
+    """
+
+    def __init__(self, stub: message_pb2_grpc.MessagingStub, address: str, origin: str, latencies: HopLatencies):
+        self._address = address
+        self._origin = origin
+        self._latencies = latencies
+        self._queue: queue.Queue = queue.Queue()
+        self._sent = 0
+        self._received = 0
+        self._broken = False
+        self._lock = threading.Lock()
+        self._responses = stub.Exchange(self._envelopes())
+        self._thread = threading.Thread(target=self._receipts, daemon=True)
+        self._thread.start()
+
+    def _envelopes(self):
+        while True:
+            envelope = self._queue.get()
+            if envelope is None:
+                return
+            yield envelope
+
+    def _receipts(self):
+        try:
+            for receipt in self._responses:
+                with self._lock:
+                    self._received = self._received + 1
+                self._latencies.record(self._address, time.time() - receipt.sentAt)
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.CANCELLED:
+                print(f"[REMOTE] stream to {self._address} broken: {e.code()}")
+                with self._lock:
+                    self._broken = True
+
+    def send(self, **payload: Any):
+        # payload is one of constraint=portConstraint, ack=AckID or globalAck=globalAckID
+        with self._lock:
+            self._sent = self._sent + 1
+        self._queue.put(message_pb2.envelope(origin=self._origin, sentAt=time.time(), **payload))
+
+    def broken(self) -> bool:
+        with self._lock:
+            return self._broken
+
+    def pending(self) -> int:
+        # Envelopes sent whose receipt has not been received yet
+        with self._lock:
+            return self._sent - self._received
+
+    def close(self, timeout: float = 5.0):
+        self._queue.put(None)
+        self._thread.join(timeout)
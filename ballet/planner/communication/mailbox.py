@@ -0,0 +1,43 @@
+import threading
+from typing import Any, Iterable, Set
+
+
+class Mailbox:
+    """
+    Items delivered to one component by the server workers, and drained by the resolve thread. Deliveries and drains
+    are serialized by a lock, and a drain swaps the set for an empty one: an item delivered concurrently is either in
+    the drained set or kept for the next drain, never lost.
+    """
+
+    def __init__(self):
+        self._items: Set[Any] = set()
+        self._lock = threading.Lock()
+
+    def add(self, item: Any) -> bool:
+        # True if the item was not in the mailbox yet
+        with self._lock:
+            new = item not in self._items
+            self._items.add(item)
+            return new
+
+    def add_all(self, items: Iterable[Any]):
+        with self._lock:
+            self._items.update(items)
+
+    def drain(self) -> Set[Any]:
+        with self._lock:
+            items = self._items
+            self._items = set()
+        return items
+
+    def snapshot(self) -> Set[Any]:
+        with self._lock:
+            return set(self._items)
+
+    def __contains__(self, item: Any) -> bool:
+        with self._lock:
+            return item in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
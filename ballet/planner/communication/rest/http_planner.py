@@ -0,0 +1,235 @@
+import asyncio
+import threading
+from typing import Any, Optional, Set
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector, web
+
+from ballet.assembly.simplified.assembly import CInstance
+from ballet.planner.communication.constraint_message import PortConstraintMessage, RemoteMessaging, \
+    ConstraintMessage, DeliveryNotifier
+from ballet.planner.communication.discovery import PeerDiscovery
+from ballet.planner.communication.mailbox import Mailbox
+from ballet.planner.communication.router import Router
+
+
+class HTTPPlannerServer:
+    """
+    Receives the batches sent by the remote planners on POST /batch, a JSON object with the lists "constraints",
+    "acks" and "globalAcks", and answers GET /ping. The server is run by the event loop of the messaging, in its
+    background thread: deliveries only take the lock of a mailbox.
+    """
+
+    def __init__(self, components):
+        self._mailbox = {comp.id(): Mailbox() for comp in components}
+        self._acks = {comp.id(): Mailbox() for comp in components}
+        self._global_acks = Mailbox()
+        self._notifier = DeliveryNotifier()
+        self._runner: Optional[web.AppRunner] = None
+
+    def _port_constraint(self, data: dict[str, Any]) -> tuple[Mailbox, tuple[str, Any, PortConstraintMessage]]:
+        bhv = data["behavior"] if data["behavior"] not in ["NONE", "None", "none", "", None] else None
+        constr = PortConstraintMessage(data["sourceID"], data["port"], data["status"], bhv)
+        return self._mailbox[data["targetID"]], (data["sourceID"], data["round"], constr)
+
+    def deliver(self, batch: dict[str, list]):
+        # A batch is delivered all or nothing: every message is parsed before the first one is added, a malformed
+        # one (e.g., for an unknown component) raising a KeyError, a TypeError or a ValueError
+        deliveries = [self._port_constraint(constraint) for constraint in batch.get("constraints", [])]
+        deliveries += [(self._acks[ack["targetID"]], ack["sourceID"]) for ack in batch.get("acks", [])]
+        targets = {m["targetID"] for m in batch.get("constraints", []) + batch.get("acks", [])}
+        global_acks = set(batch.get("globalAcks", []))
+        # Mailboxes are sets: an unhashable item (e.g., a list in the JSON) is rejected before any delivery as well
+        for (_, item) in deliveries:
+            hash(item)
+        for (mailbox, item) in deliveries:
+            mailbox.add(item)
+        new_global_acks = [id for id in global_acks if self._global_acks.add(id)]
+        if len(targets) != 0 or len(new_global_acks) != 0:
+            self._notifier.notify(targets)
+
+    async def _batch(self, request: web.Request) -> web.Response:
+        try:
+            batch = await request.json()
+            self.deliver(batch)
+        except (ValueError, KeyError, TypeError) as e:
+            return web.json_response({"error": f"Malformed batch, nothing delivered: {e}"}, status=400)
+        return web.json_response({"received": sum(len(batch.get(kind, [])) for kind in
+                                                  ["constraints", "acks", "globalAcks"])})
+
+    @staticmethod
+    async def _ping(request: web.Request) -> web.Response:
+        return web.Response(text="pong")
+
+    async def start(self, port: str):
+        app = web.Application()
+        app.add_routes([web.post("/batch", self._batch), web.get("/ping", self._ping)])
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "0.0.0.0", int(port)).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def notifier(self) -> DeliveryNotifier:
+        return self._notifier
+
+    def global_acks(self) -> set:
+        return self._global_acks.snapshot()
+
+    def get_mailbox(self, compId, reset=True):
+        received = self._mailbox[compId].drain() if reset else self._mailbox[compId].snapshot()
+        return {(sourceID, round, constr) for (sourceID, round, constr) in received
+                if (constr.port() != "") and (constr.status() != "")}
+
+    def get_acks(self, compId, reset=True):
+        return self._acks[compId].drain() if reset else self._acks[compId].snapshot()
+
+
+class HTTPMessaging (RemoteMessaging):
+    """
+    Messaging with the remote planners over HTTP, for deployments where gRPC cannot be used.
+
+    An asyncio event loop, run by a background thread, serves the incoming batches and sends the outgoing ones
+    through a single client session, whose connections are kept alive. Constraints and acks are buffered per planner
+    until flush() (called at the end of each sweep of resolve), then each planner gets one JSON batch, the planners
+    being sent to concurrently.
+    """
+
+    def __init__(self, local_components: list[CInstance], addresses: dict[str, dict[str, str]], port: str,
+                 verbose=False, connections: int = 10, timeout: float = 10.0, ready_timeout: Optional[float] = None,
+                 ping_timeout: float = 1.0):
+        ips = {comp: addresses[comp]["address"] + ":" + str(addresses[comp]["port_planner"]) for comp in addresses}
+        self._router = Router((), ips)
+        self._server = HTTPPlannerServer(local_components)
+        self._pending: dict[str, dict[str, list]] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._session: ClientSession = self._run(self._open(connections, timeout))
+        self._run(self._server.start(port))
+        self.__verbose = verbose
+        self._ping_timeout = ping_timeout
+        self.__pingAll(self._router.endpoints(), ready_timeout)
+        self._remote_send = 0
+        self._remote_rcv = 0
+        self._termination_send = 0
+        self._root_acked: Set[str] = set()
+        self._requests = 0
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    @staticmethod
+    async def _open(connections: int, timeout: float) -> ClientSession:
+        # At most `connections` connections kept alive per planner
+        return ClientSession(connector=TCPConnector(limit_per_host=connections),
+                             timeout=ClientTimeout(total=timeout))
+
+    async def _ping(self, address: str) -> bool:
+        try:
+            async with self._session.get(f"http://{address}/ping",
+                                         timeout=ClientTimeout(total=self._ping_timeout)) as rep:
+                return rep.status == 200 and await rep.text() == "pong"
+        except (ClientError, asyncio.TimeoutError):
+            return False
+
+    def __pingAll(self, addresses: Set[str], deadline: Optional[float]):
+        # The pings run concurrently on the event loop, see PeerDiscovery
+        if self.__verbose:
+            print(f"Try to ping the following [{','.join(addresses)}]")
+        discovery = PeerDiscovery(lambda address: self._run(self._ping(address)), deadline=deadline,
+                                  verbose=self.__verbose)
+        self._startup = discovery.discover(addresses)
+
+    def _buffer(self, address: str, kind: str, item):
+        self._pending.setdefault(address, {"constraints": [], "acks": [], "globalAcks": []})[kind].append(item)
+
+    def get_messages(self, comp: CInstance) -> Set[tuple[str, int, ConstraintMessage]]:
+        res = self._server.get_mailbox(comp.id(), reset=True)
+        self._remote_rcv = self._remote_rcv + len(res)
+        for (sourceID, round, constr) in res:
+            print(f"[REMOTE] {comp.id()} received from {sourceID}: ({constr.source()},{constr.port()},{constr.status()},{constr.behavior()})")
+        return res
+
+    def send_messages(self, source: CInstance, round: int, messages: Set[tuple[str, ConstraintMessage]]):
+        self._remote_send = self._remote_send + len(messages)
+        for (address, group) in self._router.group(messages, lambda m: m[0]).items():
+            for (target, constr) in group:
+                print(f"[REMOTE] {source.id()} send to {target}: ({constr.source()},{constr.port()},{constr.status()},{constr.behavior()})")
+                if isinstance(constr, PortConstraintMessage):
+                    self._buffer(address, "constraints", {"sourceID": source.id(), "targetID": target, "round": round,
+                                                          "port": constr.port(), "status": constr.status(),
+                                                          "behavior": constr.behavior()})
+
+    def get_acks(self, comp: CInstance) -> Set[str]:
+        res = self._server.get_acks(comp.id(), reset=True)
+        for m in res:
+            print(f"[REMOTE] {comp.id()} received ack from {m}")
+        return res
+
+    def send_acks(self, source: CInstance, targets: Set[str]):
+        for (address, group) in self._router.group(targets).items():
+            for target in group:
+                print(f"[REMOTE] {source.id()} send ack to {target} (at {address})")
+                self._buffer(address, "acks", {"sourceID": source.id(), "targetID": target})
+
+    def bcast_root_acks(self, source: CInstance):
+        # A global ack is sent once, to every planner (a planner hosting several components being sent a single ack)
+        if source.id() in self._root_acked:
+            return
+        self._root_acked.add(source.id())
+        for address in self._router.endpoints():
+            self._termination_send = self._termination_send + 1
+            self._buffer(address, "globalAcks", source.id())
+
+    def set_termination(self, mode: str, fanout: int = 2):
+        if mode != "broadcast":
+            raise ValueError(f"The HTTP messaging only supports the broadcast termination detection, not {mode}")
+
+    async def _post(self, address: str, batch: dict[str, list]):
+        async with self._session.post(f"http://{address}/batch", json=batch) as rep:
+            rep.raise_for_status()
+
+    async def _post_all(self, batches: dict[str, dict[str, list]]):
+        await asyncio.gather(*[self._post(address, batch) for (address, batch) in batches.items()])
+
+    def flush(self):
+        pending = self._pending
+        self._pending = {}
+        if len(pending) != 0:
+            self._requests = self._requests + len(pending)
+            self._run(self._post_all(pending))
+
+    def get_global_acks(self) -> Set[str]:
+        return self._server.global_acks()
+
+    def endpoints(self) -> dict[str, str]:
+        return self._router.routes()
+
+    def wait_deliveries(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        return self._server.notifier().wait(timeout)
+
+    def stop(self):
+        self.flush()
+        self._run(self._session.close())
+        self._run(self._server.stop())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def startup_report(self) -> dict:
+        return self._startup
+
+    def n_requests(self) -> int:
+        # HTTP requests sent: one per planner and flush
+        return self._requests
+
+    def n_remote_send(self):
+        return self._remote_send
+
+    def n_remote_rcv(self):
+        return self._remote_rcv
+
+    def n_termination_send(self):
+        return self._termination_send
@@ -0,0 +1,58 @@
+from typing import Callable, Iterable, Optional, TypeVar
+
+A = TypeVar('A')
+
+
+class Router:
+    """
+    Route of each component, built once from the inventory: the local mailbox for the components of this planner,
+    the endpoint (address:port) of the planner serving it otherwise. Messages and acks sent on each route are
+    counted.
+    """
+    LOCAL = "local"
+
+    def __init__(self, local_ids: Iterable[str], endpoints: Optional[dict[str, str]] = None):
+        # Local components are routed locally, even if the inventory gives them an endpoint
+        self._routes: dict[str, str] = dict(endpoints) if endpoints is not None else {}
+        self._routes.update({id: self.LOCAL for id in local_ids})
+        self._counters: dict[str, dict[str, int]] = {}
+
+    def route(self, id: str) -> str:
+        # Components missing from the inventory are remote, without known endpoint
+        return self._routes.get(id, "")
+
+    def routes(self) -> dict[str, str]:
+        return dict(self._routes)
+
+    def is_local(self, id: str) -> bool:
+        return self._routes.get(id) == self.LOCAL
+
+    def endpoints(self) -> set[str]:
+        return {route for route in self._routes.values() if route != self.LOCAL}
+
+    def split(self, items: Iterable[A], target: Callable[[A], str] = lambda a: a) -> tuple[list[A], list[A]]:
+        # (local items, remote items)
+        local: list[A] = []
+        remote: list[A] = []
+        for item in items:
+            (local if self.is_local(target(item)) else remote).append(item)
+        return local, remote
+
+    def group(self, items: Iterable[A], target: Callable[[A], str] = lambda a: a) -> dict[str, list[A]]:
+        # items[route]: the items to send to each planner (or to the local mailbox)
+        groups: dict[str, list[A]] = {}
+        for item in items:
+            groups.setdefault(self.route(target(item)), []).append(item)
+        return groups
+
+    def record(self, route: str, kind: str, count: int = 1):
+        if count != 0:
+            counters = self._counters.setdefault(route, {"messages": 0, "acks": 0})
+            counters[kind] = counters[kind] + count
+
+    def counters(self) -> dict[str, dict[str, int]]:
+        # counters[route] -> {messages, acks}
+        return {route: dict(counters) for (route, counters) in self._counters.items()}
+
+    def n_send(self, local: bool, kind: str = "messages") -> int:
+        return sum(counters[kind] for (route, counters) in self._counters.items() if (route == self.LOCAL) == local)
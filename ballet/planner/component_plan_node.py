@@ -1,28 +1,46 @@
-from typing import Any, Set, Iterable, Union
+from datetime import timedelta
+from typing import Any, Set, Iterable, Union, Optional
+
+from minizinc import Status
 
 from ballet.assembly.simplified.assembly import Place, CInstance
 from ballet.assembly.plan.plan import Plan, Wait, PushB
+from ballet.planner.communication.constraint_message import PortConstraintMessage
+from ballet.planner.minizinc.mzn_batch import MiniZincBatch
+from ballet.planner.minizinc.mzn_cache import MiniZincResultCache, default_cache
+from ballet.planner.minizinc.mzn_native import native_solver
+from ballet.planner.minizinc.mzn_portfolio import solver_key
 from ballet.planner.minizinc.mzn_regular import MiniZincModelComponent, MiniZincStateRegularConstraint, \
     MiniZincPortRegularConstraint, MiniZincBehaviorRegularConstraint, MiniZincWaitRegularConstraint
 from ballet.utils.io_utils import makeDir
 from ballet.utils.list_utils import flatmap
+from ballet.utils.mzn_utils import mzn_max_int
 from ballet.planner.goal import ReconfigurationGoal, Goal, PortConstraint, PortReconfigurationGoal, BehaviorReconfigurationGoal, PlaceReconfigurationGoal
 
 
 class ComponentNode:
 
-    def __init__(self, comp: CInstance, active_place: Union[Place, str], word_length=10):
+    def __init__(self, comp: CInstance, active_place: Union[Place, str], word_length: Optional[int] = None,
+                 cache: Optional[MiniZincResultCache] = default_cache, solver: Union[str, Iterable[str]] = "gecode",
+                 dump: bool = False, timeout: Optional[timedelta] = None):
         self._id = comp.id()
         init_place = active_place.name() if type(active_place) == Place else active_place
         self._ports = list(map(lambda p: p.name(), comp.type().ports()))
         self._regular = MiniZincModelComponent(comp, init_place, word_length)
+        # Without a fixed word length, each solve starts from the estimated horizon of its goals and is deepened
+        self._word_length = word_length
         self._goals: dict[ReconfigurationGoal, bool] = {}
-        self._rcv_messages: dict[str, list[Goal]] = {neighbor: [] for neighbor in comp.neighbors()}
-        self._rcv_messages["anon"] = []
-        self._ballots: dict[str, int] = {neighbor: -1 for neighbor in comp.neighbors()}
+        # Received constraints, coalesced per (source, port): only the ones of the latest round of the source are kept
+        self._rcv_messages: dict[tuple[str, str], tuple[int, Set[Goal]]] = {}
         self._round: int = 0
         self._waiting_acks: Set[str] = set()
         self._must_send_acks: Set[str] = set()
+        self._cache = cache
+        # A list of solvers is raced as a portfolio; with a timeout, the best solution found so far is used
+        self._solver = solver
+        self._timeout = timeout
+        # Models are solved in memory; dumping them in local_dec_mzn/ and plan_mzn/ is only meant for debugging
+        self._dump = dump
 
     def num_constraints(self):
         # return count(lambda c: c.isPortConstraint(), self._regular.constraints())
@@ -40,15 +58,20 @@ class ComponentNode:
                 self._addPortGoal(instruction)
             if instruction.isBehaviorGoal():
                 self._addBehaviorGoal(instruction)
-        else:
-            # if (source != "anon" and self._ballots[source] < round):
-            if (source != "anon"):
-                self._rcv_messages[source] = []
-                self._ballots[source] = round
-                self._rcv_messages[source].append(instruction)
+        elif source != "anon":
+            # Rounds received from remote planners are strings
+            round = -1 if round is None else int(round)
+            key = (source, instruction.port())
+            (last_round, constraints) = self._rcv_messages.get(key, (-1, set()))
+            if round > last_round:
+                # A retraction withdraws the constraints of the previous rounds
+                retracted = instruction.status() == PortConstraintMessage.retracted
+                self._rcv_messages[key] = (round, set() if retracted else {instruction})
+            elif round == last_round:
+                constraints.add(instruction)
 
     def _get_constraint_messages(self) -> list[PortConstraint]:
-        return flatmap(lambda src: self._rcv_messages[src], self._rcv_messages.keys())
+        return flatmap(lambda entry: entry[1], self._rcv_messages.values())
 
     def _addPlaceGoal(self, message: PlaceReconfigurationGoal):
         constraint = MiniZincStateRegularConstraint(message.place(), final=message.final())
@@ -76,19 +99,73 @@ class ComponentNode:
                 status_curr = status_i
         return result
 
-    def bhv_inference(self) -> list[str]:
+    def _run(self, regular: MiniZincModelComponent, dirname: str, filename: str):
+        if self._dump:
+            makeDir(dirname)
+            regular.write(f"{filename}_{regular.word_length()}" if self._word_length is None else filename)
+        return regular.run(self._solver, self._timeout).result()
+
+    def _prepare(self, regular: MiniZincModelComponent) -> str:
+        if self._word_length is None:
+            regular.set_word_length(regular.estimated_word_length())
+        return regular.signature()
+
+    def _cached(self, signature: str) -> Optional[dict[str, Any]]:
+        if self._cache is None:
+            return None
+        return self._cache.get(signature, solver_key(self._solver))
+
+    def _keep(self, signature: str, mznresult) -> dict[str, Any]:
+        result = {"sequence": list(mznresult["sequence"])}
+        for port in self._ports:
+            result[port + "_status"] = list(mznresult[port + "_status"])
+        # A solution cut by the timeout may not be optimal, it is not kept for later solves
+        if self._cache is not None and mznresult.status == Status.OPTIMAL_SOLUTION:
+            self._cache.put(signature, result, solver_key(self._solver))
+        return result
+
+    def _deepens(self, regular: MiniZincModelComponent, mznresult) -> bool:
+        # The estimated length may only be satisfiable through a no-op priced mzn_max_int: it is deepened as well
+        return self._word_length is None and (mznresult.status == Status.UNSATISFIABLE or
+                                              (mznresult.objective is not None and mznresult.objective >= mzn_max_int)) \
+            and regular.word_length() < regular.max_word_length()
+
+    def _solve(self, regular: MiniZincModelComponent, dirname: str, filename: str, mznresult=None) -> dict[str, Any]:
+        # mznresult: a result already found for the estimated length (e.g., by a batch), deepened if needed
+        signature = self._prepare(regular)
+        if mznresult is None:
+            cached = self._cached(signature)
+            if cached is not None:
+                return cached
+            mznresult = self._run(regular, dirname, filename)
+        while self._deepens(regular, mznresult):
+            regular.set_word_length(min(2 * regular.word_length(), regular.max_word_length()))
+            mznresult = self._run(regular, dirname, filename)
+        if not mznresult.status.has_solution():
+            # E.g., the timeout expired before a first solution: a longer word would not be solved faster
+            raise RuntimeError(f"No solution for {self._id} ({mznresult.status}, word length {regular.word_length()}, "
+                               f"timeout {self._timeout})")
+        return self._keep(signature, mznresult)
+
+    def _decision_model(self) -> MiniZincModelComponent:
         my_regular = self._regular.copy()
         for message in self._get_constraint_messages():
             my_regular.add_constraint(MiniZincPortRegularConstraint(message.port(), message.status()))
+        return my_regular
+
+    def _decision_files(self) -> tuple[str, str]:
         dirname = "local_dec_mzn"
-        makeDir(dirname)
-        filename = f"{dirname}/{self._id}_decision_{self.get_round()}"
-        my_regular.write(filename)
-        local_decision_exec = my_regular.run().result()
+        return dirname, f"{dirname}/{self._id}_decision_{self.get_round()}"
+
+    def _decision(self, local_decision_exec: dict[str, Any]):
         sequence = local_decision_exec["sequence"]
         affected_ports = flatmap(lambda p: self._howAffected(p, local_decision_exec), self._ports)
         return sequence, affected_ports
 
+    def bhv_inference(self) -> list[str]:
+        dirname, filename = self._decision_files()
+        return self._decision(self._solve(self._decision_model(), dirname, filename))
+
     @staticmethod
     def _format_plan(plan: list[str], compname: str = "") -> Plan:
         def __format_wait(inst: str) -> str:
@@ -104,7 +181,7 @@ class ComponentNode:
             plan
         )))
 
-    def local_plan(self) -> Plan:
+    def _plan_model(self) -> MiniZincModelComponent:
         my_regular = self._regular.copy()
         for message in self._get_constraint_messages():
             my_regular.add_constraint(MiniZincPortRegularConstraint(message.port(), message.status()))
@@ -112,11 +189,13 @@ class ComponentNode:
                 my_regular.add_constraint(
                     MiniZincWaitRegularConstraint(message.component(), message.behavior(), message.port(),
                                                   message.status()))
+        return my_regular
+
+    def _plan_files(self) -> tuple[str, str]:
         dirname = "plan_mzn"
-        makeDir(dirname)
-        filename = f"{dirname}/{self._id}_plan"
-        my_regular.write(filename)
-        local_plan_exec = my_regular.run().result()
+        return dirname, f"{dirname}/{self._id}_plan"
+
+    def _plan(self, local_plan_exec: dict[str, Any]) -> Plan:
         sequence = local_plan_exec["sequence"]
         plan = []
         for inst in sequence:
@@ -124,6 +203,23 @@ class ComponentNode:
                 plan.append(inst)
         return self._format_plan(plan, self._id)
 
+    def local_plan(self) -> Plan:
+        dirname, filename = self._plan_files()
+        return self._plan(self._solve(self._plan_model(), dirname, filename))
+
+    def wait_places(self) -> dict[tuple[str, str], set[str]]:
+        # wait_places[(component, behavior)]: the places where the local plan can wait for the behavior, i.e., where
+        # all the ports constrained by the wait have the expected status
+        res: dict[tuple[str, str], set[str]] = {}
+        for message in self._get_constraint_messages():
+            if message.wait():
+                constraint = MiniZincWaitRegularConstraint(message.component(), message.behavior(), message.port(),
+                                                           message.status())
+                places = set(self._regular.wait_places(constraint))
+                key = (message.component(), message.behavior())
+                res[key] = res[key] & places if key in res else places
+        return res
+
     def get_round(self):
         return self._round
 
@@ -186,4 +282,59 @@ class ComponentNode:
         self._must_send_acks = set()
 
     def isDone(self):
-        return len(self._must_send_acks) == 0 and len(self._waiting_acks) == 0
\ No newline at end of file
+        return len(self._must_send_acks) == 0 and len(self._waiting_acks) == 0
+
+    def cache(self) -> Optional[MiniZincResultCache]:
+        return self._cache
+
+    def __getstate__(self):
+        # A node solved in another process does not carry the whole cache: it fills an empty one (sharing the same
+        # directory), whose entries are merged back by the caller, see resolve._map
+        state = self.__dict__.copy()
+        if self._cache is not None:
+            state["_cache"] = MiniZincResultCache(self._cache.maxsize(), self._cache.directory())
+        return state
+
+def _solve_batch(nodes: list[ComponentNode], regulars: list[MiniZincModelComponent],
+                 files: list[tuple[str, str]]) -> list[dict[str, Any]]:
+    # The models missing from the caches are solved together; when the batch has no solution (e.g., one of its
+    # models needs a longer word), its models are solved one by one; a model only solved through a no-op is deepened
+    # alone, as in ComponentNode._solve
+    results = [None] * len(nodes)
+    signatures = [node._prepare(regular) for (node, regular) in zip(nodes, regulars)]
+    todo = []
+    for i, node in enumerate(nodes):
+        results[i] = node._cached(signatures[i])
+        if results[i] is None:
+            todo.append(i)
+    solver = nodes[0]._solver
+    if len(todo) > 1 and solver != native_solver:
+        batch = MiniZincBatch([regulars[i] for i in todo]).run(solver, nodes[0]._timeout).results()
+        for (i, mznresult) in zip(todo, batch):
+            if not mznresult.status.has_solution():
+                continue
+            if nodes[i]._deepens(regulars[i], mznresult):
+                results[i] = nodes[i]._solve(regulars[i], *files[i], mznresult)
+            else:
+                results[i] = nodes[i]._keep(signatures[i], mznresult)
+    for i in todo:
+        if results[i] is None:
+            results[i] = nodes[i]._solve(regulars[i], *files[i])
+    return results
+
+
+def batch_bhv_inference(nodes: list[ComponentNode]) -> list:
+    """
+    bhv_inference() of several nodes, solved in a single MiniZinc call. The nodes share the solver and timeout.
+    """
+    results = _solve_batch(nodes, [node._decision_model() for node in nodes],
+                           [node._decision_files() for node in nodes])
+    return [node._decision(result) for (node, result) in zip(nodes, results)]
+
+
+def batch_local_plan(nodes: list[ComponentNode]) -> list[Plan]:
+    """
+    local_plan() of several nodes, solved in a single MiniZinc call. The nodes share the solver and timeout.
+    """
+    results = _solve_batch(nodes, [node._plan_model() for node in nodes], [node._plan_files() for node in nodes])
+    return [node._plan(result) for (node, result) in zip(nodes, results)]
@@ -0,0 +1,139 @@
+import argparse
+import itertools
+from typing import Any, Optional, Union
+
+from ballet.assembly.plan.makespan import behavior_duration, estimate_makespan, Schedule
+from ballet.assembly.plan.plan import Plan, Instruction, merge_plans_dag
+from ballet.assembly.simplified.assembly import CInstance, Place
+
+
+def _place(comp: CInstance, place: Union[Place, str]) -> Place:
+    return place if isinstance(place, Place) else comp.type().get_place(place)
+
+
+def wait_alternatives(comp: CInstance, place: Union[Place, str], plan: Plan, wait_places: dict[tuple[str, str], set[str]],
+                      limit: int = 64) -> list[Plan]:
+    """
+    Alternative local plans of comp, with the same behaviors but its waits placed elsewhere: a wait can be done
+    between two behaviors as long as the component is in one of its wait_places (see ComponentNode.wait_places), as
+    the solver could have placed it there at no cost. The plan of the solver comes first, then the one with every
+    wait as late as possible, then the other placements, at most limit plans in all.
+    """
+    behaviors = [instr for instr in plan.instructions() if not instr.isWait()]
+    waits = [instr for instr in plan.instructions() if instr.isWait()]
+    # places[i]: the place of the component before behaviors[i] (after the last one for i = len(behaviors))
+    places = [_place(comp, place)]
+    for pushb in behaviors:
+        places.append(behavior_duration(comp.type(), pushb.behavior(), places[-1])[1])
+    # defaults[i]: the number of behaviors before waits[i] in the plan of the solver
+    defaults = []
+    count = 0
+    for instr in plan.instructions():
+        if instr.isWait():
+            defaults.append(count)
+        else:
+            count = count + 1
+    gaps = []
+    for (wait, default) in zip(waits, defaults):
+        allowed = wait_places.get((wait.component(), wait.behavior()))
+        valid = {gap for gap in range(len(places)) if allowed is not None and places[gap].name() in allowed}
+        gaps.append(sorted(valid | {default}))
+    combinations = [tuple(defaults), tuple(max(candidates) for candidates in gaps)]
+    combinations = list(dict.fromkeys(combinations + list(itertools.islice(itertools.product(*gaps), limit))))[:limit]
+
+    def placed(combination: tuple[int, ...]) -> Plan:
+        instructions: list[Instruction] = []
+        for gap in range(len(behaviors) + 1):
+            instructions = instructions + [wait for (wait, at) in zip(waits, combination) if at == gap]
+            if gap < len(behaviors):
+                instructions.append(behaviors[gap])
+        return Plan(plan.name(), instructions)
+    return list(map(placed, combinations))
+
+
+class MakespanOptimizer:
+    """
+    Optional second phase of resolve(): each local plan minimizes the sum of its own costs, but a component waiting
+    too early for a slow neighbour delays its next behaviors. Among the alternative local plans of the components
+    (see wait_alternatives), a local search keeps the combination minimizing the expected makespan of the merged plan
+    (see estimate_makespan): the alternatives of the components of the critical path are tried, one component at a
+    time, until the makespan does not decrease anymore.
+
+    Only the local plans are optimized: waits for remote components end when their behaviors are expected to.
+    """
+
+    def __init__(self, max_alternatives: int = 64, max_rounds: int = 10):
+        self._max_alternatives = max_alternatives
+        self._max_rounds = max_rounds
+        self._report: dict[str, Any] = {}
+
+    @staticmethod
+    def _estimate(plans: dict[CInstance, Plan], active: dict[CInstance, Union[Place, str]]) -> Schedule:
+        return estimate_makespan(merge_plans_dag(list(plans.values())),
+                                 {comp.id(): comp.type() for comp in plans},
+                                 {comp.id(): _place(comp, active[comp]) for comp in plans})
+
+    def optimize(self, plans: dict[CInstance, Plan], active: dict[CInstance, Union[Place, str]],
+                 wait_places: dict[CInstance, dict[tuple[str, str], set[str]]]) -> dict[CInstance, Plan]:
+        alternatives = {comp: wait_alternatives(comp, active[comp], plan, wait_places.get(comp, {}),
+                                                self._max_alternatives)
+                        for (comp, plan) in plans.items()}
+        current = {comp: alternatives[comp][0] for comp in plans}
+        schedule = self._estimate(current, active)
+        default = best = schedule.makespan()
+        evaluations = 1
+        rounds = 0
+        changed = set()
+        improved = True
+        while improved and rounds < self._max_rounds:
+            improved = False
+            rounds = rounds + 1
+            critical = set(schedule.critical_path())
+            for comp in [comp for comp in plans if critical & set(current[comp].instructions())]:
+                for alternative in alternatives[comp]:
+                    trial = self._estimate({**current, comp: alternative}, active)
+                    evaluations = evaluations + 1
+                    if trial.makespan() < best:
+                        (best, schedule, current[comp]) = (trial.makespan(), trial, alternative)
+                        changed.add(comp.id())
+                        improved = True
+        self._report = {"default": default, "optimized": best, "improvement": default - best,
+                        "evaluations": evaluations, "rounds": rounds, "changed": sorted(changed)}
+        return current
+
+    def report(self) -> dict[str, Any]:
+        # {default, optimized (expected makespans), improvement, evaluations (of a makespan), rounds, changed}
+        return self._report
+
+
+def main():
+    # resolve() imports this module
+    from ballet.gateway.parser import AssemblyParser, GoalParser
+    from ballet.planner.communication.constraint_message import MailboxMessaging
+    from ballet.planner.resolve import resolve
+
+    parser = argparse.ArgumentParser(description="Expected makespan and critical path of the plans reaching goals")
+    parser.add_argument("assembly", help="assembly file")
+    parser.add_argument("goals", nargs='+', help="goal files, to compare")
+    parser.add_argument("--solver", default="gecode", help="solver of the local decisions (e.g., native)")
+    parser.add_argument("--optimize", action="store_true", help="optimize the makespan of the plans")
+    parser.add_argument("--verbose", action="store_true", help="print the critical paths")
+    args = parser.parse_args()
+    print("goal,makespan,critical_path" + (",default_makespan" if args.optimize else ""))
+    for goal in args.goals:
+        instances, active, _, _ = AssemblyParser().parse(args.assembly)
+        goals, goals_states = GoalParser(instances, active).parse(goal)
+        optimizer = MakespanOptimizer() if args.optimize else None
+        plans = resolve(instances, active, goals, goals_states, MailboxMessaging(instances), solver=args.solver,
+                        makespan=optimizer)
+        schedule = estimate_makespan(merge_plans_dag(list(plans.values()), goal),
+                                     {comp.id(): comp.type() for comp in instances},
+                                     {comp.id(): place for (comp, place) in active.items()})
+        line = f"{goal},{schedule.makespan()},{len(schedule.critical_path())}"
+        print(line + (f",{optimizer.report()['default']}" if optimizer is not None else ""))
+        if args.verbose:
+            print(schedule)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,54 @@
-from minizinc import Instance, Model, Solver
+from datetime import timedelta
+from typing import Any, Iterable, Optional, Union
+
+from minizinc import Model, Status
+from ballet.planner.minizinc.mzn_portfolio import solve
 from ballet.utils.mzn_utils import add_mzn_ext
 
 
+class MiniZincResult:
+    """
+    Mimics minizinc.Result for results that are not directly produced by MiniZinc (e.g. the native solver):
+    values are accessed by their MiniZinc name (e.g. result["sequence"])
+    """
+
+    def __init__(self, status: Status, solution: Optional[dict[str, Any]], statistics: dict[str, Any]):
+        self.status = status
+        self.solution = solution
+        self.statistics = statistics
+
+    @property
+    def objective(self):
+        if self.solution is None:
+            return None
+        return self.solution["objective"]
+
+    def __getitem__(self, key):
+        if self.solution is None:
+            raise KeyError(key)
+        return self.solution[key]
+
+    def __contains__(self, key):
+        return self.solution is not None and key in self.solution
+
+
 class MiniZincApp:
 
-    def __init__(self, filename: str) -> None:
-        mzn_filename = add_mzn_ext(filename)
-        self._model =  Model(mzn_filename)
-        self._instance = None
+    def __init__(self, filename: Optional[str] = None, content: Optional[str] = None, label: str = "") -> None:
+        # The model is either loaded from a file, or directly built from its content (without touching the disk)
+        assert filename is not None or content is not None
+        self._model = Model()
+        if filename is not None:
+            self._model.add_file(add_mzn_ext(filename))
+        if content is not None:
+            self._model.add_string(content)
+        self._label = label
         self._result = None
 
-    def run(self, solver: str = "gecode"):
-        if self._instance is None:
-            self._instance = Instance(Solver.lookup(solver), self._model)
-        self._result = self._instance.solve()
+    def run(self, solver: Union[str, Iterable[str]] = "gecode", timeout: Optional[timedelta] = None):
+        # A list of solvers is raced as a portfolio
+        self._result = solve(self._model, solver, timeout, label=self._label)
         return self
 
     def result(self):
-        return self._result
\ No newline at end of file
+        return self._result
@@ -0,0 +1,97 @@
+import re
+from datetime import timedelta
+from typing import Any, Iterable, Optional, Union
+
+from minizinc import Model
+
+from ballet.planner.minizinc.mzn_app import MiniZincResult
+from ballet.planner.minizinc.mzn_parametric import MiniZincTypeModel, type_model
+from ballet.planner.minizinc.mzn_portfolio import solve
+
+_identifier = re.compile(r"\b[A-Za-z_][A-Za-z0-9_]*\b")
+
+
+def _rename(content: str, names: dict[str, str]) -> str:
+    return _identifier.sub(lambda match: names.get(match.group(0), match.group(0)), content)
+
+
+class MiniZincBatch:
+    """
+    Solves independent component models in a single MiniZinc call.
+
+    The declarations of each component type are emitted once, prefixed by T<i>_ (enum constants included), and the
+    parameters and variables of each model are prefixed by N<j>_. The objective is the sum of the costs of all the
+    models: as they share no variable, an optimal solution of the batch is optimal for each model.
+    """
+    _includes = ["regular", "count"]
+
+    def __init__(self, regulars: list) -> None:
+        self._regulars = regulars
+        self._type_models: list[MiniZincTypeModel] = []
+        self._types: list[int] = []
+        for regular in regulars:
+            model = type_model(regular)
+            if model not in self._type_models:
+                self._type_models.append(model)
+            self._types.append(self._type_models.index(model))
+        self._content = self._generate()
+        self._results = None
+
+    @staticmethod
+    def _type_prefix(t: int) -> str:
+        return f"T{t}_"
+
+    @staticmethod
+    def _node_prefix(n: int) -> str:
+        return f"N{n}_"
+
+    def _names(self, n: int) -> dict[str, str]:
+        t = self._types[n]
+        model = self._type_models[t]
+        names = {name: self._type_prefix(t) + name for name in model.type_names()}
+        names.update({name: self._node_prefix(n) + name for name in model.instance_names()})
+        return names
+
+    def _generate(self) -> str:
+        includes = '\n'.join(map(lambda lib: f"include \"{lib}.mzn\";", self._includes))
+        types = [_rename(model.type_section(), {name: self._type_prefix(t) + name for name in model.type_names()})
+                 for (t, model) in enumerate(self._type_models)]
+        nodes = [_rename(self._type_models[self._types[n]].instance_section() + "\n" +
+                         self._type_models[self._types[n]].data(regular), self._names(n))
+                 for (n, regular) in enumerate(self._regulars)]
+        objective = " + ".join(f"sum({self._node_prefix(n)}cost)" for n in range(len(self._regulars)))
+        return '\n'.join([includes, MiniZincTypeModel.status()] + types + nodes + [f"solve minimize {objective};"])
+
+    def content(self) -> str:
+        return self._content
+
+    def run(self, solver: Union[str, Iterable[str]] = "gecode", timeout: Optional[timedelta] = None):
+        model = Model()
+        model.add_string(self._content)
+        self._results = self.split(solve(model, solver, timeout, label="batch"))
+        return self
+
+    def split(self, result) -> list[MiniZincResult]:
+        # Result of each model, as if it was solved alone by MiniZincParametricApp
+        results = []
+        for (n, regular) in enumerate(self._regulars):
+            model = self._type_models[self._types[n]]
+            if result.solution is None:
+                results.append(MiniZincResult(result.status, None, result.statistics))
+                continue
+            type_prefix = self._type_prefix(self._types[n])
+
+            def value(name: str) -> list:
+                return [str(v)[len(type_prefix):] if str(v).startswith(type_prefix) else v
+                        for v in result[self._node_prefix(n) + name]]
+
+            solution: dict[str, Any] = {name: value(name) for name in ["sequence", "states", "wait_index"]}
+            solution["cost"] = list(result[self._node_prefix(n) + "cost"])
+            solution["objective"] = sum(solution["cost"])
+            for port in model.ports():
+                solution[port + "_status"] = value(port + "_status")
+            results.append(model.decode(regular, MiniZincResult(result.status, solution, result.statistics)))
+        return results
+
+    def results(self) -> list[MiniZincResult]:
+        return self._results
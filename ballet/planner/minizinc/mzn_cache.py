@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from ballet.utils.io_utils import makeDir
+
+
+class MiniZincResultCache:
+    """
+    Bounded LRU cache of solved component models.
+
+    Entries are keyed by a hash of the generated model content (and the solver used), so that two components of
+    the same type, in the same place, with the same goals and received constraints share a single solve.
+    When a directory is given, entries are also persisted as JSON files and reloaded on a miss.
+    """
+
+    def __init__(self, maxsize: int = 1024, directory: Optional[str] = None):
+        self._maxsize = maxsize
+        self._directory = directory
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        if directory is not None:
+            makeDir(directory)
+
+    @staticmethod
+    def key(content: str, solver: str = "gecode") -> str:
+        return hashlib.sha256(f"{solver}\n{content}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key + ".json")
+
+    def _load(self, key: str) -> Optional[dict[str, Any]]:
+        if self._directory is None or not os.path.isfile(self._path(key)):
+            return None
+        with open(self._path(key), 'r') as f:
+            return json.load(f)
+
+    def _store(self, key: str, result: dict[str, Any]):
+        if self._directory is not None:
+            with open(self._path(key), 'w') as f:
+                json.dump(result, f)
+
+    def _insert(self, key: str, result: dict[str, Any]):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, content: str, solver: str = "gecode") -> Optional[dict[str, Any]]:
+        key = self.key(content, solver)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits = self._hits + 1
+                return self._entries[key]
+            result = self._load(key)
+            if result is None:
+                self._misses = self._misses + 1
+                return None
+            self._insert(key, result)
+            self._hits = self._hits + 1
+            return result
+
+    def put(self, content: str, result: dict[str, Any], solver: str = "gecode"):
+        key = self.key(content, solver)
+        with self._lock:
+            self._insert(key, result)
+            self._store(key, result)
+
+    def entries(self) -> list[tuple[str, dict[str, Any]]]:
+        # (key, result) pairs, from the least recently used one
+        with self._lock:
+            return list(self._entries.items())
+
+    def merge(self, entries: list[tuple[str, dict[str, Any]]]):
+        # Entries of another cache (e.g., filled in a worker process), already persisted by it
+        with self._lock:
+            for (key, result) in entries:
+                self._insert(key, result)
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._hits = 0
+            self._misses = 0
+
+    def hits(self) -> int:
+        return self._hits
+
+    def misses(self) -> int:
+        return self._misses
+
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    def directory(self) -> Optional[str]:
+        return self._directory
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # The lock cannot be pickled, e.g., when nodes are solved in a process pool
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+default_cache = MiniZincResultCache()
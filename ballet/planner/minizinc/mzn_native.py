@@ -0,0 +1,145 @@
+import heapq
+import time
+from datetime import timedelta
+from typing import Any, Optional
+
+from minizinc import Status
+
+from ballet.planner.minizinc.mzn_app import MiniZincResult
+from ballet.utils.mzn_utils import mzn_max_int
+
+native_solver = "native"
+
+
+class NativeRegularSolver:
+    """
+    Solves a MiniZincModelComponent in-process, without MiniZinc.
+
+    The model is a regular constraint over the reduced automaton of the component type, so an optimal word is a
+    cheapest path in the product of this automaton with the goals still to fulfill. Such a path is found by a
+    Dijkstra search where a node is (place, length, reached goals, performed waits, last behavior), and where any
+    node can be completed by a suffix of skips at no cost.
+    """
+
+    def __init__(self, model):
+        self._model = model
+        self._result = None
+
+    def run(self):
+        self._result = self._solve()
+        return self
+
+    def result(self) -> MiniZincResult:
+        return self._result
+
+    def _solve(self) -> MiniZincResult:
+        start = time.perf_counter()
+        model = self._model
+        skip = model.skip()
+        length = model.word_length()
+        iplace = model.initial_place()
+        transitions = model.comp_transitions()
+        costs = model.comp_costs()
+        ports = model.comp_ports()
+        moves = [bhv for bhv in model.comp_behaviors() if bhv != skip]
+
+        def status(place: str, port: str) -> str:
+            return "enabled" if place in ports[port] else "disabled"
+
+        # Goals that must hold somewhere along the word are tracked as bits of a mask
+        visits = sorted(set(c.state() for c in model.state_constraints()))
+        ports_any = sorted(set((c.port(), c.status()) for c in model.port_constraints() if not c.final()))
+        bhvs_any = sorted(set(c.behavior() for c in model.behavior_constraints()))
+        waits = sorted(set(c.wait_instruction() for c in model.wait_constraints()))
+        # Goals that must hold at the end of the word
+        finals_place = set(c.state() for c in model.state_constraints() if c.final())
+        finals_port = set((c.port(), c.status()) for c in model.port_constraints() if c.final())
+        finals_bhv = set(c.behavior() for c in model.behavior_constraints() if c.final())
+
+        place_mask = {}
+        for place in transitions.keys():
+            mask = 0
+            for i, visit in enumerate(visits):
+                if place == visit:
+                    mask = mask | (1 << i)
+            for i, (port, port_status) in enumerate(ports_any):
+                if status(place, port) == port_status:
+                    mask = mask | (1 << (len(visits) + i))
+            place_mask[place] = mask
+        bhv_mask = {bhv: 0 for bhv in moves}
+        for i, bhv in enumerate(bhvs_any):
+            if bhv in bhv_mask:
+                bhv_mask[bhv] = 1 << (len(visits) + len(ports_any) + i)
+        full_mask = (1 << (len(visits) + len(ports_any) + len(bhvs_any))) - 1
+        wait_bit = {wait: 1 << i for i, wait in enumerate(waits)}
+        full_waits = (1 << len(waits)) - 1
+        track_last = len(finals_bhv) != 0
+
+        def accept(place: str, mask: int, performed: int, last: Optional[str]) -> bool:
+            return mask == full_mask and performed == full_waits \
+                   and all(place == final for final in finals_place) \
+                   and all(status(place, port) == port_status for (port, port_status) in finals_port) \
+                   and all(last == final for final in finals_bhv)
+
+        root = (iplace, 0, place_mask[iplace], 0, None)
+        best = {root: 0}
+        parents = {root: None}
+        heap = [(0, 0, 0, root)]
+        counter = 1
+        expanded = 0
+        found = None
+        while heap:
+            (cost, _, _, node) = heapq.heappop(heap)
+            if cost > best[node]:
+                continue
+            expanded = expanded + 1
+            (place, size, mask, performed, last) = node
+            if accept(place, mask, performed, last):
+                found = node
+                break
+            if size == length:
+                continue
+            for bhv in moves:
+                target = transitions[place][bhv]
+                if target == "<>":
+                    continue
+                next_performed = performed
+                if bhv in wait_bit:
+                    if performed & wait_bit[bhv]:
+                        continue
+                    next_performed = performed | wait_bit[bhv]
+                next_node = (target, size + 1, mask | place_mask[target] | bhv_mask[bhv], next_performed,
+                             bhv if track_last else None)
+                next_cost = cost + costs.get((place, bhv), mzn_max_int)
+                if next_node not in best or next_cost < best[next_node]:
+                    best[next_node] = next_cost
+                    parents[next_node] = (node, bhv)
+                    heapq.heappush(heap, (next_cost, size + 1, counter, next_node))
+                    counter = counter + 1
+        statistics = {"nodes": expanded, "time": timedelta(seconds=time.perf_counter() - start)}
+        if found is None:
+            return MiniZincResult(Status.UNSATISFIABLE, None, statistics)
+        return MiniZincResult(Status.OPTIMAL_SOLUTION, self._solution(found, parents, best[found]), statistics)
+
+    def _solution(self, node, parents, objective: int) -> dict[str, Any]:
+        model = self._model
+        skip = model.skip()
+        length = model.word_length()
+        costs = model.comp_costs()
+        word = []
+        places = [node[0]]
+        while parents[node] is not None:
+            (node, bhv) = parents[node]
+            word.insert(0, bhv)
+            places.insert(0, node[0])
+        sequence = word + [skip] * (length - len(word))
+        states = places + [places[-1]] * (length + 1 - len(places))
+        solution = {
+            "sequence": sequence,
+            "states": states,
+            "cost": [costs.get((states[i], sequence[i]), mzn_max_int) for i in range(length)],
+            "objective": objective
+        }
+        for (port, bound_places) in model.comp_ports().items():
+            solution[port + "_status"] = ["enabled" if place in bound_places else "disabled" for place in states]
+        return solution
@@ -0,0 +1,192 @@
+import hashlib
+from datetime import timedelta
+from typing import Any, Iterable, Optional, Union
+
+from minizinc import Model
+
+from ballet.planner.minizinc.mzn_app import MiniZincResult
+from ballet.planner.minizinc.mzn_portfolio import solve
+from ballet.utils.mzn_utils import mzn_cost_table, mzn_port_table
+
+
+class MiniZincTypeModel:
+    """
+    Generic MiniZinc model of a component type.
+
+    Everything that only depends on the type (places, behaviors, transitions, costs, ports) is part of the model,
+    while the initial place, the goals, the received port constraints and the waits of a given solve are data.
+    Wait instructions are all represented by a single `wait` behavior, looping on every place, and the array
+    `wait_index` tells which wait is performed at each position of the sequence.
+    """
+    _wait: str = "wait"
+    _includes = ["regular", "count"]
+
+    def __init__(self, places: list[str], behaviors: list[str], transitions: dict[str, dict[str, str]],
+                 costs: dict[tuple[str, str], int], ports: dict[str, list[str]], skip: str):
+        assert self._wait not in behaviors
+        self._places = places
+        self._behaviors = behaviors + [self._wait]
+        self._transitions = {place: {**transitions[place], self._wait: place} for place in places}
+        self._costs = {**costs, **{(place, self._wait): 0 for place in places}}
+        self._ports = ports
+        self._skip = skip
+        self._content = self._generate()
+        self._digest = hashlib.sha256(self._content.encode("utf-8")).hexdigest()
+        self._model = None
+
+    def _generate(self) -> str:
+        includes = '\n'.join(map(lambda lib: f"include \"{lib}.mzn\";", self._includes))
+        return '\n'.join([includes, self.status(), self.type_section(), self.instance_section(), "solve minimize sum(cost);"])
+
+    @staticmethod
+    def status() -> str:
+        return "enum STATUS = {enabled, disabled};"
+
+    def type_section(self) -> str:
+        # Declarations of the type: they do not depend on the instance
+        enums = '\n'.join(["enum STATE = {" + ', '.join(self._places) + "};",
+                           "enum BEHAVIOR = {" + ', '.join(self._behaviors) + "};"])
+        lines = ["|" + ",".join([self._transitions[state][bhv] for bhv in self._behaviors]) for state in self._places]
+        transitions = f"array[STATE, BEHAVIOR] of opt STATE: transitions = \n[" + "\n".join(lines) + "|];"
+        ports = mzn_port_table({port: places for (port, places) in self._ports.items()}, self._places)
+        costs = mzn_cost_table(self._places, self._behaviors, self._costs)
+        return '\n'.join([enums, transitions, ports, costs])
+
+    def instance_section(self) -> str:
+        # Parameters and variables of an instance, whose objective is sum(cost)
+        parameters = '\n'.join(["int: word_length;",
+                                "STATE: init_state;",
+                                "set of STATE: goal_visit;",
+                                "set of STATE: goal_final_state;",
+                                "set of BEHAVIOR: goal_behaviors;",
+                                "set of BEHAVIOR: goal_final_behaviors;",
+                                "int: n_waits;",
+                                "array[1..n_waits] of set of STATE: wait_places;"] +
+                               [f"set of STATUS: {port}_goal;\nset of STATUS: {port}_goal_final;" for port in self._ports])
+        word = f"""array[1..word_length] of var BEHAVIOR: sequence;
+array[1..word_length] of var 0..n_waits: wait_index;
+array[1..word_length+1] of var STATE: states;
+constraint states[1] = init_state;
+constraint forall (i in 1..word_length) (states[i + 1] = transitions[states[i], sequence[i]]);
+constraint regular(sequence, transitions, init_state, STATE);
+constraint forall (i in 1..word_length - 1) (sequence[i] = {self._skip} -> sequence[i+1] = {self._skip});"""
+        ports = []
+        for port in self._ports:
+            ports.append(f"""array[1..word_length+1] of var STATUS: {port}_status;
+constraint forall (i in 1..word_length+1) ({port}_status[i] = enabled <-> port_bound[{port}, states[i]]);
+constraint forall (s in {port}_goal) (exists (i in 1..word_length+1) ({port}_status[i] = s));
+constraint forall (s in {port}_goal_final) ({port}_status[word_length+1] = s);""")
+        goals = f"""constraint forall (i in 1..word_length) (sequence[i] = {self._wait} <-> wait_index[i] > 0);
+constraint forall (i in 1..word_length, w in 1..n_waits) (wait_index[i] = w -> states[i] in wait_places[w]);
+constraint forall (w in 1..n_waits) (count (v in wait_index) (v = w) = 1);
+constraint forall (s in goal_visit) (exists (i in 1..word_length+1) (states[i] = s));
+constraint forall (s in goal_final_state) (states[word_length+1] = s);
+constraint forall (b in goal_behaviors) (exists (i in 1..word_length) (sequence[i] = b));
+constraint forall (b in goal_final_behaviors) ((exists (i in 1..word_length-1) (sequence[i] = b /\\ sequence[i+1] = {self._skip})) \\/ (sequence[word_length] = b));"""
+        cost = """array[1..word_length] of var int: cost;
+constraint forall (i in 1..word_length) (cost[i] = transition_cost[states[i], sequence[i]]);"""
+        return '\n'.join([parameters, word, '\n'.join(ports), goals, cost])
+
+    def type_names(self) -> list[str]:
+        # Identifiers declared by type_section (enum constants included)
+        names = ["STATE", "BEHAVIOR", "transitions", "transition_cost"] + self._places + self._behaviors
+        if len(self._ports) != 0:
+            names = names + ["PORT", "port_bound"] + list(self._ports.keys())
+        return names
+
+    def instance_names(self) -> list[str]:
+        # Identifiers declared by instance_section
+        return ["word_length", "init_state", "goal_visit", "goal_final_state", "goal_behaviors",
+                "goal_final_behaviors", "n_waits", "wait_places", "sequence", "wait_index", "states", "cost"] + \
+            [f"{port}_{suffix}" for port in self._ports for suffix in ["goal", "goal_final", "status"]]
+
+    def ports(self) -> list[str]:
+        return list(self._ports.keys())
+
+    def content(self) -> str:
+        return self._content
+
+    def digest(self) -> str:
+        return self._digest
+
+    def model(self) -> Model:
+        # Parsed (and its interface analysed by MiniZinc) once, then shared by all the instances of the type
+        if self._model is None:
+            self._model = Model()
+            self._model.add_string(self._content)
+        return self._model
+
+    @staticmethod
+    def _set(values) -> str:
+        return "{" + ', '.join(sorted(values)) + "}"
+
+    def waits(self, regular) -> list:
+        return sorted(regular.wait_constraints(), key=lambda c: c.wait_instruction())
+
+    def data(self, regular) -> str:
+        states = regular.state_constraints()
+        behaviors = regular.behavior_constraints()
+        ports = regular.port_constraints()
+        waits = self.waits(regular)
+        lines = [f"word_length = {regular.word_length()};",
+                 f"init_state = {regular.initial_place()};",
+                 f"goal_visit = {self._set(c.state() for c in states)};",
+                 f"goal_final_state = {self._set(c.state() for c in states if c.final())};",
+                 f"goal_behaviors = {self._set(c.behavior() for c in behaviors)};",
+                 f"goal_final_behaviors = {self._set(c.behavior() for c in behaviors if c.final())};",
+                 f"n_waits = {len(waits)};",
+                 "wait_places = [" + ', '.join(self._set(regular.wait_places(c)) for c in waits) + "];"]
+        for port in self._ports:
+            lines.append(f"{port}_goal = {self._set(c.status() for c in ports if c.port() == port and not c.final())};")
+            lines.append(f"{port}_goal_final = {self._set(c.status() for c in ports if c.port() == port and c.final())};")
+        return '\n'.join(lines)
+
+    def decode(self, regular, result) -> MiniZincResult:
+        # Replace the generic wait behavior by the wait instruction it stands for
+        if result.solution is None:
+            return MiniZincResult(result.status, None, result.statistics)
+        waits = self.waits(regular)
+        wait_index = result["wait_index"]
+        sequence = [str(bhv) if str(bhv) != self._wait else waits[wait_index[i] - 1].wait_instruction()
+                    for i, bhv in enumerate(result["sequence"])]
+        solution: dict[str, Any] = {
+            "sequence": sequence,
+            "states": [str(state) for state in result["states"]],
+            "cost": list(result["cost"]),
+            "objective": result.objective
+        }
+        for port in self._ports:
+            solution[port + "_status"] = [str(status) for status in result[port + "_status"]]
+        return MiniZincResult(result.status, solution, result.statistics)
+
+
+_type_models: dict[tuple, MiniZincTypeModel] = {}
+
+
+def type_model(regular) -> MiniZincTypeModel:
+    key = regular.type_key()
+    if key not in _type_models:
+        places, behaviors, transitions, costs = regular.type_matrix()
+        _type_models[key] = MiniZincTypeModel(places, behaviors, transitions, costs, regular.comp_ports(),
+                                              regular.skip())
+    return _type_models[key]
+
+
+class MiniZincParametricApp:
+    """
+    Solves a MiniZincModelComponent as the generic model of its type plus the data of this model
+    """
+
+    def __init__(self, regular) -> None:
+        self._regular = regular
+        self._type_model = type_model(regular)
+        self._result = None
+
+    def run(self, solver: Union[str, Iterable[str]] = "gecode", timeout: Optional[timedelta] = None):
+        result = solve(self._type_model.model(), solver, timeout, data=self._type_model.data(self._regular),
+                       label=self._regular.component().type().name())
+        self._result = self._type_model.decode(self._regular, result)
+        return self
+
+    def result(self) -> MiniZincResult:
+        return self._result
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Iterable, Optional, Union
+
+from minizinc import Instance, Model, Solver, Status
+
+# Statuses for which a solver has nothing left to find: no other solver of the portfolio can do better
+_proven = [Status.OPTIMAL_SOLUTION, Status.UNSATISFIABLE, Status.ALL_SOLUTIONS]
+
+
+class SolverStatistics:
+    """
+    Wall-clock times of the solves, per component type and solver, used to choose the fastest backend of a type.
+    A solver wins a portfolio solve when its answer is the one kept.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, dict[str, dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, label: str, solver: str, seconds: float, status: Optional[Status], won: bool = True):
+        with self._lock:
+            entry = self._entries.setdefault(label, {}).setdefault(solver, {
+                "solves": 0, "time": 0.0, "wins": 0, "timeouts": 0, "failures": 0
+            })
+            entry["solves"] = entry["solves"] + 1
+            entry["time"] = entry["time"] + seconds
+            if won:
+                entry["wins"] = entry["wins"] + 1
+            if status is None:
+                entry["failures"] = entry["failures"] + 1
+            elif status not in _proven:
+                entry["timeouts"] = entry["timeouts"] + 1
+
+    def summary(self) -> dict[str, dict[str, dict[str, Any]]]:
+        # summary[label][solver] -> {solves, time, mean, wins, timeouts, failures}
+        with self._lock:
+            return {label: {solver: {**entry, "mean": entry["time"] / entry["solves"]}
+                            for (solver, entry) in solvers.items()}
+                    for (label, solvers) in self._entries.items()}
+
+    def fastest(self, label: str) -> Optional[str]:
+        # Fastest solver among the ones that never failed nor timed out on this label
+        candidates = [(entry["mean"], solver) for (solver, entry) in self.summary().get(label, {}).items()
+                      if entry["failures"] == 0 and entry["timeouts"] == 0]
+        return min(candidates)[1] if candidates else None
+
+    def write(self, filename: str):
+        with open(filename, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+default_statistics = SolverStatistics()
+
+
+def solver_names(solver: Union[str, Iterable[str]]) -> list[str]:
+    return [solver] if isinstance(solver, str) else list(solver)
+
+
+def solver_key(solver: Union[str, Iterable[str]]) -> str:
+    return ','.join(solver_names(solver))
+
+
+def _better(result, best) -> bool:
+    # A proven answer beats any other, then a solution beats no solution, then the lowest objective wins
+    if best is None:
+        return True
+    if result.status in _proven or best.status in _proven:
+        return best.status not in _proven
+    if not result.status.has_solution() or not best.status.has_solution():
+        return not best.status.has_solution() and result.status.has_solution()
+    return result.objective < best.objective
+
+
+async def _timed(solver: str, instance: Instance, timeout: Optional[timedelta]):
+    start = time.perf_counter()
+    try:
+        result = await instance.solve_async(time_limit=timeout)
+    except Exception as e:
+        print(f"[MiniZinc] {solver} failed: {e}")
+        result = None
+    return solver, result, time.perf_counter() - start
+
+
+async def _race(instances: dict[str, Instance], timeout: Optional[timedelta], label: str,
+                statistics: SolverStatistics):
+    tasks = [asyncio.create_task(_timed(solver, instance, timeout)) for (solver, instance) in instances.items()]
+    pending = set(tasks)
+    answers = []
+    best = None
+    while pending and (best is None or best[1].status not in _proven):
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in sorted(done, key=tasks.index):
+            (solver, result, seconds) = task.result()
+            answers.append((solver, result, seconds))
+            if result is not None and _better(result, None if best is None else best[1]):
+                best = (solver, result)
+    # The first proven answer wins, the solvers still running are stopped
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    for (solver, result, seconds) in answers:
+        statistics.record(label, solver, seconds, None if result is None else result.status,
+                          won=best is not None and solver == best[0])
+    if best is None:
+        raise RuntimeError(f"No solver of the portfolio {list(instances.keys())} could solve {label}")
+    return best[1]
+
+
+def solve(model: Model, solver: Union[str, Iterable[str]] = "gecode", timeout: Optional[timedelta] = None,
+          data: Optional[str] = None, label: str = "", statistics: SolverStatistics = default_statistics):
+    """
+    Solves a model with one solver, or races several solvers (a portfolio) and keeps the first proven answer.
+    With a timeout, a solver stops and returns the best solution it found so far (status SATISFIED), or UNKNOWN.
+    """
+    names = solver_names(solver)
+    instances = {}
+    for name in names:
+        try:
+            backend = Solver.lookup(name)
+        except LookupError:
+            # A portfolio races the solvers that are installed
+            if len(names) == 1:
+                raise
+            print(f"[MiniZinc] {name} is not installed, it is not part of the portfolio")
+            continue
+        instance = Instance(backend, model)
+        if data is not None:
+            instance.add_string(data)
+        instances[name] = instance
+    if len(instances) == 1:
+        (name, instance), = instances.items()
+        start = time.perf_counter()
+        result = instance.solve(time_limit=timeout)
+        statistics.record(label, name, time.perf_counter() - start, result.status)
+        return result
+    return asyncio.run(_race(instances, timeout, label, statistics))
@@ -1,11 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from datetime import timedelta
+from typing import Iterable, Optional, Union
 
 from ballet.assembly.simplified.assembly import CInstance
-from ballet.planner.automata import matrix_from_component
+from ballet.planner.automata import shared_matrix_from_component, shared_distances_from_component, type_signature
 from ballet.planner.minizinc.mzn_app import MiniZincApp
-from ballet.utils.list_utils import add_if_no_exist, intersection, difference, map_index
-from ballet.utils.mzn_utils import add_mzn_ext, mzn_max_int
+from ballet.planner.minizinc.mzn_native import NativeRegularSolver, native_solver
+from ballet.planner.minizinc.mzn_parametric import MiniZincParametricApp, type_model
+from ballet.utils.list_utils import add_if_no_exist, intersection, difference
+from ballet.utils.mzn_utils import add_mzn_ext, mzn_cost_table, mzn_port_table
 
 
 class MiniZincRegularConstraint(ABC):
@@ -183,7 +186,11 @@ class MiniZincModelComponent:
         self._filename = ""
         self._component = comp
         self._ports = {}
-        self._places, self._behaviors, self._matrix_transitions, self._costs = matrix_from_component(comp, self._skip)
+        # The matrix is shared by all the instances of the type, until a wait constraint modifies it
+        self._type_key = (type_signature(comp.type()), self._skip)
+        self._places, self._behaviors, self._matrix_transitions, self._costs = \
+            shared_matrix_from_component(comp, self._skip, self._type_key[0])
+        self._shared_matrix = True
         if word_length is None:
             self._word_length = len(self._behaviors) * len(self._places)
         else:
@@ -207,6 +214,104 @@ class MiniZincModelComponent:
     def constraints(self):
         return self._wait_constraints | self._port_constraints | self._state_constraints | self._behavior_constraints
 
+    def wait_constraints(self) -> set[MiniZincWaitRegularConstraint]:
+        return self._wait_constraints
+
+    def port_constraints(self) -> set[MiniZincPortRegularConstraint]:
+        return self._port_constraints
+
+    def state_constraints(self) -> set[MiniZincStateRegularConstraint]:
+        return self._state_constraints
+
+    def behavior_constraints(self) -> set[MiniZincBehaviorRegularConstraint]:
+        return self._behavior_constraints
+
+    def component(self) -> CInstance:
+        return self._component
+
+    def type_key(self) -> tuple:
+        return self._type_key
+
+    def type_matrix(self) -> tuple[list[str], list[str], dict[str, dict[str, str]], dict[tuple[str, str], int]]:
+        # The matrix of the component type, i.e., without the wait behaviors of this model
+        return shared_matrix_from_component(self._component, self._skip, self._type_key[0])
+
+    def signature(self) -> str:
+        # Canonical description of the model, cheaper to build than its content: the type-level model and the data.
+        # The data only gives the places of each wait, while the cached sequence names the wait instructions: they
+        # are part of the signature, in the order of wait_index.
+        model = type_model(self)
+        waits = [f"{c.wait_instruction()}({c.port()},{c.status()})" for c in model.waits(self)]
+        return model.digest() + "\n" + model.data(self) + "\nwaits = [" + ', '.join(waits) + "];"
+
+    def initial_place(self) -> str:
+        return self._iplace
+
+    def word_length(self) -> int:
+        return self._word_length
+
+    def set_word_length(self, word_length: int):
+        self._word_length = word_length
+
+    def max_word_length(self) -> int:
+        return len(self._behaviors) * len(self._places) + len(self._wait_constraints)
+
+    def estimated_word_length(self) -> int:
+        """
+        Length of a word reaching the goals of the model, greedily going to the closest goal still to fulfill using
+        the shortest-path distances of the reduced automaton (plus one position per wait). It is a guess, not a
+        bound: a model can be unsatisfiable with this length, and the search is then deepened.
+        """
+        distances = shared_distances_from_component(self._component, self._skip, self._type_key[0])
+        (_, _, transitions, costs) = self.type_matrix()
+
+        def port_places(port: str, status: str) -> list[str]:
+            if status == MiniZincPortRegularConstraint.enabled:
+                return self._ports[port]
+            return difference(self._places, self._ports[port])
+
+        def bhv_moves(bhv: str) -> list[tuple[str, str]]:
+            # Self-loops and moves without a cost are no-ops of the reduced automaton, priced mzn_max_int
+            return [(place, transitions[place][bhv]) for place in self._places
+                    if transitions[place].get(bhv, "<>") not in ["<>", place] and (place, bhv) in costs]
+
+        def closest(place: str, targets: list[tuple[str, str, int]]) -> Optional[tuple[int, str]]:
+            # targets are (source, destination, length) moves, the closest one from place is performed
+            reachable = [(distances[place][src] + length, dst) for (src, dst, length) in targets
+                         if src in distances[place]]
+            return min(reachable) if reachable else None
+
+        goals = [[(c.state(), c.state(), 0)] for c in self._state_constraints]
+        goals += [[(place, place, 0) for place in port_places(c.port(), c.status())]
+                  for c in self._port_constraints if not c.final()]
+        goals += [[(src, dst, 1) for (src, dst) in bhv_moves(c.behavior())]
+                  for c in self._behavior_constraints if not c.final()]
+        finals = [[(c.state(), c.state(), 0)] for c in self._state_constraints if c.final()]
+        finals += [[(place, place, 0) for place in port_places(c.port(), c.status())]
+                   for c in self._port_constraints if c.final()]
+        finals += [[(src, dst, 1) for (src, dst) in bhv_moves(c.behavior())]
+                   for c in self._behavior_constraints if c.final()]
+
+        length = len(self._wait_constraints)
+        place = self._iplace
+        if place not in distances:
+            # Not a place of the reduced automaton (e.g., an intermediate place of a snapshot): no guess
+            return self.max_word_length()
+        for targets in [goals, finals]:
+            targets = targets.copy()
+            while targets:
+                steps = [(closest(place, goal), i) for (i, goal) in enumerate(targets)]
+                steps = [(step, i) for (step, i) in steps if step is not None]
+                if not steps:
+                    return self.max_word_length()
+                ((distance, place), i) = min(steps)
+                length = length + distance
+                targets.pop(i)
+        return min(max(length, 1), self.max_word_length())
+
+    def skip(self) -> str:
+        return self._skip
+
     def comp_places(self) -> list[str]:
         return self._places
 
@@ -225,6 +330,12 @@ class MiniZincModelComponent:
     def comp_transitions(self) -> dict[str, dict[str, str]]:
         return self._matrix_transitions
 
+    def comp_costs(self) -> dict[tuple[str, str], int]:
+        return self._costs
+
+    def comp_ports(self) -> dict[str, list[str]]:
+        return self._ports
+
     def transitions(self) -> str:
         lines = ["|" + ",".join([self._matrix_transitions[state][bhv] for bhv in self._behaviors])
                  for state in self._matrix_transitions.keys()]
@@ -235,12 +346,11 @@ class MiniZincModelComponent:
 
     def word_states_ports(self) -> str:
         # Build Minizinc constraint for tracking ports
-        list_ports_status = []
+        list_ports_status = [mzn_port_table(self._ports, self._places)]
         for port in self._ports.keys():
             port_status_name = port + "_status"
-            conditional = ' \/ '.join(map(lambda place: f" states[i] = {place}", self._ports[port]))
             port_status = f"""array[1..{self._word_length}+1] of var STATUS : {port_status_name};
-constraint forall (i in 1..{self._word_length}+1) ({port_status_name}[i] = {MiniZincPortRegularConstraint.enabled} <-> {conditional});"""
+constraint forall (i in 1..{self._word_length}+1) ({port_status_name}[i] = {MiniZincPortRegularConstraint.enabled} <-> port_bound[{port}, states[i]]);"""
             list_ports_status.append(port_status)
         # Produce Minizinc content
         sequence = f"array[1..{self._word_length}] of var BEHAVIOR: sequence;"
@@ -261,17 +371,10 @@ constraint forall (i in 1..{self._word_length}+1) ({port_status_name}[i] = {Mini
         return '\n'.join([init, reg, suff])
 
     def trace_cost(self):
-        cond = '\n'.join(map_index(lambda key, i: ("if " if i == 0 else "elseif ") +
-                                                  f"state = {key[0]} /\\ behavior = {key[1]} then\n{self._costs[key]}",
-                                   list(self._costs.keys())))
         return f"""
+{mzn_cost_table(self._places, self._behaviors, self._costs)}
 array[1..{self._word_length}] of var int: cost;
-constraint forall (i in 1..{self._word_length}) (cost[i] = fcost(states[i], sequence[i]));
-function var int: fcost(var STATE: state, var BEHAVIOR: behavior) =
-{cond}
-else 
-{mzn_max_int}
-endif;
+constraint forall (i in 1..{self._word_length}) (cost[i] = transition_cost[states[i], sequence[i]]);
 """
 
     def solve(self) -> str:
@@ -291,19 +394,30 @@ endif;
         for constraint in constraints:
             self.add_constraint(constraint)
 
-    def add_wait_constraint(self, constraint: MiniZincWaitRegularConstraint):
-        self._wait_constraints.add(constraint)
+    def _own_matrix(self):
+        if self._shared_matrix:
+            self._behaviors = self._behaviors.copy()
+            self._matrix_transitions = {place: row.copy() for (place, row) in self._matrix_transitions.items()}
+            self._costs = self._costs.copy()
+            self._shared_matrix = False
+
+    def wait_places(self, constraint: MiniZincWaitRegularConstraint) -> list[str]:
         # Find all places that verify port+status
         if constraint.isDisabled():
             pl_comp_port = list(
                 map(lambda pl: pl.name(), self._component.type().get_port(constraint.port()).bound_places())
             )
-            places = difference(self._places, intersection(self._places, pl_comp_port))
+            return difference(self._places, intersection(self._places, pl_comp_port))
         else:
             pl_comp_port = list(
                 map(lambda pl: pl.name(), self._component.type().get_port(constraint.port()).bound_places())
             )
-            places = intersection(self._places, pl_comp_port)
+            return intersection(self._places, pl_comp_port)
+
+    def add_wait_constraint(self, constraint: MiniZincWaitRegularConstraint):
+        self._wait_constraints.add(constraint)
+        self._own_matrix()
+        places = self.wait_places(constraint)
         for place in self._places:
             self._costs[(place, constraint.wait_instruction())] = 0
             if place in places:
@@ -360,17 +474,19 @@ endif;
             res = res + "\n" + fin_constraint
         return res
 
+    # Goals are sorted so that the generated content does not depend on the iteration order of the constraint sets,
+    # which makes it usable as a cache key
     def _wait_goals(self) -> str:
-        return '\n'.join(map(lambda constraint: self._wait_goal(constraint), self._wait_constraints))
+        return '\n'.join(sorted(map(lambda constraint: self._wait_goal(constraint), self._wait_constraints)))
 
     def _state_goals(self) -> str:
-        return '\n'.join(map(lambda constraint: self._state_goal(constraint), self._state_constraints))
+        return '\n'.join(sorted(map(lambda constraint: self._state_goal(constraint), self._state_constraints)))
 
     def _port_goals(self) -> str:
-        return '\n'.join(map(lambda constraint: self._port_goal(constraint), self._port_constraints))
+        return '\n'.join(sorted(map(lambda constraint: self._port_goal(constraint), self._port_constraints)))
 
     def _behavior_goals(self) -> str:
-        return '\n'.join(map(lambda constraint: self._behavior_goal(constraint), self._behavior_constraints))
+        return '\n'.join(sorted(map(lambda constraint: self._behavior_goal(constraint), self._behavior_constraints)))
 
     def goals(self):
         gwait = self._wait_goals()
@@ -393,6 +509,9 @@ endif;
             f.write(mzn_content)
             f.close()
 
-    def run(self, solver: str = "gecode"):
-        assert self._written
-        return MiniZincApp(self._filename).run(solver)
\ No newline at end of file
+    def run(self, solver: Union[str, Iterable[str]] = "gecode", timeout: Optional[timedelta] = None):
+        if solver == native_solver:
+            return NativeRegularSolver(self).run()
+        if self._written:
+            return MiniZincApp(filename=self._filename, label=self._component.type().name()).run(solver, timeout)
+        return MiniZincParametricApp(self).run(solver, timeout)
\ No newline at end of file
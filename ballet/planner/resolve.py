@@ -1,10 +1,15 @@
 from ballet.assembly.plan.plan import Instruction, Disconnect, Add, Delete, Connect
 from ballet.assembly.simplified.assembly import CInstance, Place
 from ballet.planner.communication.constraint_message import PortConstraintMessage, ConstraintMessage, Messaging
-from ballet.planner.component_plan_node import ComponentNode
+from ballet.planner.component_plan_node import ComponentNode, batch_bhv_inference, batch_local_plan
+from ballet.planner.makespan import MakespanOptimizer
+from ballet.planner.minizinc.mzn_cache import MiniZincResultCache, default_cache
 from ballet.planner.goal import ReconfigurationGoal, PortConstraint, Goal
-from ballet.utils.list_utils import findAll, difference
-from typing import Set, Iterable
+from ballet.utils.list_utils import findAll
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from datetime import timedelta
+from typing import Set, Iterable, Optional, Union
 import string
 
 
@@ -53,8 +58,25 @@ def infer_in_constraint(comp: CInstance, source: str, constraint: ConstraintMess
                               const.behavior(), const.status(), wait)
 
 
-def delta_msg(out_messages, prev_msgs):
-    return difference(out_messages, prev_msgs)
+def delta_msg(out_messages: Set[tuple[str, PortConstraintMessage]],
+              prev_msgs: dict[tuple[str, str], Set[tuple[str, PortConstraintMessage]]]) \
+        -> Set[tuple[str, PortConstraintMessage]]:
+    # Messages are coalesced per (target, port): the receiver only keeps the messages of the latest round of each
+    # (source, port), so the messages of a pair are all sent again when they change, and not at all otherwise.
+    # prev_msgs[(target, port)] is updated with the messages last sent to the pair. A pair without messages anymore
+    # is sent a retraction, so that the receiver drops the constraints it kept for it.
+    groups: dict[tuple[str, str], Set[tuple[str, PortConstraintMessage]]] = {}
+    for (target, msg) in out_messages:
+        groups.setdefault((target, msg.port()), set()).add((target, msg))
+    delta = set()
+    for (key, group) in groups.items():
+        if prev_msgs.get(key) != group:
+            prev_msgs[key] = group
+            delta = delta | group
+    for key in [key for key in prev_msgs if key not in groups]:
+        (target, msg) = next(iter(prev_msgs.pop(key)))
+        delta.add((target, PortConstraintMessage(msg.source(), msg.port(), PortConstraintMessage.retracted)))
+    return delta
 
 
 def allGlobalAcked(goals: dict[string, Set[ReconfigurationGoal]], acks: Iterable[str]):
@@ -64,60 +86,132 @@ def allGlobalAcked(goals: dict[string, Set[ReconfigurationGoal]], acks: Iterable
     return True
 
 
+def _must_ack(node: ComponentNode) -> bool:
+    return len(node.must_send_acks()) != 0 and len(node.waiting_acks()) == 0
+
+
+def _bhv_inference(node: ComponentNode):
+    return node.bhv_inference()
+
+
+def _local_plan(node: ComponentNode):
+    return node.local_plan()
+
+
+def _in_process(function, node: ComponentNode):
+    # The node is a copy with its own cache, see ComponentNode.__getstate__
+    result = function(node)
+    return result, node.cache().entries() if node.cache() is not None else []
+
+
+def _map(executor: Optional[Executor], function, nodes: list[ComponentNode]) -> list:
+    # Results are gathered in the order of the nodes, whatever the order in which the solves end
+    if executor is None or len(nodes) <= 1:
+        return list(map(function, nodes))
+    if not isinstance(executor, ProcessPoolExecutor):
+        return list(executor.map(function, nodes))
+    # The results solved in the worker processes are merged back into the caches of the nodes
+    results = []
+    for (node, (result, entries)) in zip(nodes, executor.map(partial(_in_process, function), nodes)):
+        if node.cache() is not None:
+            node.cache().merge(entries)
+        results.append(result)
+    return results
+
+
+def _has_goal(goals: dict[string, Set[ReconfigurationGoal]], comp: CInstance) -> bool:
+    return comp.id() in goals.keys() and len(goals[comp.id()]) != 0
+
+
+def _receive(comp: CInstance, node: ComponentNode, messaging: Messaging, force: bool, new_round: bool = True) -> bool:
+    # Reads the messages and acks of the node, and adds the constraints of its messages. Returns whether the node
+    # has to infer its behaviors: it received messages, or force (e.g., it holds a goal on the first sweep).
+    # Without new_round, the messages are added to the current round of the node.
+    rcv_messages: Set[(str, int, ConstraintMessage)] = messaging.get_messages(comp)
+    rcv_acks: Set[str] = messaging.get_acks(comp)
+    node.rm_waiting_acks(rcv_acks)
+    if len(rcv_messages) == 0 and not force:
+        return False
+    if new_round:
+        node.inc_round()
+    # -----------------------
+    #  Infer constraints from messages
+    # -----------------------
+    for (source, msg_round, msg) in rcv_messages:
+        constraint: PortConstraint = infer_in_constraint(comp, source, msg)
+        node.add_must_send_ack(source)
+        node.addInstructionContent(constraint, source=source, round=msg_round)
+    return True
+
+
 def resolve(components: Iterable[CInstance], active: dict[CInstance, Place], goals: dict[string, Set[ReconfigurationGoal]],
-            goals_states: dict[CInstance, Set[ReconfigurationGoal]], messaging: Messaging):
+            goals_states: dict[CInstance, Set[ReconfigurationGoal]], messaging: Messaging,
+            cache: MiniZincResultCache = default_cache, solver: Union[str, Iterable[str]] = "gecode", dump: bool = False,
+            word_length: Optional[int] = None, executor: Optional[Executor] = None, timeout: Optional[timedelta] = None,
+            batch: bool = False, wait_timeout: float = 1.0, makespan: Optional[MakespanOptimizer] = None):
 
     # --------------------------------
     #  SETUP
     # --------------------------------
-    nodes = {comp: ComponentNode(comp, active[comp]) for comp in components}
+    nodes = {comp: ComponentNode(comp, active[comp], word_length, cache=cache, solver=solver, dump=dump,
+                                 timeout=timeout) for comp in components}
     compsIds = {comp.id(): comp for comp in components}
     plans = {comp: None for comp in components}
-    prev_sent_msgs = {comp: [] for comp in components}
+    prev_sent_msgs = {comp: {} for comp in components}
     for compId in goals.keys():
         if compId in compsIds.keys():
             nodes[compsIds[compId]].addInstructionContents(goals[compId])
     for comp in goals_states.keys():
         nodes[comp].addInstructionContents(goals_states[comp])
+    messaging.set_roots({compId for compId in goals.keys() if len(goals[compId]) != 0})
     first = True
     # --------------------------------
     #  ITERATIVE PROCESS
     # --------------------------------
+    dirty = None
     while first or not allGlobalAcked(goals, messaging.get_global_acks()):
-        for comp in nodes.keys():
-            out_messages = set()
+        # After the first sweep, the planner sleeps until something is delivered, then only wakes up the nodes
+        # that received messages or acks, and the ones that still have acks to send
+        if not first:
+            dirty = messaging.wait_deliveries(wait_timeout)
+        awake = [comp for comp in nodes.keys() if dirty is None or comp.id() in dirty or _must_ack(nodes[comp])]
+        # Each node reads its messages, infers its behaviors and sends its messages before the next one reads its
+        # messages. With an executor, the inferences of the awake nodes are first solved concurrently (or in a single
+        # MiniZinc call, in batch mode) from the messages delivered before the sweep; the nodes are then processed
+        # in order as without executor, a node receiving messages from a node before it being inferred again, so
+        # that the plans do not depend on the executor.
+        inferences = {}
+        if executor is not None or batch:
+            ready = [comp for comp in awake if _receive(comp, nodes[comp], messaging, first and _has_goal(goals, comp))]
+            if batch and len(ready) > 1:
+                inferences = dict(zip(ready, batch_bhv_inference([nodes[comp] for comp in ready])))
+            else:
+                inferences = dict(zip(ready, _map(executor, _bhv_inference, [nodes[comp] for comp in ready])))
+        for comp in awake:
             compId = comp.id()
             node: ComponentNode = nodes[comp]
             # -----------------------
-            #  Get input messages
+            #  Get input messages (the ones sent earlier in the sweep, with an executor)
             # -----------------------
-            rcv_messages: Set[(str, int, ConstraintMessage)] = messaging.get_messages(comp)
-            rcv_acks: Set[str] = messaging.get_acks(comp)
-            node.rm_waiting_acks(rcv_acks)
+            received = _receive(comp, node, messaging, first and _has_goal(goals, comp) and comp not in inferences,
+                                new_round=comp not in inferences)
             if len(node.waiting_acks()) != 0 or len(node.must_send_acks()) != 0:
                 print(f"{compId} waiting acks: {node.waiting_acks()}, must send acks to {node.must_send_acks()}")
 
-            if len(rcv_messages) != 0 or (first and compId in goals.keys() and len(goals[compId]) != 0):
-                node.inc_round()
-
-                # -----------------------
-                #  Infer constraints from messages
-                # -----------------------
-                for (source, msg_round, msg) in rcv_messages:
-                    constraint: PortConstraint = infer_in_constraint(comp, source, msg)
-                    node.add_must_send_ack(source)
-                    node.addInstructionContent(constraint, source=source, round=msg_round)
+            # -----------------------
+            #  Local inference of behaviors
+            # -----------------------
+            if received:
+                inferences[comp] = node.bhv_inference()
 
-                # -----------------------
-                #  Local inference of behaviors
-                # -----------------------
-                sequence, affected_ports = node.bhv_inference()
+            out_messages = set()
+            if comp in inferences:
+                sequence, affected_ports = inferences[comp]
 
                 # -----------------------
                 #  Local inference of out messages
                 # -----------------------
                 out_messages = delta_msg(infer_out_messages(comp, affected_ports), prev_sent_msgs[comp])
-                prev_sent_msgs[comp] = prev_sent_msgs[comp] + out_messages
                 # -----------------------
                 #  Send out messages
                 # -----------------------
@@ -132,10 +226,17 @@ def resolve(components: Iterable[CInstance], active: dict[CInstance, Place], goa
             if (compId in goals.keys() and len(goals[compId]) != 0) and len(node.waiting_acks()) == 0 and len(node.must_send_acks()) == 0 :
                 messaging.bcast_root_acks(comp)
 
+        # Messages buffered during the sweep (e.g., grouped by remote planner) are sent
+        messaging.flush()
         first = False
 
-    for comp in nodes:
-        plans[comp] = nodes[comp].local_plan()
+    final_plans = batch_local_plan(list(nodes.values())) if batch and len(nodes) > 1 \
+        else _map(executor, _local_plan, list(nodes.values()))
+    for comp, plan in zip(nodes.keys(), final_plans):
+        plans[comp] = plan
+    # Optional second phase: the local plans are combined to minimize the expected makespan, see makespan.report()
+    if makespan is not None:
+        plans = makespan.optimize(plans, active, {comp: nodes[comp].wait_places() for comp in nodes})
 
     return plans
 
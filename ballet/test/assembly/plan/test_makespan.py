@@ -0,0 +1,40 @@
+import unittest
+
+from ballet.assembly.plan.makespan import behavior_duration, estimate_makespan
+from ballet.assembly.plan.plan import Plan, PushB, Wait, merge_plans_dag
+from ballet.assembly.simplified.type.openstack import mariadb_master_type, keystone_type
+
+
+class TestMakespan(unittest.TestCase):
+
+    def test_behavior_duration(self):
+        t = mariadb_master_type()
+        # configure0 and configure1 are fired together: the slowest one counts
+        self.assertEqual(behavior_duration(t, "deploy", t.initial_place()), (5 + 26 + 13 + 3 + 13, t.running_place()))
+        self.assertEqual(behavior_duration(t, "deploy"), (5 + 26 + 13 + 3 + 13, t.running_place()))
+        self.assertEqual(behavior_duration(t, "update", t.get_place("interrupted")), (2, t.get_place("configured")))
+        # No transition of the behavior from the place
+        self.assertEqual(behavior_duration(t, "update", t.running_place()), (0, t.running_place()))
+
+    def test_critical_path(self):
+        mariadb = mariadb_master_type()
+        keystone = keystone_type()
+        pl1 = [PushB("mariadb", "interrupt"), PushB("mariadb", "update"), PushB("mariadb", "deploy")]
+        pl2 = [PushB("keystone", "uninstall"), Wait("mariadb", "deploy"), PushB("keystone", "deploy")]
+        dag = merge_plans_dag([Plan("mariadb", pl1), Plan("keystone", pl2)])
+        schedule = estimate_makespan(dag, {"mariadb": mariadb, "keystone": keystone},
+                                     {"mariadb": mariadb.running_place(), "keystone": keystone.running_place()})
+        # The deploy of mariadb starts from configured, once interrupt and update are done
+        self.assertEqual(schedule.end(PushB("mariadb", "deploy")), 1 + 2 + 55)
+        self.assertEqual(schedule.end(PushB("keystone", "uninstall")), 1)
+        self.assertEqual(schedule.start(PushB("keystone", "deploy")), 58)
+        self.assertEqual(schedule.makespan(), 60)
+        self.assertEqual(schedule.critical_path(), pl1 + pl2[1:])
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            estimate_makespan(Plan("plan", [PushB("mariadb", "deploy")]), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 
-from ballet.assembly.plan.plan import Plan, Wait, PushB, merge_plans
+from ballet.assembly.plan.plan import Plan, Wait, PushB, Add, Connect, Disconnect, Delete, merge_plans, \
+    merge_plans_dag
+from ballet.benchmark.bench_merge_plans import synthetic_plans
 from ballet.utils import list_utils
 
 
@@ -27,6 +29,75 @@ class TestPlan(unittest.TestCase):
                     wait: Wait = instr
                     assert idx(wait) > idx(PushB(wait.component(), wait.behavior()))
 
+    def test_large_plan(self):
+        plans = synthetic_plans(600, 10, 2)
+        res = merge_plans(plans).instructions()
+        idx = {instr: i for (i, instr) in enumerate(res)}
+        self.assertEqual(len(idx), len(res))
+        # Equal instructions of several plans are a single vertex
+        self.assertEqual(len(res), len({instr for plan in plans for instr in plan.instructions()}))
+        self.assertGreater(len(res), 10000)
+        for plan in plans:
+            pl = plan.instructions()
+            for i in range(0, len(pl) - 1):
+                self.assertLess(idx[pl[i]], idx[pl[i + 1]])
+            for instr in pl:
+                if instr.isWait():
+                    self.assertGreater(idx[instr], idx[PushB(instr.component(), instr.behavior())])
+
+    def test_cycle(self):
+        # comp1 and comp2 wait for each other: every instruction is still ordered once
+        pl1 = [PushB("comp1", "i1"), Wait("comp2", "j2"), PushB("comp1", "i2")]
+        pl2 = [PushB("comp2", "j1"), Wait("comp1", "i2"), PushB("comp2", "j2")]
+        res = merge_plans([Plan("comp1", pl1), Plan("comp2", pl2)]).instructions()
+        self.assertEqual(set(res), set(pl1 + pl2))
+        self.assertEqual(len(res), 6)
+        dag = merge_plans_dag([Plan("comp1", pl1), Plan("comp2", pl2)])
+        self.assertEqual(set(dag.to_plan().instructions()), set(pl1 + pl2))
+
+    def test_dag_levels(self):
+        # comp1 and comp2 are independent, comp3 waits for both of them
+        pl1 = [PushB("comp1", "i1"), PushB("comp1", "i2")]
+        pl2 = [PushB("comp2", "j1"), PushB("comp2", "j2")]
+        pl3 = [Wait("comp1", "i2"), Wait("comp2", "j2"), PushB("comp3", "k1")]
+        dag = merge_plans_dag([Plan("comp1", pl1), Plan("comp2", pl2), Plan("comp3", pl3)])
+        levels = [set(level) for level in dag.levels()]
+        self.assertEqual(levels[0], {PushB("comp1", "i1"), PushB("comp2", "j1")})
+        self.assertEqual(levels[1], {PushB("comp1", "i2"), PushB("comp2", "j2")})
+        self.assertEqual(levels[2], {Wait("comp1", "i2")})
+        self.assertEqual(dag.width(), 2)
+        level = {instr: i for (i, l) in enumerate(dag.levels()) for instr in l}
+        for (src, trg) in dag.edges():
+            self.assertLess(level[src], level[trg])
+
+    def test_dag_large_plan(self):
+        plans = synthetic_plans(200, 10, 2)
+        dag = merge_plans_dag(plans)
+        self.assertLess(dag.depth(), len(dag.instructions()))
+        level = {instr: i for (i, l) in enumerate(dag.levels()) for instr in l}
+        for (src, trg) in dag.edges():
+            self.assertLess(level[src], level[trg])
+        res = dag.to_plan().instructions()
+        idx = {instr: i for (i, instr) in enumerate(res)}
+        for plan in plans:
+            pl = plan.instructions()
+            for i in range(0, len(pl) - 1):
+                self.assertLess(idx[pl[i]], idx[pl[i + 1]])
+            for instr in pl:
+                if instr.isWait():
+                    self.assertGreater(idx[instr], idx[PushB(instr.component(), instr.behavior())])
+
+    def test_dag_before_after(self):
+        before = [Add("comp2", "t"), Connect("comp1", "p", "comp2", "u")]
+        after = [Disconnect("comp1", "p", "comp3", "u"), Delete("comp3")]
+        pl1 = [PushB("comp1", "i1")]
+        pl2 = [PushB("comp2", "j1")]
+        dag = merge_plans_dag([Plan("comp1", pl1), Plan("comp2", pl2)], before=before, after=after)
+        levels = [set(level) for level in dag.levels()]
+        self.assertEqual(levels, [{before[0]}, {before[1]}, {pl1[0], pl2[0]}, {after[0]}, {after[1]}])
+        # Without any behavior to execute, the reconfiguration of the assembly is still chained
+        dag = merge_plans_dag([], before=before, after=after)
+        self.assertEqual(dag.to_plan().instructions(), before + after)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,101 @@
+import unittest
+
+from ballet.assembly.plan.plan import Plan, PushB, Wait, Add, Connect, merge_plans_dag
+
+try:
+    from ballet.executor.plan_executor import PlanExecutor
+except ImportError:
+    # The Concerto-D executor requires zenoh
+    PlanExecutor = None
+
+
+class SemanticsAssembly:
+    # In-memory assembly: a behavior takes durations[behavior] iterations of the semantics, the clock counts them
+
+    def __init__(self, components, durations):
+        self.components = {comp: [] for comp in components}
+        self.act_components = set()
+        self.connections = []
+        self.iterations = 0
+        self._durations = durations
+        self._listeners = []
+
+    def get_name(self):
+        return "assembly"
+
+    def add_idle_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_idle_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def add_component(self, name, comp_type):
+        self.components[name] = []
+
+    def connect(self, comp1, dep1, comp2, dep2):
+        self.connections.append((comp1, dep1, comp2, dep2))
+
+    def push_b(self, component, behavior):
+        self.components[component].append(self._durations[behavior])
+        self.act_components.add(component)
+
+    def run_semantics_iteration(self):
+        self.iterations = self.iterations + 1
+        idle = set()
+        for comp in self.act_components:
+            queue = self.components[comp]
+            queue[0] = queue[0] - 1
+            if queue[0] == 0:
+                queue.pop(0)
+            if len(queue) == 0:
+                idle.add(comp)
+        self.act_components.difference_update(idle)
+        for listener in self._listeners:
+            listener(idle)
+
+
+@unittest.skipIf(PlanExecutor is None, "zenoh is not installed")
+class TestPlanExecutor(unittest.TestCase):
+
+    def test_parallel_components(self):
+        assembly = SemanticsAssembly(["comp1", "comp2", "comp3"], {"b1": 3, "b2": 2, "b3": 1})
+        pl1 = [PushB("comp1", "b1")]
+        pl2 = [PushB("comp2", "b2")]
+        pl3 = [Wait("comp1", "b1"), Wait("comp2", "b2"), PushB("comp3", "b3")]
+        dag = merge_plans_dag([Plan("comp1", pl1), Plan("comp2", pl2), Plan("comp3", pl3)])
+        executor = PlanExecutor(assembly, clock=lambda: assembly.iterations)
+        timings = executor.execute(dag)
+        self.assertEqual(set(timings.keys()), set(dag.instructions()))
+        # comp1 and comp2 run together, comp3 starts once comp1 (the slowest) is idle
+        self.assertEqual(timings[PushB("comp1", "b1")], (0, 3))
+        self.assertEqual(timings[PushB("comp2", "b2")], (0, 2))
+        self.assertEqual(timings[Wait("comp2", "b2")], (3, 3))
+        self.assertEqual(timings[PushB("comp3", "b3")], (3, 4))
+        self.assertEqual(executor.report()["makespan"], 4)
+        self.assertEqual(executor.report()["max_running_components"], 2)
+
+    def test_waits_do_not_block(self):
+        # comp2 waits for comp1 while comp3 is independent: comp3 is not delayed by the wait
+        assembly = SemanticsAssembly(["comp1", "comp2", "comp3"], {"b1": 2, "b2": 2, "b3": 1})
+        pl1 = [PushB("comp1", "b1")]
+        pl2 = [Wait("comp1", "b1"), PushB("comp2", "b2")]
+        pl3 = [PushB("comp3", "b3")]
+        executor = PlanExecutor(assembly, clock=lambda: assembly.iterations)
+        timings = executor.execute(merge_plans_dag([Plan("comp1", pl1), Plan("comp2", pl2), Plan("comp3", pl3)]))
+        self.assertEqual(timings[PushB("comp3", "b3")], (0, 1))
+        self.assertEqual(timings[PushB("comp2", "b2")], (2, 4))
+
+    def test_flat_plan(self):
+        assembly = SemanticsAssembly(["comp1"], {"b1": 2, "b2": 1})
+        plan = Plan("plan", [Add("comp2", "t"), Connect("comp1", "p", "comp2", "u"), PushB("comp1", "b1"),
+                             PushB("comp2", "b2"), Wait("comp1", "b1")])
+        executor = PlanExecutor(assembly, clock=lambda: assembly.iterations)
+        timings = executor.execute(plan)
+        self.assertEqual(assembly.connections, [("comp1", "p", "comp2", "u")])
+        self.assertEqual(timings[PushB("comp2", "b2")], (0, 1))
+        self.assertEqual(timings[Wait("comp1", "b1")], (0, 2))
+        self.assertEqual(executor.report()["makespan"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
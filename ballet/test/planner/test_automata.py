@@ -0,0 +1,44 @@
+import unittest
+
+from ballet.assembly.simplified.assembly_d import DecentralizedComponentInstance
+from ballet.assembly.simplified.type.basics import parallel_user_type
+from ballet.assembly.simplified.type.openstack import mariadb_worker_type
+from ballet.planner.automata import shared_matrix_from_component, matrix_from_component, type_signature
+from ballet.planner.minizinc.mzn_regular import MiniZincModelComponent, MiniZincWaitRegularConstraint
+
+
+class TestSharedMatrix(unittest.TestCase):
+
+    def test_shared_between_instances_of_a_type(self):
+        c1 = DecentralizedComponentInstance("w1", mariadb_worker_type())
+        c2 = DecentralizedComponentInstance("w2", mariadb_worker_type())
+        self.assertIs(shared_matrix_from_component(c1, "skip"), shared_matrix_from_component(c2, "skip"))
+        self.assertEqual(shared_matrix_from_component(c1, "skip"), matrix_from_component(c1, "skip"))
+
+    def test_types_with_the_same_name(self):
+        c1 = DecentralizedComponentInstance("u1", parallel_user_type(1))
+        c2 = DecentralizedComponentInstance("u2", parallel_user_type(2))
+        self.assertIsNot(shared_matrix_from_component(c1, "skip"), shared_matrix_from_component(c2, "skip"))
+
+    def test_ports_are_part_of_the_signature(self):
+        t1 = mariadb_worker_type()
+        t2 = mariadb_worker_type()
+        t2.add_provide_port("monitoring", {t2.running_place()})
+        self.assertEqual(type_signature(t1), type_signature(mariadb_worker_type()))
+        self.assertNotEqual(type_signature(t1), type_signature(t2))
+
+    def test_copy_on_write(self):
+        c1 = DecentralizedComponentInstance("w1", mariadb_worker_type())
+        c2 = DecentralizedComponentInstance("w2", mariadb_worker_type())
+        m1 = MiniZincModelComponent(c1, "initiated", 10)
+        m2 = MiniZincModelComponent(c2, "initiated", 10)
+        wait = MiniZincWaitRegularConstraint("master", "deploy", "master_service", "enabled")
+        m1.add_constraint(wait)
+        self.assertIn(wait.wait_instruction(), m1.comp_behaviors())
+        self.assertNotIn(wait.wait_instruction(), m2.comp_behaviors())
+        self.assertNotIn(wait.wait_instruction(), m2.comp_transitions()["initiated"])
+        self.assertIn(wait.wait_instruction(), m1.copy().comp_behaviors())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from concurrent import futures
+
+import grpc
+
+from ballet.assembly.simplified.assembly_d import DecentralizedComponentInstance
+from ballet.assembly.simplified.type.openstack import keystone_type
+from ballet.planner.communication.grpc import message_pb2, message_pb2_grpc
+from ballet.planner.communication.grpc.channel_pool import ChannelPool
+from ballet.planner.communication.grpc.grpc_planner import PlannerServicer
+
+
+class TestChannelPool(unittest.TestCase):
+
+    def setUp(self):
+        self.servicer = PlannerServicer([DecentralizedComponentInstance("keystone", keystone_type())])
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+        message_pb2_grpc.add_MessagingServicer_to_server(self.servicer, self.server)
+        self.address = f"localhost:{self.server.add_insecure_port('localhost:0')}"
+        self.server.start()
+        self.pool = ChannelPool(ready_timeout=1)
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.stop(None)
+
+    def test_reuse(self):
+        for source in ["c1", "c2", "c3"]:
+            self.pool.call(self.address, "AddAckByID", message_pb2.AckID(sourceID=source, targetID="keystone"))
+        self.assertEqual(self.servicer.acks()["keystone"], {"c1", "c2", "c3"})
+        self.assertEqual(self.pool.metrics()["created"], 1)
+        self.assertEqual(self.pool.metrics()["reused"], 2)
+        self.assertEqual(self.pool.metrics()["channels"], 1)
+
+    def test_check(self):
+        self.assertTrue(self.pool.check(self.address))
+        self.assertFalse(self.pool.check("localhost:1"))
+        self.assertEqual(self.pool.metrics()["channels"], 1)
+
+    def test_reset(self):
+        self.pool.call(self.address, "ping", message_pb2.Empty())
+        self.pool.reset(self.address)
+        self.pool.call(self.address, "ping", message_pb2.Empty())
+        self.assertEqual(self.pool.metrics()["created"], 2)
+        self.assertEqual(self.pool.metrics()["reconnections"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from ballet.assembly.simplified.assembly_d import DecentralizedAssembly
+from ballet.assembly.simplified.type.openstack import mariadb_master_type, keystone_type
+from ballet.planner.communication.constraint_message import PortConstraintMessage
+from ballet.planner.component_plan_node import ComponentNode
+from ballet.planner.goal import PortConstraint
+from ballet.planner.resolve import delta_msg
+
+
+class TestCoalescing(unittest.TestCase):
+
+    def test_delta_msg(self):
+        disabled = ("keystone", PortConstraintMessage("mariadb", "service", "disabled"))
+        until = ("keystone", PortConstraintMessage("mariadb", "service", "disabled", "update"))
+        prev = {}
+        self.assertEqual(delta_msg({disabled, until}, prev), {disabled, until})
+        # Unchanged messages are not sent again
+        self.assertEqual(delta_msg({disabled, until}, prev), set())
+        # A changed (target, port) is sent as a whole, as the receiver only keeps its latest round
+        self.assertEqual(delta_msg({disabled}, prev), {disabled})
+        self.assertEqual(prev, {("keystone", "service"): {disabled}})
+        # A (target, port) without messages anymore is retracted, once
+        retracted = ("keystone", PortConstraintMessage("mariadb", "service", PortConstraintMessage.retracted))
+        self.assertEqual(delta_msg(set(), prev), {retracted})
+        self.assertEqual(prev, {})
+        self.assertEqual(delta_msg(set(), prev), set())
+
+    def test_latest_round_wins(self):
+        assembly = DecentralizedAssembly()
+        assembly.add_instance("mariadb", mariadb_master_type())
+        keystone = assembly.add_instance("keystone", keystone_type())
+        assembly.connect_instances_id("mariadb", "service", "keystone", "mariadb_service")
+        node = ComponentNode(keystone, "deployed", cache=None)
+        disabled = PortConstraint("mariadb", "mariadb_service", None, "disabled", False)
+        until = PortConstraint("mariadb", "mariadb_service", "update", "disabled", True)
+        node.addInstructionContent(disabled, source="mariadb", round=1)
+        node.addInstructionContent(until, source="mariadb", round="1")
+        self.assertEqual(set(node._get_constraint_messages()), {disabled, until})
+        node.addInstructionContent(until, source="mariadb", round=2)
+        self.assertEqual(node._get_constraint_messages(), [until])
+        # A message of an older round is stale
+        node.addInstructionContent(disabled, source="mariadb", round=1)
+        self.assertEqual(node._get_constraint_messages(), [until])
+        retracted = PortConstraint("mariadb", "mariadb_service", None, PortConstraintMessage.retracted, False)
+        node.addInstructionContent(retracted, source="mariadb", round=3)
+        self.assertEqual(node._get_constraint_messages(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
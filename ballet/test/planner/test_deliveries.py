@@ -0,0 +1,102 @@
+import threading
+import time
+import unittest
+
+from ballet.assembly.simplified.assembly_d import DecentralizedComponentInstance
+from ballet.assembly.simplified.type.openstack import keystone_type
+from ballet.planner.communication.constraint_message import DeliveryNotifier, MailboxMessaging, HybridMessaging, \
+    LocalMessaging, RemoteMessaging
+from ballet.test.planner.test_resolve_executor import update_mariadb
+
+
+class CountingMailbox(MailboxMessaging):
+
+    def __init__(self, components, tracked=True):
+        super().__init__(components)
+        self.reads = 0
+        self._tracked = tracked
+
+    def get_messages(self, comp):
+        self.reads = self.reads + 1
+        return super().get_messages(comp)
+
+    def wait_deliveries(self, timeout=None):
+        deliveries = super().wait_deliveries(0)
+        # An untracked messaging makes resolve check every component at each sweep
+        return deliveries if self._tracked else None
+
+
+class WaitingRemote(RemoteMessaging):
+
+    def __init__(self):
+        self.timeouts = []
+
+    def wait_deliveries(self, timeout=None):
+        self.timeouts.append(timeout)
+        return set()
+
+
+class TestDeliveryNotifier(unittest.TestCase):
+
+    def test_wait(self):
+        notifier = DeliveryNotifier()
+        notifier.notify(["c1"])
+        notifier.notify(["c2"])
+        self.assertEqual(notifier.wait(0), {"c1", "c2"})
+        self.assertEqual(notifier.wait(0), set())
+
+    def test_woken_without_component(self):
+        notifier = DeliveryNotifier()
+        notifier.notify()
+        self.assertEqual(notifier.wait(0), set())
+        self.assertTrue(notifier.woken())
+        notifier.wait(0)
+        self.assertFalse(notifier.woken())
+
+    def test_wakes_up(self):
+        notifier = DeliveryNotifier()
+        threading.Timer(0.05, lambda: notifier.notify(["c1"])).start()
+        start = time.time()
+        self.assertEqual(notifier.wait(5), {"c1"})
+        self.assertLess(time.time() - start, 5)
+
+    def test_hybrid_untracked(self):
+        remote = WaitingRemote()
+        # Every component is checked anyway: the remote deliveries are not waited for
+        self.assertIsNone(HybridMessaging(LocalMessaging(), remote, set()).wait_deliveries(5))
+        self.assertEqual(remote.timeouts, [])
+
+    def test_hybrid_global_ack(self):
+        comp = DecentralizedComponentInstance("keystone", keystone_type())
+        local = MailboxMessaging([comp])
+        remote = WaitingRemote()
+        messaging = HybridMessaging(local, remote, {comp})
+        # A local global ack wakes up no component, but the termination may be reached: the remote side is not
+        # waited for
+        local.bcast_root_acks(comp)
+        self.assertEqual(messaging.wait_deliveries(5), set())
+        self.assertEqual(remote.timeouts, [0])
+        messaging.wait_deliveries(5)
+        self.assertEqual(remote.timeouts, [0, 5])
+
+
+class TestEventDrivenResolve(unittest.TestCase):
+
+    @staticmethod
+    def counting(tracked: bool):
+        mailboxes = []
+
+        def factory(comps):
+            mailboxes.append(CountingMailbox(comps, tracked))
+            return mailboxes[-1]
+        return factory, mailboxes
+
+    def test_only_awake_nodes_are_processed(self):
+        (tracked, tracked_mailboxes) = self.counting(True)
+        (untracked, untracked_mailboxes) = self.counting(False)
+        self.assertEqual(update_mariadb(messaging=tracked), update_mariadb(messaging=untracked))
+        self.assertLess(tracked_mailboxes[0].reads, untracked_mailboxes[0].reads)
+
+
+if __name__ == '__main__':
+    unittest.main()
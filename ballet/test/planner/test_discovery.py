@@ -0,0 +1,54 @@
+import threading
+import time
+import unittest
+
+from ballet.planner.communication.discovery import PeerDiscovery
+
+
+class StartingPeers:
+    # Peers answering ping once they are up, each ping taking `rtt` seconds
+    def __init__(self, up_after: dict[str, float], rtt: float = 0.05):
+        self._start = time.perf_counter()
+        self._up_after = up_after
+        self._rtt = rtt
+        self._lock = threading.Lock()
+        self.pings = {peer: 0 for peer in up_after}
+
+    def ping(self, peer: str) -> bool:
+        with self._lock:
+            self.pings[peer] = self.pings[peer] + 1
+        time.sleep(self._rtt)
+        if time.perf_counter() - self._start < self._up_after[peer]:
+            raise ConnectionError(f"{peer} is not up")
+        return True
+
+
+class TestPeerDiscovery(unittest.TestCase):
+
+    def test_concurrent(self):
+        peers = StartingPeers({f"p{i}": 0 for i in range(50)})
+        report = PeerDiscovery(peers.ping).discover(peers.pings.keys())
+        # 50 pings of 50ms in about 4 waves of 16 workers, instead of 2.5s one after the other
+        self.assertLess(report["elapsed"], 1.0)
+        self.assertEqual(report["missing"], [])
+        self.assertEqual(set(report["attempts"].values()), {1})
+
+    def test_backoff(self):
+        peers = StartingPeers({"up": 0, "late": 0.5})
+        report = PeerDiscovery(peers.ping, max_backoff=0.2).discover(["up", "late"])
+        self.assertEqual(report["attempts"]["up"], 1)
+        self.assertGreaterEqual(report["ready"]["late"], 0.5)
+        # Backoffs of 0.05, 0.1, 0.2, 0.2... (at least halved by the jitter) instead of a ping per sweep
+        self.assertLess(report["attempts"]["late"], 12)
+
+    def test_deadline(self):
+        peers = StartingPeers({"up": 0, "dead": 60})
+        discovery = PeerDiscovery(peers.ping, deadline=0.3)
+        with self.assertRaises(TimeoutError):
+            discovery.discover(["up", "dead"])
+        self.assertEqual(discovery.report()["missing"], ["dead"])
+        self.assertIn("up", discovery.report()["ready"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+import socket
+import threading
+import time
+import unittest
+
+from ballet.assembly.simplified.assembly_d import DecentralizedComponentInstance
+from ballet.assembly.simplified.type.openstack import keystone_type, mariadb_master_type
+from ballet.planner.communication.constraint_message import PortConstraintMessage, MailboxMessaging, HybridMessaging
+from ballet.planner.communication.grpc import message_pb2
+from ballet.planner.communication.grpc.grpc_planner import gRPCMessagingPlanner
+from ballet.planner.communication.grpc.streaming import HopLatencies, PlannerStream
+from ballet.planner.communication.mailbox import Mailbox
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+class TestMailbox(unittest.TestCase):
+
+    def test_concurrent_drain(self):
+        mailbox = Mailbox()
+        writers = 4
+        items = 5000
+
+        def deliver(w: int):
+            for i in range(items):
+                mailbox.add((w, i))
+
+        threads = [threading.Thread(target=deliver, args=(w,)) for w in range(writers)]
+        for thread in threads:
+            thread.start()
+        drained = []
+        while any(thread.is_alive() for thread in threads):
+            drained.append(mailbox.drain())
+        for thread in threads:
+            thread.join()
+        drained.append(mailbox.drain())
+        # Every item is drained exactly once
+        self.assertEqual(sum(map(len, drained)), writers * items)
+        self.assertEqual(set().union(*drained), {(w, i) for w in range(writers) for i in range(items)})
+        self.assertEqual(len(mailbox), 0)
+
+
+class EchoStub:
+    # Answers each envelope of the stream with its receipt, as a remote planner would
+
+    @staticmethod
+    def Exchange(envelopes):
+        return (message_pb2.receipt(sentAt=envelope.sentAt, receivedAt=time.time()) for envelope in envelopes)
+
+
+class TestPlannerStream(unittest.TestCase):
+
+    def test_concurrent_senders(self):
+        latencies = HopLatencies()
+        stream = PlannerStream(EchoStub(), "remote", "local", latencies)
+        writers = 4
+        envelopes = 2000
+
+        def send():
+            for _ in range(envelopes):
+                stream.send(globalAck=message_pb2.globalAckID(id="keystone"))
+
+        threads = [threading.Thread(target=send) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        deadline = time.time() + 5
+        while stream.pending() != 0 and time.time() < deadline:
+            time.sleep(0.01)
+        stream.close()
+        # Every envelope and receipt is counted exactly once
+        self.assertEqual(stream.pending(), 0)
+        self.assertEqual(latencies.summary()["remote"]["count"], writers * envelopes)
+
+
+class TestGRPCMessagingPlanner(unittest.TestCase):
+    streaming = False
+    aio = False
+
+    def setUp(self):
+        self.keystone = DecentralizedComponentInstance("keystone", keystone_type())
+        self.mariadb = DecentralizedComponentInstance("mariadb", mariadb_master_type())
+        port = free_port()
+        # The planner hosts keystone and sends to itself
+        addresses = {"keystone": {"address": "localhost", "port_planner": port}}
+        self.planner = gRPCMessagingPlanner([self.keystone], addresses, str(port), streaming=self.streaming,
+                                            aio=self.aio)
+
+    def tearDown(self):
+        self.planner.stop()
+
+    def test_batched_send(self):
+        messages = {("keystone", PortConstraintMessage("mariadb", "service", "disabled")),
+                    ("keystone", PortConstraintMessage("mariadb", "service", "disabled", "update"))}
+        self.planner.send_messages(self.mariadb, 1, messages)
+        self.planner.send_acks(self.mariadb, {"keystone"})
+        self.assertEqual(self.planner.get_messages(self.keystone), set())
+        rpcs = self.planner.channel_metrics()["reused"]
+        self.planner.flush()
+        received = self.planner.get_messages(self.keystone)
+        self.assertEqual(set(map(lambda m: m[2], received)), set(map(lambda m: m[1], messages)))
+        self.assertEqual(self.planner.get_acks(self.keystone), {"mariadb"})
+        self.assertEqual(self.planner.startup_report()["missing"], [])
+        # One call for the constraints and one for the acks
+        self.assertEqual(self.planner.channel_metrics()["reused"] - rpcs, 2)
+        # Received messages and acks are drained
+        self.assertEqual(self.planner.get_messages(self.keystone), set())
+        self.assertEqual(self.planner.get_acks(self.keystone), set())
+
+
+class TestAioPlanner(TestGRPCMessagingPlanner):
+    aio = True
+
+
+class TestStreamingPlanner(unittest.TestCase):
+    streaming = True
+    aio = False
+    setUp = TestGRPCMessagingPlanner.setUp
+    tearDown = TestGRPCMessagingPlanner.tearDown
+
+    def receive(self, count: int, timeout: float = 5.0) -> set:
+        received = set()
+        deadline = time.time() + timeout
+        while len(received) < count and time.time() < deadline:
+            received = received | self.planner.get_messages(self.keystone)
+            time.sleep(0.01)
+        return received
+
+    def test_stream(self):
+        messages = {("keystone", PortConstraintMessage("mariadb", "service", "disabled")),
+                    ("keystone", PortConstraintMessage("mariadb", "service", "disabled", "update"))}
+        self.planner.send_messages(self.mariadb, 1, messages)
+        self.planner.send_acks(self.mariadb, {"keystone"})
+        self.planner.bcast_root_acks(self.mariadb)
+        # Messages are delivered without flush
+        received = self.receive(2)
+        self.assertEqual(set(map(lambda m: m[2], received)), set(map(lambda m: m[1], messages)))
+        deadline = time.time() + 5
+        while "mariadb" not in self.planner.get_global_acks() and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.planner.get_acks(self.keystone), {"mariadb"})
+        self.assertEqual(self.planner.get_global_acks(), {"mariadb"})
+        latencies = self.planner.latencies()
+        self.assertEqual(sum(hop["count"] for hop in latencies["one_way"].values()), 4)
+        self.assertEqual(self.planner.channel_metrics()["created"], 1)
+
+
+class TestAioStreamingPlanner(TestStreamingPlanner):
+    aio = True
+
+
+class TestTermination(unittest.TestCase):
+    n_planners = 5
+    roots = ["k1", "k3", "k4"]
+
+    def setUp(self):
+        self.comps = [DecentralizedComponentInstance(f"k{i}", keystone_type()) for i in range(self.n_planners)]
+        ports = [free_port() for _ in self.comps]
+        addresses = {comp.id(): {"address": "localhost", "port_planner": port} for (comp, port) in zip(self.comps, ports)}
+        # Each planner pings all the others when it starts: they are started together
+        self.planners = [None] * self.n_planners
+
+        def start(i: int):
+            self.planners[i] = gRPCMessagingPlanner([self.comps[i]], addresses, str(ports[i]))
+
+        threads = [threading.Thread(target=start, args=(i,)) for i in range(self.n_planners)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def tearDown(self):
+        for planner in self.planners:
+            planner.stop()
+
+    def terminate(self, termination: str) -> int:
+        messagings = [HybridMessaging(MailboxMessaging([comp]), planner, {comp}, termination=termination)
+                      for (comp, planner) in zip(self.comps, self.planners)]
+        for messaging in messagings:
+            messaging.set_roots(set(self.roots))
+        for (comp, messaging) in zip(self.comps, messagings):
+            if comp.id() in self.roots:
+                messaging.bcast_root_acks(comp)
+                # Roots may ack again in the next sweeps
+                messaging.bcast_root_acks(comp)
+            messaging.flush()
+        # Each planner checks its global acks (and forwards the termination) in its own resolve loop
+        deadline = time.time() + 5
+        while not all([set(self.roots) <= messaging.get_global_acks() for messaging in messagings]) \
+                and time.time() < deadline:
+            time.sleep(0.01)
+        for messaging in messagings:
+            self.assertEqual(messaging.get_global_acks(), set(self.roots))
+        return sum(messaging.n_termination_send() for messaging in messagings)
+
+    def test_broadcast(self):
+        # Each root acks every planner once, even when it acks again
+        self.assertEqual(self.terminate("broadcast"), len(self.roots) * self.n_planners)
+
+    def test_tree(self):
+        # One global ack per root, then one Terminate call per edge of the tree of planners
+        self.assertEqual(self.terminate("tree"), len(self.roots) + self.n_planners - 1)
+
+    def test_unknown_termination(self):
+        with self.assertRaises(ValueError):
+            HybridMessaging(MailboxMessaging([self.comps[0]]), self.planners[0], {self.comps[0]}, termination="ring")
+
+
+if __name__ == '__main__':
+    unittest.main()
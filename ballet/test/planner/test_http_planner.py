@@ -0,0 +1,81 @@
+import threading
+import unittest
+
+from ballet.assembly.simplified.assembly_d import DecentralizedComponentInstance
+from ballet.assembly.simplified.type.openstack import keystone_type, mariadb_master_type
+from ballet.planner.communication.constraint_message import PortConstraintMessage
+from ballet.test.planner.test_grpc_planner import free_port
+
+try:
+    from ballet.planner.communication.rest.http_planner import HTTPMessaging, HTTPPlannerServer
+except ImportError:
+    HTTPMessaging = None
+
+
+@unittest.skipIf(HTTPMessaging is None, "aiohttp is not installed")
+class TestHTTPMessaging(unittest.TestCase):
+
+    def setUp(self):
+        self.keystone = DecentralizedComponentInstance("keystone", keystone_type())
+        self.mariadb = DecentralizedComponentInstance("mariadb", mariadb_master_type())
+        ports = [free_port(), free_port()]
+        addresses = {"keystone": {"address": "localhost", "port_planner": ports[0]},
+                     "mariadb": {"address": "localhost", "port_planner": ports[1]}}
+        self.planners = [None, None]
+
+        def start(i: int, comp):
+            self.planners[i] = HTTPMessaging([comp], addresses, str(ports[i]))
+
+        threads = [threading.Thread(target=start, args=(0, self.keystone)),
+                   threading.Thread(target=start, args=(1, self.mariadb))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def tearDown(self):
+        for planner in self.planners:
+            planner.stop()
+
+    def test_batch(self):
+        (keystone_planner, mariadb_planner) = self.planners
+        messages = {("keystone", PortConstraintMessage("mariadb", "service", "disabled")),
+                    ("keystone", PortConstraintMessage("mariadb", "service", "disabled", "update"))}
+        mariadb_planner.send_messages(self.mariadb, 1, messages)
+        mariadb_planner.send_acks(self.mariadb, {"keystone"})
+        mariadb_planner.bcast_root_acks(self.mariadb)
+        # A root acking again is not sent again
+        mariadb_planner.bcast_root_acks(self.mariadb)
+        self.assertEqual(mariadb_planner.n_termination_send(), 2)
+        self.assertEqual(keystone_planner.get_messages(self.keystone), set())
+        mariadb_planner.flush()
+        # One request per planner: keystone gets the constraints, the ack and the global ack
+        self.assertEqual(mariadb_planner.n_requests(), 2)
+        self.assertEqual(keystone_planner.wait_deliveries(5), {"keystone"})
+        received = keystone_planner.get_messages(self.keystone)
+        self.assertEqual(set(map(lambda m: m[2], received)), set(map(lambda m: m[1], messages)))
+        self.assertEqual(set(map(lambda m: m[1], received)), {1})
+        self.assertEqual(keystone_planner.get_acks(self.keystone), {"mariadb"})
+        self.assertEqual(keystone_planner.get_acks(self.keystone), set())
+        self.assertEqual(keystone_planner.get_global_acks(), {"mariadb"})
+        self.assertEqual(mariadb_planner.get_global_acks(), {"mariadb"})
+
+    def test_partial_batch(self):
+        server = HTTPPlannerServer([self.keystone])
+        constraint = {"sourceID": "mariadb", "targetID": "keystone", "round": "1", "port": "service",
+                      "status": "disabled", "behavior": None}
+        # The ack targets an unknown component: nothing of the batch is delivered
+        with self.assertRaises(KeyError):
+            server.deliver({"constraints": [constraint], "acks": [{"sourceID": "mariadb", "targetID": "nova"}],
+                            "globalAcks": ["mariadb"]})
+        self.assertEqual(server.get_mailbox("keystone"), set())
+        self.assertEqual(server.global_acks(), set())
+        self.assertEqual(server.notifier().wait(0), set())
+
+    def test_tree_termination(self):
+        with self.assertRaises(ValueError):
+            self.planners[0].set_termination("tree")
+
+
+if __name__ == '__main__':
+    unittest.main()
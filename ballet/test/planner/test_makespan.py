@@ -0,0 +1,80 @@
+import unittest
+
+from ballet.assembly.plan.plan import Plan, PushB, Wait
+from ballet.assembly.simplified.assembly import ComponentType
+from ballet.assembly.simplified.assembly_d import DecentralizedAssembly
+from ballet.assembly.simplified.type.openstack import mariadb_master_type, keystone_type
+from ballet.planner.communication.constraint_message import MailboxMessaging
+from ballet.planner.goal import BehaviorReconfigurationGoal
+from ballet.planner.makespan import wait_alternatives, MakespanOptimizer
+from ballet.planner.minizinc.mzn_native import native_solver
+from ballet.planner.resolve import resolve
+
+
+def worker_type() -> ComponentType:
+    t = ComponentType("worker")
+    pl_a = t.add_place("a")
+    pl_b = t.add_place("b")
+    pl_c = t.add_place("c")
+    t.set_initial_place(pl_a)
+    t.set_running_place(pl_c)
+    t.add_behavior("first").add_transition("first", pl_a, pl_b, cost=1)
+    t.add_behavior("second").add_transition("second", pl_b, pl_c, cost=5)
+    t.add_use_port("service", {pl_a})
+    return t
+
+
+class TestMakespan(unittest.TestCase):
+
+    def setUp(self):
+        assembly = DecentralizedAssembly()
+        self.mariadb = assembly.add_instance("mariadb", mariadb_master_type())
+        self.worker = assembly.add_instance("worker", worker_type())
+        self.active = {self.mariadb: self.mariadb.type().get_place("deployed"),
+                       self.worker: self.worker.type().initial_place()}
+        # The worker waits for the update of mariadb once its service is disabled, i.e., in b or c
+        self.plans = {self.mariadb: Plan("mariadb", [PushB("mariadb", "interrupt"), PushB("mariadb", "update")]),
+                      self.worker: Plan("worker", [PushB("worker", "first"), Wait("mariadb", "update"),
+                                                   PushB("worker", "second")])}
+        self.wait_places = {self.worker: {("mariadb", "update"): {"b", "c"}}}
+
+    def test_wait_alternatives(self):
+        alternatives = wait_alternatives(self.worker, self.active[self.worker], self.plans[self.worker],
+                                         self.wait_places[self.worker])
+        self.assertEqual([plan.instructions() for plan in alternatives],
+                         [self.plans[self.worker].instructions(),
+                          [PushB("worker", "first"), PushB("worker", "second"), Wait("mariadb", "update")]])
+        # Without known wait places, the wait stays where the solver put it
+        self.assertEqual(len(wait_alternatives(self.worker, "a", self.plans[self.worker], {})), 1)
+
+    def test_optimize(self):
+        optimizer = MakespanOptimizer()
+        plans = optimizer.optimize(self.plans, self.active, self.wait_places)
+        # The second behavior of the worker no longer waits for the update (done at 3)
+        self.assertEqual(plans[self.worker].instructions()[-1], Wait("mariadb", "update"))
+        self.assertEqual(plans[self.mariadb].instructions(), self.plans[self.mariadb].instructions())
+        report = optimizer.report()
+        self.assertEqual((report["default"], report["optimized"], report["improvement"]), (8, 6, 2))
+        self.assertEqual(report["changed"], ["worker"])
+
+    def test_resolve(self):
+        assembly = DecentralizedAssembly()
+        mariadb = assembly.add_instance("mariadb", mariadb_master_type())
+        keystones = [assembly.add_instance(f"keystone{i}", keystone_type()) for i in range(2)]
+        for keystone in keystones:
+            assembly.connect_instances_id("mariadb", "service", keystone.id(), "mariadb_service")
+        comps = [mariadb] + keystones
+        active = {comp: "deployed" for comp in comps}
+        goals = {"mariadb": {BehaviorReconfigurationGoal("update")}}
+        optimizer = MakespanOptimizer()
+        plans = resolve(comps, active, goals, {}, MailboxMessaging(comps), cache=None, solver=native_solver,
+                        makespan=optimizer)
+        default = resolve(comps, active, goals, {}, MailboxMessaging(comps), cache=None, solver=native_solver)
+        # Alternatives only move the waits
+        for comp in comps:
+            self.assertEqual(set(plans[comp].instructions()), set(default[comp].instructions()))
+        self.assertGreaterEqual(optimizer.report()["improvement"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+import minizinc
+from minizinc import Status
+
+from ballet.assembly.simplified.assembly_d import DecentralizedComponentInstance
+from ballet.assembly.simplified.type.openstack import mariadb_worker_type, keystone_type
+from ballet.planner.minizinc.mzn_app import MiniZincResult
+from ballet.planner.minizinc.mzn_batch import MiniZincBatch
+from ballet.planner.minizinc.mzn_native import native_solver
+from ballet.planner.minizinc.mzn_regular import MiniZincModelComponent, MiniZincBehaviorRegularConstraint, \
+    MiniZincStateRegularConstraint, MiniZincWaitRegularConstraint
+
+
+class TestMiniZincBatch(unittest.TestCase):
+
+    def setUp(self):
+        worker = DecentralizedComponentInstance("worker", mariadb_worker_type())
+        keystone = DecentralizedComponentInstance("keystone", keystone_type())
+        self.wait = MiniZincWaitRegularConstraint("master", "deploy", "master_service", "enabled")
+        self.regulars = [
+            MiniZincModelComponent(worker, "initiated", 4, {MiniZincBehaviorRegularConstraint("deploy"), self.wait}),
+            MiniZincModelComponent(worker, "deployed", 3, {MiniZincBehaviorRegularConstraint("interrupt")}),
+            MiniZincModelComponent(keystone, "deployed", 3, {MiniZincStateRegularConstraint("initiated")})
+        ]
+
+    def test_content(self):
+        content = MiniZincBatch(self.regulars).content()
+        self.assertEqual(content.count("enum STATUS"), 1)
+        self.assertEqual(content.count("enum T0_STATE"), 1)
+        self.assertEqual(content.count("enum T1_STATE"), 1)
+        self.assertNotIn("enum T2_STATE", content)
+        self.assertIn("N1_init_state = T0_deployed;", content)
+        self.assertIn("N2_goal_visit = {T1_initiated};", content)
+        self.assertIn("solve minimize sum(N0_cost) + sum(N1_cost) + sum(N2_cost);", content)
+        self.assertEqual(content.count("solve "), 1)
+
+    def test_split(self):
+        # A batch solution built from the solutions of each model, as MiniZinc would output it
+        batch = MiniZincBatch(self.regulars)
+        alone = [regular.run(native_solver).result() for regular in self.regulars]
+        solution = {}
+        for (n, (regular, result)) in enumerate(zip(self.regulars, alone)):
+            prefix = "T1_" if n == 2 else "T0_"
+            wait = self.wait.wait_instruction()
+            solution[f"N{n}_sequence"] = [prefix + ("wait" if bhv == wait else bhv) for bhv in result["sequence"]]
+            solution[f"N{n}_wait_index"] = [1 if bhv == wait else 0 for bhv in result["sequence"]]
+            solution[f"N{n}_states"] = [prefix + place for place in result["states"]]
+            solution[f"N{n}_cost"] = result["cost"]
+            for port in regular.comp_ports():
+                solution[f"N{n}_{port}_status"] = result[port + "_status"]
+        results = batch.split(MiniZincResult(Status.OPTIMAL_SOLUTION, solution, {}))
+        for (result, expected, regular) in zip(results, alone, self.regulars):
+            self.assertEqual(result.status, Status.OPTIMAL_SOLUTION)
+            self.assertEqual(result["sequence"], expected["sequence"])
+            self.assertEqual(result["states"], expected["states"])
+            self.assertEqual(result.objective, expected.objective)
+            for port in regular.comp_ports():
+                self.assertEqual(result[port + "_status"], expected[port + "_status"])
+
+    def test_split_without_solution(self):
+        results = MiniZincBatch(self.regulars).split(MiniZincResult(Status.UNSATISFIABLE, None, {}))
+        self.assertEqual([result.status for result in results], [Status.UNSATISFIABLE] * 3)
+
+    @unittest.skipIf(minizinc.default_driver is None, "MiniZinc is not installed")
+    def test_same_solutions_as_alone(self):
+        results = MiniZincBatch(self.regulars).run().results()
+        for (result, regular) in zip(results, self.regulars):
+            self.assertEqual(result.objective, regular.run(native_solver).result().objective)
+
+
+if __name__ == '__main__':
+    unittest.main()
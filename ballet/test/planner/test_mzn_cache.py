@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from ballet.planner.minizinc.mzn_cache import MiniZincResultCache
+
+
+class TestMiniZincResultCache(unittest.TestCase):
+
+    def test_hit_and_miss(self):
+        cache = MiniZincResultCache()
+        self.assertIsNone(cache.get("model"))
+        cache.put("model", {"sequence": ["deploy", "skip"]})
+        self.assertEqual(cache.get("model"), {"sequence": ["deploy", "skip"]})
+        self.assertEqual(cache.hits(), 1)
+        self.assertEqual(cache.misses(), 1)
+
+    def test_solver_is_part_of_the_key(self):
+        cache = MiniZincResultCache()
+        cache.put("model", {"sequence": []}, solver="gecode")
+        self.assertIsNone(cache.get("model", solver="chuffed"))
+
+    def test_lru_eviction(self):
+        cache = MiniZincResultCache(maxsize=2)
+        cache.put("m1", {"sequence": [1]})
+        cache.put("m2", {"sequence": [2]})
+        cache.get("m1")
+        cache.put("m3", {"sequence": [3]})
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("m2"))
+        self.assertIsNotNone(cache.get("m1"))
+        self.assertIsNotNone(cache.get("m3"))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = MiniZincResultCache(directory=directory)
+            cache.put("model", {"sequence": ["deploy"]})
+            self.assertEqual(len(os.listdir(directory)), 1)
+            other = MiniZincResultCache(directory=directory)
+            self.assertEqual(other.get("model"), {"sequence": ["deploy"]})
+            self.assertEqual(other.hits(), 1)
+
+    def test_merge(self):
+        worker = MiniZincResultCache()
+        worker.put("model", {"sequence": ["deploy"]})
+        cache = MiniZincResultCache()
+        cache.merge(worker.entries())
+        self.assertEqual(cache.get("model"), {"sequence": ["deploy"]})
+
+
+if __name__ == '__main__':
+    unittest.main()
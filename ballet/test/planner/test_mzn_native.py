@@ -0,0 +1,65 @@
+import unittest
+
+from minizinc import Status
+
+from ballet.assembly.simplified.assembly_d import DecentralizedComponentInstance
+from ballet.assembly.simplified.type.openstack import mariadb_worker_type
+from ballet.planner.minizinc.mzn_native import native_solver
+from ballet.planner.minizinc.mzn_regular import MiniZincModelComponent, MiniZincBehaviorRegularConstraint, \
+    MiniZincStateRegularConstraint, MiniZincPortRegularConstraint, MiniZincWaitRegularConstraint
+
+
+class TestNativeRegularSolver(unittest.TestCase):
+
+    def setUp(self):
+        self.comp = DecentralizedComponentInstance("worker", mariadb_worker_type())
+
+    def model(self, place, constraints, word_length=10):
+        return MiniZincModelComponent(self.comp, place, word_length, set(constraints))
+
+    def test_deploy(self):
+        result = self.model("initiated", [MiniZincBehaviorRegularConstraint("deploy")]).run(native_solver).result()
+        self.assertEqual(result.status, Status.OPTIMAL_SOLUTION)
+        self.assertEqual(result["sequence"], ["deploy"] + ["skip"] * 9)
+        self.assertEqual(result["service_status"], ["disabled"] + ["enabled"] * 10)
+        self.assertEqual(result.objective, 60)
+
+    def test_result_shape(self):
+        result = self.model("deployed", [], word_length=4).run(native_solver).result()
+        self.assertEqual(len(result["sequence"]), 4)
+        self.assertEqual(len(result["states"]), 5)
+        for port in ["service", "haproxy_service", "common_service", "master_service"]:
+            self.assertEqual(len(result[port + "_status"]), 5)
+
+    def test_update_back_to_deployed(self):
+        constraints = [MiniZincBehaviorRegularConstraint("update"), MiniZincStateRegularConstraint("deployed", True)]
+        result = self.model("deployed", constraints).run(native_solver).result()
+        self.assertEqual(result["sequence"][:3], ["interrupt", "update", "deploy"])
+        self.assertEqual(result["states"][-1], "deployed")
+
+    def test_port_constraint(self):
+        constraints = [MiniZincPortRegularConstraint("service", "disabled")]
+        result = self.model("deployed", constraints).run(native_solver).result()
+        self.assertEqual(result["sequence"][0], "interrupt")
+
+    def test_final_behavior(self):
+        constraints = [MiniZincBehaviorRegularConstraint("interrupt"), MiniZincBehaviorRegularConstraint("uninstall", True)]
+        result = self.model("deployed", constraints).run(native_solver).result()
+        self.assertEqual(result["sequence"][:3], ["interrupt", "uninstall", "skip"])
+
+    def test_wait_performed_once(self):
+        wait = MiniZincWaitRegularConstraint("master", "deploy", "master_service", "enabled")
+        constraints = [MiniZincBehaviorRegularConstraint("deploy"), wait]
+        result = self.model("initiated", constraints).run(native_solver).result()
+        self.assertEqual(result["sequence"].count(wait.wait_instruction()), 1)
+        self.assertEqual(result.objective, 60)
+
+    def test_unsatisfiable(self):
+        constraints = [MiniZincBehaviorRegularConstraint("update"), MiniZincStateRegularConstraint("deployed", True)]
+        result = self.model("deployed", constraints, word_length=2).run(native_solver).result()
+        self.assertEqual(result.status, Status.UNSATISFIABLE)
+        self.assertRaises(KeyError, lambda: result["sequence"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+from minizinc import Status
+
+from ballet.assembly.plan.plan import Wait
+from ballet.assembly.simplified.assembly_d import DecentralizedComponentInstance
+from ballet.assembly.simplified.type.openstack import mariadb_worker_type
+from ballet.planner.component_plan_node import ComponentNode
+from ballet.planner.goal import BehaviorReconfigurationGoal, PortConstraint
+from ballet.planner.minizinc.mzn_app import MiniZincResult
+from ballet.planner.minizinc.mzn_cache import MiniZincResultCache
+from ballet.planner.minizinc.mzn_native import native_solver
+from ballet.planner.minizinc.mzn_parametric import type_model
+from ballet.planner.minizinc.mzn_regular import MiniZincModelComponent, MiniZincBehaviorRegularConstraint, \
+    MiniZincWaitRegularConstraint
+
+
+class TestMiniZincTypeModel(unittest.TestCase):
+
+    def setUp(self):
+        self.wait = MiniZincWaitRegularConstraint("master", "deploy", "master_service", "enabled")
+        self.c1 = DecentralizedComponentInstance("w1", mariadb_worker_type())
+        self.c2 = DecentralizedComponentInstance("w2", mariadb_worker_type())
+
+    def test_shared_by_the_type(self):
+        m1 = MiniZincModelComponent(self.c1, "initiated", 10, {MiniZincBehaviorRegularConstraint("deploy")})
+        m2 = MiniZincModelComponent(self.c2, "deployed", 10, {self.wait})
+        self.assertIs(type_model(m1), type_model(m2))
+        self.assertNotIn("ewait", type_model(m2).content())
+
+    def test_signature(self):
+        m1 = MiniZincModelComponent(self.c1, "initiated", 10, {MiniZincBehaviorRegularConstraint("deploy")})
+        m2 = MiniZincModelComponent(self.c2, "initiated", 10, {MiniZincBehaviorRegularConstraint("deploy")})
+        m3 = MiniZincModelComponent(self.c2, "deployed", 10, {MiniZincBehaviorRegularConstraint("deploy")})
+        self.assertEqual(m1.signature(), m2.signature())
+        self.assertNotEqual(m1.signature(), m3.signature())
+
+    def test_signature_of_waits(self):
+        # The waits only differ by the component they wait for: the cached sequences name it
+        waitA = MiniZincWaitRegularConstraint("masterA", "deploy", "master_service", "enabled")
+        waitB = MiniZincWaitRegularConstraint("masterB", "deploy", "master_service", "enabled")
+        m1 = MiniZincModelComponent(self.c1, "initiated", 10, {MiniZincBehaviorRegularConstraint("deploy"), waitA})
+        m2 = MiniZincModelComponent(self.c2, "initiated", 10, {MiniZincBehaviorRegularConstraint("deploy"), waitB})
+        self.assertNotEqual(m1.signature(), m2.signature())
+
+    def test_cached_plans_of_waits(self):
+        cache = MiniZincResultCache()
+        plans = []
+        for (comp, master) in [(self.c1, "masterA"), (self.c2, "masterB")]:
+            node = ComponentNode(comp, "initiated", cache=cache, solver=native_solver)
+            node.addInstructionContent(BehaviorReconfigurationGoal("deploy"))
+            node.addInstructionContent(PortConstraint(master, "master_service", "deploy", "enabled", True),
+                                       source=master, round=1)
+            plans.append(node.local_plan())
+        self.assertIn(Wait("masterA", "deploy"), plans[0].instructions())
+        self.assertIn(Wait("masterB", "deploy"), plans[1].instructions())
+        self.assertNotIn(Wait("masterA", "deploy"), plans[1].instructions())
+
+    def test_data(self):
+        model = MiniZincModelComponent(self.c1, "initiated", 4, {MiniZincBehaviorRegularConstraint("deploy"), self.wait})
+        data = type_model(model).data(model)
+        self.assertIn("word_length = 4;", data)
+        self.assertIn("init_state = initiated;", data)
+        self.assertIn("goal_behaviors = {deploy};", data)
+        self.assertIn("n_waits = 1;", data)
+        self.assertIn("wait_places = [{bootstrapped, deployed, interrupted}];", data)
+
+    def test_decode_waits(self):
+        model = MiniZincModelComponent(self.c1, "initiated", 3, {MiniZincBehaviorRegularConstraint("deploy"), self.wait})
+        solution = {"sequence": ["deploy", "wait", "skip"], "wait_index": [0, 1, 0],
+                    "states": ["initiated", "deployed", "deployed", "deployed"], "cost": [60, 0, 0], "objective": 60}
+        for port in model.comp_ports():
+            solution[port + "_status"] = ["disabled"] * 4
+        result = type_model(model).decode(model, MiniZincResult(Status.OPTIMAL_SOLUTION, solution, {}))
+        self.assertEqual(result["sequence"], ["deploy", self.wait.wait_instruction(), "skip"])
+        self.assertEqual(result.objective, 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+import minizinc
+from minizinc import Status
+
+from ballet.assembly.simplified.assembly_d import DecentralizedComponentInstance
+from ballet.assembly.simplified.type.openstack import mariadb_worker_type
+from ballet.planner.component_plan_node import ComponentNode
+from ballet.planner.goal import BehaviorReconfigurationGoal
+from ballet.planner.minizinc.mzn_app import MiniZincResult
+from ballet.planner.minizinc.mzn_portfolio import SolverStatistics, _race, solver_key
+from ballet.planner.minizinc.mzn_regular import MiniZincModelComponent, MiniZincBehaviorRegularConstraint
+
+
+class DelayedInstance:
+    # Answers after a delay, as a MiniZinc instance would after its subprocess ends
+
+    def __init__(self, delay: float, status: Status, objective=None):
+        self._delay = delay
+        self._status = status
+        self._objective = objective
+        self.cancelled = False
+
+    async def solve_async(self, time_limit=None):
+        try:
+            await asyncio.sleep(self._delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        solution = None if self._objective is None else {"objective": self._objective}
+        return MiniZincResult(self._status, solution, {})
+
+
+class TestSolverStatistics(unittest.TestCase):
+
+    def test_fastest(self):
+        statistics = SolverStatistics()
+        statistics.record("worker", "gecode", 2.0, Status.OPTIMAL_SOLUTION)
+        statistics.record("worker", "chuffed", 1.0, Status.OPTIMAL_SOLUTION)
+        statistics.record("worker", "cp-sat", 0.5, Status.SATISFIED)
+        self.assertEqual(statistics.summary()["worker"]["gecode"]["mean"], 2.0)
+        self.assertEqual(statistics.summary()["worker"]["cp-sat"]["timeouts"], 1)
+        self.assertEqual(statistics.fastest("worker"), "chuffed")
+        self.assertIsNone(statistics.fastest("master"))
+
+    def test_solver_key(self):
+        self.assertEqual(solver_key("gecode"), "gecode")
+        self.assertEqual(solver_key(["gecode", "chuffed"]), "gecode,chuffed")
+
+
+class TestRace(unittest.TestCase):
+
+    def test_first_proven_answer_wins(self):
+        statistics = SolverStatistics()
+        slow = DelayedInstance(5, Status.OPTIMAL_SOLUTION, 1)
+        instances = {"gecode": DelayedInstance(0.01, Status.SATISFIED, 20),
+                     "chuffed": DelayedInstance(0.02, Status.OPTIMAL_SOLUTION, 10),
+                     "cp-sat": slow}
+        result = asyncio.run(_race(instances, None, "worker", statistics))
+        self.assertEqual(result.objective, 10)
+        self.assertTrue(slow.cancelled)
+        self.assertEqual(statistics.summary()["worker"]["chuffed"]["wins"], 1)
+        self.assertEqual(statistics.summary()["worker"]["gecode"]["wins"], 0)
+        self.assertNotIn("cp-sat", statistics.summary()["worker"])
+
+    def test_best_solution_so_far(self):
+        instances = {"gecode": DelayedInstance(0.01, Status.SATISFIED, 20),
+                     "chuffed": DelayedInstance(0.02, Status.SATISFIED, 15),
+                     "cp-sat": DelayedInstance(0.01, Status.UNKNOWN)}
+        result = asyncio.run(_race(instances, timedelta(seconds=1), "worker", SolverStatistics()))
+        self.assertEqual(result.status, Status.SATISFIED)
+        self.assertEqual(result.objective, 15)
+
+
+class TestPortfolio(unittest.TestCase):
+
+    @unittest.skipIf(minizinc.default_driver is None, "MiniZinc is not installed")
+    def test_portfolio(self):
+        comp = DecentralizedComponentInstance("worker", mariadb_worker_type())
+        model = MiniZincModelComponent(comp, "initiated", 10, {MiniZincBehaviorRegularConstraint("deploy")})
+        result = model.run(["gecode", "chuffed"], timedelta(seconds=30)).result()
+        self.assertEqual(result.status, Status.OPTIMAL_SOLUTION)
+        self.assertEqual(result["sequence"], ["deploy"] + ["skip"] * 9)
+
+
+class TestTimeout(unittest.TestCase):
+
+    def test_no_solution_in_time(self):
+        comp = DecentralizedComponentInstance("worker", mariadb_worker_type())
+        node = ComponentNode(comp, "initiated", cache=None, timeout=timedelta(0))
+        node.addInstructionContent(BehaviorReconfigurationGoal("deploy"))
+        # What the solvers answer when the timeout expires before a first solution
+        unknown = mock.Mock(result=lambda: MiniZincResult(Status.UNKNOWN, None, {}))
+        with mock.patch.object(MiniZincModelComponent, "run", return_value=unknown) as run:
+            with self.assertRaisesRegex(RuntimeError, "No solution for worker .*timeout 0:00:00"):
+                node.bhv_inference()
+        self.assertEqual(run.call_args.args[1], timedelta(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+import minizinc
+
+from ballet.assembly.simplified.assembly_d import DecentralizedComponentInstance
+from ballet.assembly.simplified.type.basics import parallel_user_type
+from ballet.assembly.simplified.type.openstack import mariadb_worker_type
+from ballet.benchmark.bench_model_tables import LegacyMiniZincModelComponent
+from ballet.planner.minizinc.mzn_app import MiniZincApp
+from ballet.planner.minizinc.mzn_native import native_solver
+from ballet.planner.minizinc.mzn_regular import MiniZincModelComponent, MiniZincBehaviorRegularConstraint, \
+    MiniZincStateRegularConstraint, MiniZincPortRegularConstraint
+
+
+class TestMiniZincTables(unittest.TestCase):
+
+    def cases(self):
+        worker = DecentralizedComponentInstance("worker", mariadb_worker_type())
+        user = DecentralizedComponentInstance("user", parallel_user_type(3))
+        return [
+            (worker, "initiated", {MiniZincBehaviorRegularConstraint("deploy")}),
+            (worker, "deployed", {MiniZincBehaviorRegularConstraint("update"),
+                                  MiniZincStateRegularConstraint("deployed", True)}),
+            (worker, "deployed", {MiniZincPortRegularConstraint("service", "disabled", True)}),
+            (user, "uninstalled", {MiniZincBehaviorRegularConstraint("deploy")}),
+        ]
+
+    def test_no_conditional_cost_nor_port_disjunction(self):
+        for (comp, place, constraints) in self.cases():
+            content = MiniZincModelComponent(comp, place, 10, constraints).content()
+            self.assertNotIn("elseif", content)
+            self.assertNotIn("\\/", content)
+            self.assertIn("transition_cost", content)
+            self.assertIn("port_bound", content)
+
+    @unittest.skipIf(minizinc.default_driver is None, "MiniZinc is not installed")
+    def test_same_solutions_as_legacy_model(self):
+        for (comp, place, constraints) in self.cases():
+            legacy = MiniZincApp(content=LegacyMiniZincModelComponent(comp, place, 10, constraints).content())
+            tables = MiniZincApp(content=MiniZincModelComponent(comp, place, 10, constraints).content())
+            legacy_result = legacy.run().result()
+            tables_result = tables.run().result()
+            native_result = MiniZincModelComponent(comp, place, 10, constraints).run(native_solver).result()
+            self.assertEqual(legacy_result.objective, tables_result.objective)
+            self.assertEqual(native_result.objective, tables_result.objective)
+            self.assertEqual(list(legacy_result["sequence"]), list(tables_result["sequence"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
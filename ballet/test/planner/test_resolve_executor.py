@@ -0,0 +1,101 @@
+import unittest
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from unittest import mock
+
+from ballet.assembly.simplified.assembly_d import DecentralizedAssembly
+from ballet.assembly.simplified.type.openstack import mariadb_master_type, mariadb_worker_type, keystone_type, \
+    glance_type
+from ballet.planner.communication.constraint_message import MailboxMessaging
+from ballet.planner.component_plan_node import ComponentNode
+from ballet.planner.goal import BehaviorReconfigurationGoal, PlaceReconfigurationGoal
+from ballet.planner.minizinc.mzn_cache import MiniZincResultCache
+from ballet.planner.minizinc.mzn_native import native_solver
+from ballet.planner import resolve as resolve_module
+from ballet.planner.resolve import resolve
+
+
+def update_mariadb(executor=None, batch=False, messaging=MailboxMessaging, cache=None) -> dict[str, list[str]]:
+    assembly = DecentralizedAssembly()
+    mariadb = assembly.add_instance("mariadb", mariadb_master_type())
+    keystones = [assembly.add_instance(f"keystone{i}", keystone_type()) for i in range(3)]
+    for keystone in keystones:
+        assembly.connect_instances_id("mariadb", "service", keystone.id(), "mariadb_service")
+    comps = [mariadb] + keystones
+    active = {comp: "deployed" for comp in comps}
+    goals = {"mariadb": {BehaviorReconfigurationGoal("update")}}
+    plans = resolve(comps, active, goals, {}, messaging(comps), cache=cache, solver=native_solver,
+                    executor=executor, batch=batch)
+    return {comp.id(): list(map(str, plan.instructions())) for (comp, plan) in plans.items()}
+
+
+def update_openstack(executor=None, batch=False) -> tuple[dict[str, list[str]], Counter]:
+    # glance0 uses both worker0 and kst0, which uses worker0: kst0 sends to glance0 in the sweep it is told about
+    # the update of worker0. Returns the plans, and the number of rounds of each node.
+    assembly = DecentralizedAssembly()
+    comps = [assembly.add_instance("master", mariadb_master_type()),
+             assembly.add_instance("worker0", mariadb_worker_type()),
+             assembly.add_instance("kst0", keystone_type()),
+             assembly.add_instance("glance0", glance_type())]
+    assembly.connect_instances_id("master", "service", "worker0", "master_service")
+    assembly.connect_instances_id("worker0", "service", "kst0", "mariadb_service")
+    assembly.connect_instances_id("worker0", "service", "glance0", "mariadb_service")
+    assembly.connect_instances_id("kst0", "service", "glance0", "keystone_service")
+    active = {comp: "deployed" for comp in comps}
+    goals = {"master": {BehaviorReconfigurationGoal("update")}}
+    goals_states = {comp: {PlaceReconfigurationGoal("deployed", final=True)} for comp in comps}
+    with mock.patch.object(ComponentNode, "inc_round", autospec=True, side_effect=ComponentNode.inc_round) as inc:
+        plans = resolve(comps, active, goals, goals_states, MailboxMessaging(comps), cache=None,
+                        solver=native_solver, executor=executor, batch=batch)
+    rounds = Counter(call.args[0]._id for call in inc.call_args_list)
+    return {comp.id(): list(map(str, plan.instructions())) for (comp, plan) in plans.items()}, rounds
+
+
+class TestResolveExecutor(unittest.TestCase):
+
+    def test_sequential(self):
+        plans = update_mariadb()
+        self.assertEqual(plans["mariadb"], ["pushB(mariadb, interrupt)", "pushB(mariadb, update)"])
+        self.assertEqual(plans["keystone0"], ["pushB(keystone0, uninstall)"])
+
+    def test_thread_pool(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            self.assertEqual(update_mariadb(executor), update_mariadb())
+
+    def test_process_pool(self):
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(update_mariadb(executor), update_mariadb())
+
+    def test_process_pool_cache(self):
+        (cache, expected) = (MiniZincResultCache(), MiniZincResultCache())
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(update_mariadb(executor, cache=cache), update_mariadb(cache=expected))
+        # The results solved in the worker processes are merged back
+        self.assertEqual(dict(cache.entries()), dict(expected.entries()))
+
+    def test_batch(self):
+        self.assertEqual(update_mariadb(batch=True), update_mariadb())
+
+    def test_sequential_order(self):
+        # glance0 gets the messages of worker0 and kst0 in the same round whatever the executor, hence the same waits
+        (plans, rounds) = update_openstack()
+        self.assertEqual(rounds["glance0"], 1)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            self.assertEqual(update_openstack(executor), (plans, rounds))
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(update_openstack(executor), (plans, rounds))
+        self.assertEqual(update_openstack(batch=True), (plans, rounds))
+
+    def test_batch_only_when_asked(self):
+        with mock.patch.object(resolve_module, "batch_bhv_inference", wraps=resolve_module.batch_bhv_inference) as bhv, \
+                mock.patch.object(resolve_module, "batch_local_plan", wraps=resolve_module.batch_local_plan) as plan:
+            update_mariadb()
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                update_mariadb(executor)
+            self.assertEqual((bhv.call_count, plan.call_count), (0, 0))
+            update_mariadb(batch=True)
+            self.assertGreater(plan.call_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+from ballet.assembly.simplified.assembly_d import DecentralizedComponentInstance
+from ballet.assembly.simplified.type.openstack import keystone_type, mariadb_master_type
+from ballet.planner.communication.constraint_message import HybridMessaging, MailboxMessaging, RemoteMessaging, \
+    PortConstraintMessage
+from ballet.planner.communication.router import Router
+
+
+class TestRouter(unittest.TestCase):
+
+    def test_routes(self):
+        router = Router(["a"], {"a": "host1:5000", "b": "host2:5000", "c": "host2:5000"})
+        self.assertTrue(router.is_local("a"))
+        self.assertEqual(router.route("b"), "host2:5000")
+        self.assertEqual(router.endpoints(), {"host2:5000"})
+        self.assertEqual(router.split(["a", "b", "c"]), (["a"], ["b", "c"]))
+        self.assertEqual(router.group(["a", "b", "c"]), {Router.LOCAL: ["a"], "host2:5000": ["b", "c"]})
+
+    def test_hybrid_counters(self):
+        mariadb = DecentralizedComponentInstance("mariadb", mariadb_master_type())
+        keystone = DecentralizedComponentInstance("keystone", keystone_type())
+        messaging = HybridMessaging(MailboxMessaging([mariadb, keystone]), RemoteMessaging(), {mariadb, keystone})
+        constr = PortConstraintMessage("mariadb", "service", "disabled")
+        messaging.send_messages(mariadb, 1, {("keystone", constr), ("keystone2", constr), ("keystone3", constr)})
+        messaging.send_acks(keystone, {"mariadb", "keystone2"})
+        self.assertEqual(messaging.n_local_send(), 1)
+        self.assertEqual(messaging.n_remote_send(), 2)
+        self.assertEqual(messaging.router().counters(), {Router.LOCAL: {"messages": 1, "acks": 1},
+                                                         "": {"messages": 2, "acks": 1}})
+
+
+if __name__ == '__main__':
+    unittest.main()
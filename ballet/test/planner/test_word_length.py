@@ -0,0 +1,105 @@
+import unittest
+from unittest import mock
+
+import minizinc
+from minizinc import Status
+
+from ballet.assembly.simplified.assembly_d import DecentralizedComponentInstance
+from ballet.assembly.simplified.type.basics import parallel_user_type
+from ballet.assembly.simplified.type.openstack import mariadb_worker_type
+from ballet.planner.component_plan_node import ComponentNode, batch_bhv_inference
+from ballet.planner.goal import BehaviorReconfigurationGoal, PlaceReconfigurationGoal
+from ballet.planner.minizinc.mzn_native import native_solver
+from ballet.planner.minizinc.mzn_regular import MiniZincModelComponent, MiniZincBehaviorRegularConstraint, \
+    MiniZincStateRegularConstraint, MiniZincWaitRegularConstraint
+
+
+class TestWordLength(unittest.TestCase):
+
+    def setUp(self):
+        self.comp = DecentralizedComponentInstance("worker", mariadb_worker_type())
+
+    def model(self, place, constraints):
+        return MiniZincModelComponent(self.comp, place, None, set(constraints))
+
+    def test_estimate(self):
+        self.assertEqual(self.model("initiated", [MiniZincBehaviorRegularConstraint("deploy")]).estimated_word_length(), 1)
+        self.assertEqual(self.model("initiated", [MiniZincBehaviorRegularConstraint("deploy"),
+                                                  MiniZincBehaviorRegularConstraint("interrupt"),
+                                                  MiniZincStateRegularConstraint("initiated", final=True)])
+                         .estimated_word_length(), 3)
+
+    def test_estimate_counts_waits(self):
+        wait = MiniZincWaitRegularConstraint("master", "deploy", "master_service", "enabled")
+        model = self.model("initiated", [MiniZincBehaviorRegularConstraint("deploy"), wait])
+        self.assertEqual(model.estimated_word_length(), 2)
+
+    def test_estimate_unreachable(self):
+        model = self.model("initiated", [MiniZincStateRegularConstraint("nowhere")])
+        self.assertEqual(model.estimated_word_length(), model.max_word_length())
+        # An intermediate place is not a place of the reduced automaton
+        model = self.model("allocated", [MiniZincBehaviorRegularConstraint("deploy")])
+        self.assertEqual(model.estimated_word_length(), model.max_word_length())
+
+    def test_estimate_is_sufficient(self):
+        model = self.model("initiated", [MiniZincBehaviorRegularConstraint("deploy"),
+                                         MiniZincBehaviorRegularConstraint("interrupt"),
+                                         MiniZincStateRegularConstraint("initiated", final=True)])
+        model.set_word_length(model.estimated_word_length())
+        result = model.run(native_solver).result()
+        self.assertEqual(result.status, Status.OPTIMAL_SOLUTION)
+        self.assertEqual(result["sequence"], ["deploy", "interrupt", "uninstall"])
+
+    def test_node_deepens(self):
+        node = ComponentNode(self.comp, "initiated", solver=native_solver, cache=None)
+        node.addInstructionContent(BehaviorReconfigurationGoal("deploy"))
+        node.addInstructionContent(BehaviorReconfigurationGoal("interrupt"))
+        node.addInstructionContent(PlaceReconfigurationGoal("initiated", final=True))
+        regular = node._regular.copy()
+        # An estimate too short for the goals is deepened until the model is satisfiable
+        regular.estimated_word_length = lambda: 1
+        result = node._solve(regular, "local_dec_mzn", "local_dec_mzn/worker")
+        self.assertEqual([bhv for bhv in result["sequence"] if bhv != "skip"], ["deploy", "interrupt", "uninstall"])
+        self.assertEqual(len(result["sequence"]), 4)
+
+    def test_estimate_skips_noops(self):
+        # suspend is a self-loop of configured: it has to be deployed first
+        user = DecentralizedComponentInstance("u", parallel_user_type(2))
+        model = MiniZincModelComponent(user, "configured", None, {MiniZincBehaviorRegularConstraint("suspend")})
+        self.assertEqual(model.estimated_word_length(), 2)
+        node = ComponentNode(user, "configured", solver=native_solver, cache=None)
+        node.addInstructionContent(BehaviorReconfigurationGoal("suspend"))
+        sequence, _ = node.bhv_inference()
+        self.assertEqual([bhv for bhv in sequence if bhv != "skip"], ["deploy", "suspend"])
+
+    def test_node_deepens_noops(self):
+        user = DecentralizedComponentInstance("u", parallel_user_type(2))
+        node = ComponentNode(user, "configured", solver=native_solver, cache=None)
+        node.addInstructionContent(BehaviorReconfigurationGoal("suspend"))
+        regular = node._regular.copy()
+        # A length only satisfiable through the no-op is deepened as well
+        regular.estimated_word_length = lambda: 1
+        result = node._solve(regular, "local_dec_mzn", "local_dec_mzn/u")
+        self.assertEqual([bhv for bhv in result["sequence"] if bhv != "skip"], ["deploy", "suspend"])
+
+    @unittest.skipIf(minizinc.default_driver is None, "MiniZinc is not installed")
+    def test_batch_deepens_noops(self):
+        user = DecentralizedComponentInstance("u", parallel_user_type(2))
+        nodes = [ComponentNode(user, "configured", cache=None), ComponentNode(self.comp, "initiated", cache=None)]
+        nodes[0].addInstructionContent(BehaviorReconfigurationGoal("suspend"))
+        nodes[1].addInstructionContent(BehaviorReconfigurationGoal("deploy"))
+        # The batch solves u through the no-op, which is then deepened alone
+        with mock.patch.object(MiniZincModelComponent, "estimated_word_length", return_value=1):
+            ((user_sequence, _), (worker_sequence, _)) = batch_bhv_inference(nodes)
+        self.assertEqual([bhv for bhv in user_sequence if bhv != "skip"], ["deploy", "suspend"])
+        self.assertEqual(worker_sequence, ["deploy"])
+
+    def test_node_fixed_word_length(self):
+        node = ComponentNode(self.comp, "initiated", 10, solver=native_solver, cache=None)
+        node.addInstructionContent(BehaviorReconfigurationGoal("deploy"))
+        sequence, _ = node.bhv_inference()
+        self.assertEqual(sequence, ["deploy"] + ["skip"] * 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,7 +14,7 @@ def map_index(f: Callable[[A, int], B], seq: list[A]) -> list[B]:
 
 
 def flatmap(f: Callable[[A], Iterable[B]], seq: list[A]) -> list[B]:
-    return sum([list(f(s)) for s in seq], [])
+    return [b for s in seq for b in f(s)]
 
 
 def find(p: Callable[[A], bool], seq: list[A]) -> Optional[A]:
@@ -6,3 +6,18 @@ def add_mzn_ext(x: str) -> str:
 
 
 mzn_max_int = 1000000
+
+
+def mzn_cost_table(states: list[str], behaviors: list[str], costs: dict[tuple[str, str], int]) -> str:
+    # Cost of applying a behavior in a state, mzn_max_int when it is not a (useful) transition
+    lines = ["|" + ", ".join([str(costs.get((state, bhv), mzn_max_int)) for bhv in behaviors]) for state in states]
+    return "array[STATE, BEHAVIOR] of int: transition_cost = \n[" + "\n".join(lines) + "|];"
+
+
+def mzn_port_table(ports: dict[str, list[str]], states: list[str]) -> str:
+    # port_bound[port, state] is true iff the port is enabled when the state is active
+    if len(ports) == 0:
+        return ""
+    lines = ["|" + ", ".join(["true" if state in ports[port] else "false" for state in states]) for port in ports]
+    return "enum PORT = {" + ', '.join(ports.keys()) + "};\n" + \
+           "array[PORT, STATE] of bool: port_bound = \n[" + "\n".join(lines) + "|];"